@@ -0,0 +1,51 @@
+"""Time parsing a vendor execution list, with and without the job cache, and
+loading it converted to a job file.
+
+Usage: python benchmarks/bench_execution_list.py [RTCExecutionlist_*.txt]
+"""
+
+import logging
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from rtc6_fastcs.execution_list import parse_execution_list
+from rtc6_fastcs.job_cache import load_execution_list
+from rtc6_fastcs.job_file import convert_execution_list, read_job
+
+DEFAULT_FILE = (
+    Path(__file__).parent.parent
+    / "shape_protocols"
+    / "RTCExecutionlist_SingleTrenchPlusStrainRelief.txt"
+)
+
+
+def best_of(func, repeat: int = 7) -> float:
+    """Best time per call in seconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def main(filepath: Path):
+    # The skipped command warning would be logged on every parse
+    logging.disable(logging.WARNING)
+    lines = len(filepath.read_text().splitlines())
+    _, commands = parse_execution_list(filepath)
+    print(f"{filepath.name}: {lines} lines, {len(commands)} path commands")
+
+    parse = best_of(lambda: parse_execution_list(filepath))
+    print(f"parse:       {parse * 1e3:8.3f} ms ({lines / parse:,.0f} lines/s)")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        load_execution_list(filepath, cache_dir)
+        cached = best_of(lambda: load_execution_list(filepath, cache_dir))
+        job = convert_execution_list(filepath, Path(cache_dir) / "job.rtcjob")
+        mapped = best_of(lambda: read_job(job))
+    print(f"cached load: {cached * 1e3:8.3f} ms")
+    print(f"job file:    {mapped * 1e3:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_FILE)
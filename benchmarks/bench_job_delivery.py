@@ -0,0 +1,276 @@
+"""Time delivering a job to the card, from the plan down to the bindings.
+
+Each stage is timed on its own, with a SimulatedRtc6 in place of the card. The
+lower stages are included in the times of the ones above them.
+
+    parse    reading the execution list (files only)
+    plan     making the path arrays and running the plan generator, without a device
+    binding  add_path on the simulated card
+    handler  PATH:Proc in the controller
+    ca       writing the path arrays and PATH:Proc over CA to a soft IOC
+    total    the whole plan run by a RunEngine against the soft IOC, until the
+             list has been executed
+
+ca and total need --ioc, which runs a soft IOC with a simulated card in a
+subprocess. The simulated card executes lists instantly, so total is the delivery
+time rather than the marking time.
+
+Usage: python benchmarks/bench_job_delivery.py [--ioc] [RTCExecutionlist_*.txt ...]
+
+With no files, the bundled shape_protocols are run, followed by synthetic
+polygons of 10^3 to 10^6 vertices.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+import timeit
+import uuid
+from collections.abc import Callable, Coroutine, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+from rtc6_fastcs.bindings.simulated_rtc6 import SimulatedRtc6
+from rtc6_fastcs.controller import RtcController
+from rtc6_fastcs.controller.rtc_controller import LIST_MEMORY, RtcListOperations
+from rtc6_fastcs.cut_shapes import execution_list_to_plan, run_execution_list
+from rtc6_fastcs.device import Rtc6Eth
+from rtc6_fastcs.execution_list import parse_execution_list
+from rtc6_fastcs.path_commands import CA_MAX_ARRAY_BYTES, PathArrays
+from rtc6_fastcs.plan_stubs import add_path, draw_polygon, polygon_path
+
+SHAPE_PROTOCOLS = Path(__file__).parent.parent / "shape_protocols"
+SYNTHETIC_SIZES = [10**3, 10**4, 10**5, 10**6]
+REPEAT = 3
+IOC_START_TIMEOUT = 30.0
+
+# Keep CA on this machine, for both the IOC subprocess and the client
+os.environ.setdefault("EPICS_CA_ADDR_LIST", "127.0.0.1")
+os.environ.setdefault("EPICS_CA_AUTO_ADDR_LIST", "NO")
+os.environ.setdefault("EPICS_CA_MAX_ARRAY_BYTES", str(CA_MAX_ARRAY_BYTES))
+
+
+def best_of(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """Best time per call in seconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+async def best_of_async(
+    func: Callable[[], Coroutine],
+    setup: Callable[[], Coroutine],
+    repeat: int = REPEAT,
+) -> float:
+    """Best time for one await of func, running setup before each one"""
+    times = []
+    for _ in range(repeat):
+        await setup()
+        start = time.perf_counter()
+        await func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def synthetic_polygon(vertices: int) -> list[tuple[int, int, bool]]:
+    """A random walk in um, with a jump every 100 points to start a new feature"""
+    rng = np.random.default_rng(seed=0)
+    xy = np.cumsum(rng.integers(-20, 21, size=(vertices, 2)), axis=0)
+    return [(int(x), int(y), bool(i % 100)) for i, (x, y) in enumerate(xy)]
+
+
+class Job:
+    """A job as it reaches each stage, either an execution list or a polygon"""
+
+    def __init__(
+        self, name: str, filepath: Path | None = None, points: list | None = None
+    ) -> None:
+        self.name = name
+        self.filepath = filepath
+        self.points = points
+        if filepath is not None:
+            self.config, self.commands = parse_execution_list(filepath)
+        else:
+            self.commands = polygon_path(points or [], arcs=False)
+
+    def parse(self) -> None:
+        assert self.filepath is not None
+        parse_execution_list(self.filepath)
+
+    def plan(self, rtc: Rtc6Eth) -> list:
+        """Run the plan generator through, as the RunEngine would without a device"""
+        if self.filepath is not None:
+            return list(execution_list_to_plan(rtc, self.config, self.commands))
+        return list(add_path(rtc, polygon_path(self.points or [], arcs=False)))
+
+    def full_plan(self, rtc: Rtc6Eth):
+        if self.filepath is not None:
+            return run_execution_list(rtc, self.filepath)
+        return draw_polygon(rtc, self.points or [])
+
+
+def time_binding(commands: PathArrays) -> float:
+    card = SimulatedRtc6()
+    card.connect("127.0.0.1", "", "")
+    card.config_list_memory(LIST_MEMORY, LIST_MEMORY)
+
+    def load():
+        card.load_list(1, 0)
+        card.add_path(commands.cmd_type, commands.x, commands.y, commands.angle)
+
+    return best_of(load)
+
+
+async def time_handler(commands: PathArrays) -> float:
+    controller = RtcController("127.0.0.1", "", "", bindings=SimulatedRtc6())
+    await controller.connect()
+    list_operations = controller.get_sub_controllers()["LIST"]
+    assert isinstance(list_operations, RtcListOperations)
+    # Some of the shape protocols call subroutines, which the card would have
+    await list_operations.subroutines_loaded.set(True)
+    for field in ("cmd_type", "x", "y", "angle"):
+        controller.path_controller.stage(field, getattr(commands, field))
+    try:
+        return await best_of_async(
+            controller.path_controller.proc, list_operations.init_list
+        )
+    finally:
+        await controller.close()
+
+
+async def time_ca(rtc: Rtc6Eth, commands: PathArrays) -> float:
+    path = rtc.list.path
+
+    async def write():
+        await asyncio.gather(
+            path.cmd_type.set(commands.cmd_type),
+            path.x.set(commands.x),
+            path.y.set(commands.y),
+            path.angle.set(commands.angle),
+        )
+        await path.proc.trigger()
+
+    return await best_of_async(write, rtc.list.init_list.trigger)
+
+
+def time_total(run_engine, rtc: Rtc6Eth, job: Job) -> float:
+    times = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        run_engine(job.full_plan(rtc))
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def report(stage: str, seconds: float, vertices: int, below: float | None = None):
+    extra = "" if below is None else f"  (+{(seconds - below) * 1e3:.3f} ms)"
+    print(
+        f"  {stage:8} {seconds * 1e3:10.3f} ms {vertices / seconds:14,.0f} vertices/s"
+        f"{extra}"
+    )
+
+
+def bench(job: Job, ioc: tuple | None) -> None:
+    vertices = len(job.commands)
+    print(f"{job.name}: {vertices} vertices")
+    if job.filepath is not None:
+        report("parse", best_of(job.parse), vertices)
+    rtc = Rtc6Eth(name="rtc6")
+    report("plan", best_of(lambda: job.plan(rtc)), vertices)
+    binding = time_binding(job.commands)
+    report("binding", binding, vertices)
+    handler = asyncio.run(time_handler(job.commands))
+    report("handler", handler, vertices, binding)
+    if ioc is not None:
+        from bluesky.run_engine import call_in_bluesky_event_loop
+
+        run_engine, rtc = ioc
+        ca = call_in_bluesky_event_loop(time_ca(rtc, job.commands))
+        report("ca", ca, vertices, handler)
+        report("total", time_total(run_engine, rtc, job), vertices, ca)
+
+
+@contextmanager
+def soft_ioc() -> Iterator[tuple]:
+    """Run a soft IOC with a simulated card and connect a device to it"""
+    from bluesky.run_engine import RunEngine, call_in_bluesky_event_loop
+
+    prefix = f"BENCH-{uuid.uuid4().hex[:8].upper()}"
+    process = subprocess.Popen(
+        [sys.executable, __file__, "--serve", prefix], stdin=subprocess.PIPE
+    )
+    try:
+        run_engine = RunEngine(call_returns_result=True)
+        rtc = Rtc6Eth(f"{prefix}:", name="rtc6")
+        try:
+            call_in_bluesky_event_loop(rtc.connect(timeout=IOC_START_TIMEOUT))
+        except Exception as e:
+            if process.poll() is not None:
+                raise RuntimeError("Soft IOC failed to start, see its output") from e
+            raise
+        call_in_bluesky_event_loop(rtc.list.subroutines_loaded.set(True))
+        yield run_engine, rtc
+    finally:
+        # The IOC exits at the end of its stdin
+        assert process.stdin is not None
+        process.stdin.close()
+        process.wait(timeout=IOC_START_TIMEOUT)
+
+
+def serve(prefix: str) -> None:
+    """Run the IOC as the ioc command does, with a card which executes instantly"""
+    from fastcs.launch import FastCS
+    from fastcs.transport.epics.options import EpicsIOCOptions, EpicsOptions
+
+    from rtc6_fastcs.controller.path_records import (
+        create_job_config_record,
+        create_path_records,
+    )
+
+    controller = RtcController(
+        "127.0.0.1", "", "", bindings=SimulatedRtc6(time_scale=0)
+    )
+    options = EpicsOptions(ioc=EpicsIOCOptions(pv_prefix=prefix, terminal=False))
+    fastcs = FastCS(controller, options)
+    create_path_records(prefix, controller.path_controller)
+    create_job_config_record(prefix, controller.control_settings)
+    fastcs.run()
+    sys.stdin.read()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--ioc", action="store_true", help="include CA and total")
+    parser.add_argument("--serve", metavar="PREFIX", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve)
+        return
+
+    # The skipped command warning would be logged on every parse
+    logging.disable(logging.WARNING)
+    files = args.files or sorted(SHAPE_PROTOCOLS.glob("RTCExecutionlist_*.txt"))
+    jobs = [Job(filepath.name, filepath=filepath) for filepath in files]
+    if not args.files:
+        jobs += [
+            Job(f"polygon {size}", points=synthetic_polygon(size))
+            for size in SYNTHETIC_SIZES
+        ]
+    if args.ioc:
+        with soft_ioc() as ioc:
+            for job in jobs:
+                bench(job, ioc)
+    else:
+        for job in jobs:
+            bench(job, None)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import logging
+import os
 import subprocess
 from functools import cache
 from pathlib import Path
@@ -8,7 +9,8 @@ import typer
 from fastcs.launch import FastCS
 from fastcs.transport.epics.options import EpicsIOCOptions, EpicsOptions
 
-from rtc6_fastcs.controller import RtcController
+from rtc6_fastcs.controller import BoxConfig, RtcController, RtcMultiController
+from rtc6_fastcs.path_commands import CA_MAX_ARRAY_BYTES
 
 from . import __version__
 
@@ -46,7 +48,30 @@ def install_library():
     )
 
 
-def create_ui_and_docs(controller: RtcController, prefix: str, output_path: Path):
+@app.command()
+def convert_job(
+    execution_lists: Annotated[
+        list[Path],
+        typer.Argument(
+            help="Vendor RTCExecutionlist_*.txt files to convert to .rtcjob files, "
+            "which are written next to them",
+            exists=True,
+            dir_okay=False,
+        ),
+    ],
+):
+    """
+    Convert vendor execution lists to binary job files, which load much faster
+    """
+    from rtc6_fastcs.job_file import convert_execution_list
+
+    for execution_list in execution_lists:
+        typer.echo(convert_execution_list(execution_list))
+
+
+def create_ui_and_docs(
+    controller: RtcController | RtcMultiController, prefix: str, output_path: Path
+):
     from fastcs.transport.epics.docs import EpicsDocs, EpicsDocsOptions
     from fastcs.transport.epics.gui import EpicsGUI, EpicsGUIOptions
 
@@ -60,7 +85,11 @@ def create_ui_and_docs(controller: RtcController, prefix: str, output_path: Path
 def ioc(
     pv_prefix: Annotated[str, typer.Argument(help="Name of the IOC")] = "RTC6ETH",
     box_ip: Annotated[
-        str, typer.Argument(help="IP Address of the RTC6 ethbox")
+        str,
+        typer.Argument(
+            help="IP Address of the RTC6 ethbox, or a comma separated list of them "
+            "to drive several from this IOC, under CARD1, CARD2 and so on",
+        ),
     ] = "172.23.171.209",
     program_file_dir: Annotated[
         str, typer.Argument(help="Path to the directory of the RTC6 program files")
@@ -68,13 +97,15 @@ def ioc(
     correction_file: Annotated[
         str,
         typer.Argument(
-            help="Path to the RTC6 correction file",
+            help="Path to the RTC6 correction file, or one for each box, comma "
+            "separated",
         ),
     ] = "./correction_files/D3_10019.ct5",
     coordinate_system_correction_file: Annotated[
         str,
         typer.Argument(
-            help="path to a numpy matrix to use to correct the coordinate system",
+            help="path to a numpy matrix to use to correct the coordinate system, or "
+            "one for each box, comma separated",
         ),
     ] = "./correction_files/coord_transform",
     retry_connect: Annotated[
@@ -83,6 +114,12 @@ def ioc(
             help="Retry connecting to the RTC6 if the initial attempt fails",
         ),
     ] = False,
+    simulate: Annotated[
+        bool,
+        typer.Option(
+            help="Run against a simulated card instead of the eth box at box_ip",
+        ),
+    ] = False,
     output_path: Annotated[
         Path,
         typer.Option(
@@ -106,11 +143,25 @@ def ioc(
         correction_file,
         coordinate_system_correction_file,
         retry_connect,
+        simulate,
     )
     create_ui_and_docs(controller, pv_prefix, output_path)
 
+    os.environ.setdefault("EPICS_CA_MAX_ARRAY_BYTES", str(CA_MAX_ARRAY_BYTES))
     epics_options = EpicsOptions(ioc=EpicsIOCOptions(pv_prefix=pv_prefix))
     fastcs = FastCS(controller, epics_options)
+    # Must come after the fastcs records are created and before the IOC starts
+    from rtc6_fastcs.controller.path_records import (
+        create_job_config_record,
+        create_path_records,
+    )
+
+    cards = (
+        controller.cards if isinstance(controller, RtcMultiController) else [controller]
+    )
+    for card in cards:
+        create_path_records(pv_prefix, card.path_controller)
+        create_job_config_record(pv_prefix, card.control_settings)
     fastcs.run()
 
 
@@ -121,14 +172,45 @@ def get_controller(
     correction_file: str,
     coordinate_system_correction_file: str,
     retry_connect: bool,
-) -> RtcController:
-    return RtcController(
-        box_ip,
-        program_file,
-        correction_file,
-        coordinate_system_correction_file,
-        retry_connect,
-    )
+    simulate: bool = False,
+) -> RtcController | RtcMultiController:
+    box_ips = box_ip.split(",")
+    if len(box_ips) == 1:
+        return RtcController(
+            box_ip,
+            program_file,
+            correction_file,
+            coordinate_system_correction_file,
+            retry_connect,
+            _simulated_card() if simulate else None,
+        )
+    boxes = [
+        BoxConfig(ip, program_file, correction, coordinate_correction)
+        for ip, correction, coordinate_correction in zip(
+            box_ips,
+            _per_box(correction_file, len(box_ips)),
+            _per_box(coordinate_system_correction_file, len(box_ips)),
+            strict=True,
+        )
+    ]
+    bindings = [_simulated_card() for _ in boxes] if simulate else None
+    return RtcMultiController(boxes, retry_connect, bindings)
+
+
+def _per_box(files: str, boxes: int) -> list[str]:
+    """A comma separated list with a file for each box, or one for them all"""
+    per_box = files.split(",")
+    if len(per_box) == 1:
+        return per_box * boxes
+    if len(per_box) != boxes:
+        raise typer.BadParameter(f"Expected 1 or {boxes} files, got {files}")
+    return per_box
+
+
+def _simulated_card():
+    from rtc6_fastcs.bindings.simulated_rtc6 import SimulatedRtc6
+
+    return SimulatedRtc6()
 
 
 if __name__ == "__main__":
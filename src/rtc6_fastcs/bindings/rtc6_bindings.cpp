@@ -1,10 +1,15 @@
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+#include <pybind11/stl.h>
 #include <cstdint>
+#include <tuple>
+#include <utility>
 #include <string>
 
 #include "scanlab/rtc6.h"
 #include "boost/format.hpp"
 #include <bitset>
+#include <mutex>
 
 namespace py = pybind11;
 using boost::format;
@@ -61,18 +66,17 @@ std::string ip_int_to_str(int ip) // remove this one from exposed functions
 
 void init_dll()
 {
-    const auto initLib = init_rtc6_dll();
-    if (initLib != ERROR_NO_ERROR)
-    {
-        if (initLib & ERROR_VERSION_MISMATCH || initLib & ERROR_NO_CARD)
-        {
-            // These errors only pertain to PCIe boards
-        }
-        else
-        {
-            throw RtcError(str(format("Initialisation of the RTC6 library failed with error code: %1%") % initLib));
-        }
-    }
+    // Only once per process, however many boxes connect and from whichever threads.
+    // If it throws it is tried again on the next connect.
+    static std::once_flag initialised;
+    std::call_once(initialised, []()
+                   {
+                       const auto initLib = init_rtc6_dll();
+                       // Version mismatch and no card errors only pertain to PCIe boards
+                       if (initLib != ERROR_NO_ERROR && !(initLib & ERROR_VERSION_MISMATCH || initLib & ERROR_NO_CARD))
+                       {
+                           throw RtcError(str(format("Initialisation of the RTC6 library failed with error code: %1%") % initLib));
+                       } });
 }
 
 std::string failed_text(std::string task, int card, int errorCode)
@@ -140,20 +144,27 @@ int load_program_and_correction_files(uint card, char *programFilePath, char *co
     return n_get_serial_number(card);
 }
 
+// The functions below which take a cardNo are shared by the module functions, which
+// act on the card chosen by connect, and by Card, which has its own
+
+// The card the module functions act on, as chosen with select_rtc by connect
+uint selectedCard = 1;
+
 // Real functions which we expect to use and expose
 void clear_all_errors() { reset_error(-1); }
 
-void check_connection()
+void check_card_connection(uint cardNo)
 {
-    const int connection = eth_check_connection();
+    const int connection = n_eth_check_connection(cardNo);
     if (!connection) // 1 if connection OK
     {
-        const int error = get_error();
-        const std::string errorString = parse_error(get_error());
-        throw RtcConnectionError(str(format("Checking connection to the eth box failed! Result of check: %1%. Error %2%: %3%") % connection % error % errorString));
+        const int error = n_get_error(cardNo);
+        throw RtcConnectionError(str(format("Checking connection to the eth box for card %1% failed! Result of check: %2%. Error %3%: %4%") % cardNo % connection % error % parse_error(error)));
     }
 }
 
+void check_connection() { check_card_connection(selectedCard); }
+
 std::string get_error_string()
 {
     return parse_error(get_error());
@@ -171,6 +182,7 @@ int connect(const char *ipStr, char *programFilePath, char *correctionFilePath)
         const int error = get_error();
         throw RtcError(str(format("select_rtc for card %1% failed with result: %2%. Most likely, a card was not found at the given IP address: %3%. Alternatively, it may already be acquired by another process. Error code: %4%. Description: %5%") % cardNo % result % ipStr % error % parse_error(error)));
     }
+    selectedCard = cardNo;
     return load_program_and_correction_files(cardNo, programFilePath, correctionFilePath);
     const int error = get_error();
     if (error)
@@ -179,6 +191,40 @@ int connect(const char *ipStr, char *programFilePath, char *correctionFilePath)
     }
 }
 
+// Acquire a card which should still have the program and correction files from an
+// earlier connect, without downloading them again. Throws RtcError if no program
+// is running on it, e.g. because it was power cycled, in which case connect must be
+// used instead. Returns the serial number, so the caller can check it is the card
+// it loaded.
+int acquire_loaded_card(uint cardNo)
+{
+    const auto acquire = acquire_rtc(cardNo);
+    if (acquire != cardNo)
+    {
+        throw RtcError(failed_text("acquire_rtc", cardNo, acquire));
+    }
+    // 0 until a program file has been loaded since power on
+    if (!n_get_hex_version(cardNo))
+    {
+        throw RtcError(str(format("Card %1% has no program loaded") % cardNo));
+    }
+    return n_get_serial_number(cardNo);
+}
+
+int reconnect(const char *ipStr)
+{
+    init_dll();
+    int cardNo = eth_assign_card_ip(eth_convert_string_to_ip(ipStr), 0);
+    int result = select_rtc(cardNo);
+    if (result != cardNo)
+    {
+        const int error = get_error();
+        throw RtcError(str(format("select_rtc for card %1% failed with result: %2%. Error code: %3%. Description: %4%") % cardNo % result % error % parse_error(error)));
+    }
+    selectedCard = cardNo;
+    return acquire_loaded_card(cardNo);
+}
+
 struct CardInfo
 {
     // Holder for card info from the manual page 354
@@ -202,15 +248,78 @@ private:
     bool isAcquired;
 };
 
-CardInfo get_card_info()
+CardInfo read_card_info(uint cardNo)
 {
-    check_connection();
+    check_card_connection(cardNo);
     int32_t out[16];
     auto out_ptr = reinterpret_cast<std::uintptr_t>(&out);
-    eth_get_card_info(1, out_ptr);
+    eth_get_card_info(cardNo, out_ptr);
     return CardInfo(out);
 }
 
+CardInfo get_card_info() { return read_card_info(selectedCard); }
+
+struct StatusSnapshot
+{
+    // Everything the IOC polls, so there is only one call from python per update.
+    // Each value is a separate read from the card, so they may be from different
+    // moments and shouldn't be checked against each other.
+    uint inputPointer;
+    uint listSpace;
+    uint listStatus; // bitmask, bit n is set for ListStatus n
+    uint ioStatus;
+    uint lastError;
+};
+
+StatusSnapshot read_status_snapshot(uint cardNo)
+{
+    StatusSnapshot snapshot;
+    snapshot.listStatus = n_read_status(cardNo);
+    snapshot.inputPointer = n_get_input_pointer(cardNo);
+    snapshot.listSpace = n_get_list_space(cardNo);
+    snapshot.ioStatus = n_get_io_status(cardNo);
+    snapshot.lastError = n_get_last_error(cardNo);
+    return snapshot;
+}
+
+StatusSnapshot get_status_snapshot() { return read_status_snapshot(selectedCard); }
+
+// The header settings of an execution list, see ExecutionListConfig, so that a job
+// is set up with one call from python instead of one per setting
+struct ListConfig
+{
+    double angle = 90.0;
+    std::tuple<int, int, int> offsetXyz{0, 0, 0};
+    double markSpeed = 271.68;
+    double jumpSpeed = 815.04;
+    int scanaheadAutodelays = 1;
+    std::tuple<int, int> scanaheadLaserShifts{0, 0};
+    std::tuple<int, int, int> scanaheadLineParams{0, 100, 100};
+    int firstpulseKiller = 6400;
+    std::tuple<int, int> laserPulses{3200, 640};
+    std::tuple<int, int, double, int> wobbelMode{0, 0, 0.0, 0};
+    std::tuple<double, int, int, int> skyWritingPara{0.0, 0, 0, 0};
+};
+
+void write_list_config(uint cardNo, const ListConfig &config)
+{
+    // Same order as the header of an execution list. The speeds act straight away,
+    // the rest are list commands
+    n_set_angle_list(cardNo, 1, config.angle, 0);
+    n_set_offset_xyz_list(cardNo, 1, std::get<0>(config.offsetXyz), std::get<1>(config.offsetXyz), std::get<2>(config.offsetXyz), 0);
+    n_set_mark_speed_ctrl(cardNo, config.markSpeed);
+    n_set_jump_speed_ctrl(cardNo, config.jumpSpeed);
+    n_activate_scanahead_autodelays_list(cardNo, config.scanaheadAutodelays);
+    n_set_scanahead_laser_shifts_list(cardNo, std::get<0>(config.scanaheadLaserShifts), std::get<1>(config.scanaheadLaserShifts));
+    n_set_scanahead_line_params_list(cardNo, std::get<0>(config.scanaheadLineParams), std::get<1>(config.scanaheadLineParams), std::get<2>(config.scanaheadLineParams));
+    n_set_firstpulse_killer_list(cardNo, config.firstpulseKiller);
+    n_set_laser_pulses(cardNo, std::get<0>(config.laserPulses), std::get<1>(config.laserPulses));
+    n_set_wobbel_mode(cardNo, std::get<0>(config.wobbelMode), std::get<1>(config.wobbelMode), std::get<2>(config.wobbelMode), std::get<3>(config.wobbelMode));
+    n_set_sky_writing_para_list(cardNo, std::get<0>(config.skyWritingPara), std::get<1>(config.skyWritingPara), std::get<2>(config.skyWritingPara), std::get<3>(config.skyWritingPara));
+}
+
+void apply_list_config(const ListConfig &config) { write_list_config(selectedCard, config); }
+
 void init_list_loading(int listNo)
 {
     set_start_list(listNo);
@@ -226,6 +335,19 @@ enum ListStatus
     USED1,
     USED2,
 };
+enum PathCommandType
+{
+    JUMP,
+    LINE,
+    ARC,
+    SET_MARK_SPEED,
+    SET_JUMP_SPEED,
+    SET_LASER_POWER,
+    SET_TRIGGER,
+    SUB_CALL_REPEAT,
+    LIST_NOP,
+    SAVE_AND_RESTART_TIMER,
+};
 enum LaserMode
 {
     CO2,
@@ -236,10 +358,10 @@ enum LaserMode
     YAG5,
     LASER6,
 };
-py::list get_list_statuses()
+py::list read_list_statuses(uint cardNo)
 {
     py::list result;
-    std::bitset<32> statuses(read_status());
+    std::bitset<32> statuses(n_read_status(cardNo));
     for (int status = 0; status != 8; status++)
     {
         if (statuses[status])
@@ -250,6 +372,99 @@ py::list get_list_statuses()
     return result;
 }
 
+py::list get_list_statuses() { return read_list_statuses(selectedCard); }
+
+// Check path arrays up front so that a bad path doesn't leave a partial list
+void check_path_arrays(
+    const py::array_t<uint8_t, py::array::c_style | py::array::forcecast> &types,
+    const py::array_t<int32_t, py::array::c_style | py::array::forcecast> &xs,
+    const py::array_t<int32_t, py::array::c_style | py::array::forcecast> &ys,
+    const py::array_t<double, py::array::c_style | py::array::forcecast> &angles)
+{
+    if (types.ndim() != 1 || xs.ndim() != 1 || ys.ndim() != 1 || angles.ndim() != 1)
+    {
+        throw RtcListError(str(format("Path arrays must be 1-D, got dimensions types: %1%, x: %2%, y: %3%, angle: %4%") % types.ndim() % xs.ndim() % ys.ndim() % angles.ndim()));
+    }
+    const auto n = types.size();
+    if (xs.size() != n || ys.size() != n || angles.size() != n)
+    {
+        throw RtcListError(str(format("Path arrays must all be the same length, got types: %1%, x: %2%, y: %3%, angle: %4%") % n % xs.size() % ys.size() % angles.size()));
+    }
+    auto t = types.unchecked<1>();
+    for (py::ssize_t i = 0; i != n; i++)
+    {
+        if (t(i) > PathCommandType::SAVE_AND_RESTART_TIMER)
+        {
+            throw RtcListError(str(format("Unknown path command type %1% at index %2%") % int(t(i)) % i));
+        }
+    }
+}
+
+// Write a whole path to the current list in one call, so that the per-vertex
+// loop runs natively instead of crossing from python for every command
+std::pair<int, uint> write_path(
+    uint cardNo,
+    py::array_t<uint8_t, py::array::c_style | py::array::forcecast> types,
+    py::array_t<int32_t, py::array::c_style | py::array::forcecast> xs,
+    py::array_t<int32_t, py::array::c_style | py::array::forcecast> ys,
+    py::array_t<double, py::array::c_style | py::array::forcecast> angles)
+{
+    check_path_arrays(types, xs, ys, angles);
+    const auto n = types.size();
+    auto t = types.unchecked<1>();
+    auto x = xs.unchecked<1>();
+    auto y = ys.unchecked<1>();
+    auto a = angles.unchecked<1>();
+    // The arrays are held by the caller, so only the accessors are used from here
+    py::gil_scoped_release release;
+    for (py::ssize_t i = 0; i != n; i++)
+    {
+        switch (t(i))
+        {
+        case PathCommandType::JUMP:
+            n_jump_abs(cardNo, x(i), y(i));
+            break;
+        case PathCommandType::LINE:
+            n_mark_abs(cardNo, x(i), y(i));
+            break;
+        case PathCommandType::ARC:
+            n_arc_abs(cardNo, x(i), y(i), a(i));
+            break;
+        case PathCommandType::SET_MARK_SPEED:
+            n_set_mark_speed(cardNo, a(i));
+            break;
+        case PathCommandType::SET_JUMP_SPEED:
+            n_set_jump_speed(cardNo, a(i));
+            break;
+        case PathCommandType::SET_LASER_POWER:
+            n_set_laser_power(cardNo, x(i), y(i));
+            break;
+        case PathCommandType::SET_TRIGGER:
+            n_set_trigger(cardNo, x(i), y(i), static_cast<uint>(a(i)));
+            break;
+        case PathCommandType::SUB_CALL_REPEAT:
+            n_sub_call_repeat(cardNo, x(i), y(i));
+            break;
+        case PathCommandType::LIST_NOP:
+            n_list_nop(cardNo);
+            break;
+        case PathCommandType::SAVE_AND_RESTART_TIMER:
+            n_save_and_restart_timer(cardNo);
+            break;
+        }
+    }
+    return std::make_pair(static_cast<int>(n), n_get_input_pointer(cardNo));
+}
+
+std::pair<int, uint> add_path(
+    py::array_t<uint8_t, py::array::c_style | py::array::forcecast> types,
+    py::array_t<int32_t, py::array::c_style | py::array::forcecast> xs,
+    py::array_t<int32_t, py::array::c_style | py::array::forcecast> ys,
+    py::array_t<double, py::array::c_style | py::array::forcecast> angles)
+{
+    return write_path(selectedCard, types, xs, ys, angles);
+}
+
 void close_connection(uint card)
 {
     // TODO: check if there is anything to release
@@ -260,7 +475,7 @@ void close_connection(uint card)
     }
 }
 
-void set_laser_mode_by_enum_string(std::string mode)
+LaserMode laser_mode_from_string(std::string mode)
 {
     static std::unordered_map<std::string, LaserMode> const table = {
         {"CO2", LaserMode::CO2},
@@ -272,32 +487,154 @@ void set_laser_mode_by_enum_string(std::string mode)
         {"LASER6", LaserMode::LASER6},
     };
     auto m = table.find(mode);
-    if (m != table.end())
-    {
-        set_laser_mode(m->second);
-    }
-    else
+    if (m == table.end())
     {
         throw RtcError(str(format("Failed to set laser mode with unknown mode %1% ") % mode));
     }
+    return m->second;
+}
+
+void set_laser_mode_by_enum_string(std::string mode)
+{
+    set_laser_mode(laser_mode_from_string(mode));
 }
 
+// One eth box, driven through the n_ functions which name their card instead of
+// acting on the one chosen by select_rtc. Each box gets its own Card, and as
+// nothing is shared between them, calls for different cards can run at the same
+// time from different threads. The methods match the module functions, so a Card
+// can be used anywhere the module is.
+class Card
+{
+public:
+    int connect(const char *ipStr, char *programFilePath, char *correctionFilePath)
+    {
+        assign(ipStr);
+        return load_program_and_correction_files(cardNo, programFilePath, correctionFilePath);
+    }
+    int reconnect(const char *ipStr)
+    {
+        assign(ipStr);
+        return acquire_loaded_card(cardNo);
+    }
+    void close()
+    {
+        if (!release_rtc(cardNo))
+        {
+            throw RtcConnectionError("Could not release card - maybe it was not acquired?");
+        }
+    }
+    void check_connection() { check_card_connection(cardNo); }
+    CardInfo get_card_info() { return read_card_info(cardNo); }
+    uint get_error() { return n_get_error(cardNo); }
+    std::string get_error_string() { return parse_error(n_get_error(cardNo)); }
+    void clear_errors() { n_reset_error(cardNo, -1); }
+    uint get_last_error() { return n_get_last_error(cardNo); }
+    uint get_input_pointer() { return n_get_input_pointer(cardNo); }
+    uint get_io_status() { return n_get_io_status(cardNo); }
+    uint get_list_space() { return n_get_list_space(cardNo); }
+    py::list get_list_statuses() { return read_list_statuses(cardNo); }
+    StatusSnapshot get_status_snapshot() { return read_status_snapshot(cardNo); }
+
+    // List memory and execution
+    void config_list_memory(uint list1Mem, uint list2Mem) { n_config_list(cardNo, list1Mem, list2Mem); }
+    void init_list_loading(uint listNo) { n_set_start_list(cardNo, listNo); }
+    uint load_list(uint listNo, uint position) { return n_load_list(cardNo, listNo, position); }
+    void set_end_of_list() { n_set_end_of_list(cardNo); }
+    void execute_list(uint listNo) { n_execute_list(cardNo, listNo); }
+    void auto_change() { n_auto_change(cardNo); }
+    void list_repeat() { n_list_repeat(cardNo); }
+    void list_until(uint number) { n_list_until(cardNo, number); }
+
+    // List commands
+    void add_arc_to(int x, int y, double angle) { n_arc_abs(cardNo, x, y, angle); }
+    void add_jump_to(int x, int y) { n_jump_abs(cardNo, x, y); }
+    void add_line_to(int x, int y) { n_mark_abs(cardNo, x, y); }
+    void add_laser_on(uint time) { n_laser_on_list(cardNo, time); }
+    void list_nop() { n_list_nop(cardNo); }
+    void save_and_restart_timer() { n_save_and_restart_timer(cardNo); }
+    void set_angle_list(uint headNo, double angle, uint atOnce) { n_set_angle_list(cardNo, headNo, angle, atOnce); }
+    void set_offset_xyz_list(uint headNo, int x, int y, int z, uint atOnce) { n_set_offset_xyz_list(cardNo, headNo, x, y, z, atOnce); }
+    void activate_scanahead_autodelays_list(int mode) { n_activate_scanahead_autodelays_list(cardNo, mode); }
+    void set_scanahead_laser_shifts_list(int dLasOn, int dLasOff) { n_set_scanahead_laser_shifts_list(cardNo, dLasOn, dLasOff); }
+    void set_scanahead_line_params_list(uint cornerScale, uint endScale, uint accScale) { n_set_scanahead_line_params_list(cardNo, cornerScale, endScale, accScale); }
+    void set_firstpulse_killer_list(uint length) { n_set_firstpulse_killer_list(cardNo, length); }
+    void set_laser_pulses(uint halfPeriod, uint pulseLength) { n_set_laser_pulses(cardNo, halfPeriod, pulseLength); }
+    void set_wobbel_mode(uint transversal, uint longitudinal, double freq, int mode) { n_set_wobbel_mode(cardNo, transversal, longitudinal, freq, mode); }
+    void set_sky_writing_para_list(double timelag, int laserOnShift, uint nPrev, uint nPost) { n_set_sky_writing_para_list(cardNo, timelag, laserOnShift, nPrev, nPost); }
+    void apply_list_config(const ListConfig &config) { write_list_config(cardNo, config); }
+    std::pair<int, uint> add_path(
+        py::array_t<uint8_t, py::array::c_style | py::array::forcecast> types,
+        py::array_t<int32_t, py::array::c_style | py::array::forcecast> xs,
+        py::array_t<int32_t, py::array::c_style | py::array::forcecast> ys,
+        py::array_t<double, py::array::c_style | py::array::forcecast> angles)
+    {
+        return write_path(cardNo, types, xs, ys, angles);
+    }
+
+    // Control commands
+    void set_mark_speed_ctrl(double speed) { n_set_mark_speed_ctrl(cardNo, speed); }
+    void set_jump_speed_ctrl(double speed) { n_set_jump_speed_ctrl(cardNo, speed); }
+    void set_scanner_delays(uint jump, uint mark, uint polygon) { n_set_scanner_delays_ctrl(cardNo, jump, mark, polygon); }
+    void set_laser_mode(std::string mode) { n_set_laser_mode(cardNo, laser_mode_from_string(mode)); }
+    void set_laser_delays(int laserOnDelay, uint laserOffDelay) { n_set_laser_delays(cardNo, laserOnDelay, laserOffDelay); }
+    void set_laser_control(uint settings) { n_set_laser_control(cardNo, settings); }
+
+private:
+    // 0 until the first connect, when the library picks a free card number, which
+    // is then kept for this box
+    uint cardNo = 0;
+
+    void assign(const char *ipStr)
+    {
+        init_dll();
+        const uint assigned = eth_assign_card_ip(eth_convert_string_to_ip(ipStr), cardNo);
+        if (!assigned)
+        {
+            const int error = get_error();
+            throw RtcError(str(format("Could not assign a card number to the eth box at %1%. Error code: %2%. Description: %3%") % ipStr % error % parse_error(error)));
+        }
+        cardNo = assigned;
+    }
+};
+
 // Definition of our exposed python module - things must be registered here to be accessible
 PYBIND11_MODULE(rtc6_bindings, m)
 {
     m.doc() = "bindings for the scanlab rtc6 ethernet laser controller"; // optional module docstring
-    py::register_exception<RtcError>(m, "RtcError");
-    py::register_exception<RtcConnectionError>(m, "RtcConnectionError");
-    py::register_exception<RtcListError>(m, "RtcListError");
+    const auto &rtcError = py::register_exception<RtcError>(m, "RtcError");
+    const auto &rtcConnectionError = py::register_exception<RtcConnectionError>(m, "RtcConnectionError");
+    const auto &rtcListError = py::register_exception<RtcListError>(m, "RtcListError");
 
     // Structs
-    py::class_<CardInfo>(m, "CardInfo")
+    auto cardInfo = py::class_<CardInfo>(m, "CardInfo")
         .def_property("firmware_version", &CardInfo::getFirmwareVersion, nullptr)
         .def_property("serial_number", &CardInfo::getSerialNumber, nullptr)
         .def_property("ip_address", &CardInfo::getIpStr, nullptr)
         .def_property("is_acquired", &CardInfo::getIsAcquired, nullptr);
 
-    py::enum_<ListStatus>(m, "ListStatus")
+    auto statusSnapshot = py::class_<StatusSnapshot>(m, "StatusSnapshot")
+        .def_readonly("input_pointer", &StatusSnapshot::inputPointer)
+        .def_readonly("list_space", &StatusSnapshot::listSpace)
+        .def_readonly("list_status", &StatusSnapshot::listStatus)
+        .def_readonly("io_status", &StatusSnapshot::ioStatus)
+        .def_readonly("last_error", &StatusSnapshot::lastError);
+
+    auto listConfig = py::class_<ListConfig>(m, "ListConfig")
+        .def(py::init<>())
+        .def_readwrite("angle", &ListConfig::angle)
+        .def_readwrite("offset_xyz", &ListConfig::offsetXyz)
+        .def_readwrite("mark_speed", &ListConfig::markSpeed)
+        .def_readwrite("jump_speed", &ListConfig::jumpSpeed)
+        .def_readwrite("scanahead_autodelays", &ListConfig::scanaheadAutodelays)
+        .def_readwrite("scanahead_laser_shifts", &ListConfig::scanaheadLaserShifts)
+        .def_readwrite("scanahead_line_params", &ListConfig::scanaheadLineParams)
+        .def_readwrite("firstpulse_killer", &ListConfig::firstpulseKiller)
+        .def_readwrite("laser_pulses", &ListConfig::laserPulses)
+        .def_readwrite("wobbel_mode", &ListConfig::wobbelMode)
+        .def_readwrite("sky_writing_para", &ListConfig::skyWritingPara);
+
+    auto listStatus = py::enum_<ListStatus>(m, "ListStatus")
         .value("LOAD1", ListStatus::LOAD1)
         .value("LOAD2", ListStatus::LOAD2)
         .value("READY1", ListStatus::READY1)
@@ -307,7 +644,19 @@ PYBIND11_MODULE(rtc6_bindings, m)
         .value("USED1", ListStatus::USED1)
         .value("USED2", ListStatus::USED2);
 
-    py::enum_<LaserMode>(m, "LaserMode")
+    auto pathCommandType = py::enum_<PathCommandType>(m, "PathCommandType")
+        .value("JUMP", PathCommandType::JUMP)
+        .value("LINE", PathCommandType::LINE)
+        .value("ARC", PathCommandType::ARC)
+        .value("SET_MARK_SPEED", PathCommandType::SET_MARK_SPEED)
+        .value("SET_JUMP_SPEED", PathCommandType::SET_JUMP_SPEED)
+        .value("SET_LASER_POWER", PathCommandType::SET_LASER_POWER)
+        .value("SET_TRIGGER", PathCommandType::SET_TRIGGER)
+        .value("SUB_CALL_REPEAT", PathCommandType::SUB_CALL_REPEAT)
+        .value("LIST_NOP", PathCommandType::LIST_NOP)
+        .value("SAVE_AND_RESTART_TIMER", PathCommandType::SAVE_AND_RESTART_TIMER);
+
+    auto laserMode = py::enum_<LaserMode>(m, "LaserMode")
         .value("CO2", LaserMode::CO2)
         .value("YAG1", LaserMode::YAG1)
         .value("YAG2", LaserMode::YAG2)
@@ -316,50 +665,120 @@ PYBIND11_MODULE(rtc6_bindings, m)
         .value("YAG5", LaserMode::YAG5)
         .value("LASER6", LaserMode::LASER6);
 
+    // Calls out to the card don't touch python objects, so let other python threads
+    // run while they wait on the network. The IOC makes them all from one worker
+    // thread per card, see RtcConnection
+    const auto release_gil = py::call_guard<py::gil_scoped_release>();
+
     // Real functions which are intended to be used
-    m.def("check_connection", &check_connection, "check the active connection to the eth box: throws RtcConnectionError on failure, otherwise does nothing. If it fails, errors must be cleared afterwards.");
-    m.def("connect", &connect, "connect to the eth-box at the given IP", py::arg("ip_string"), py::arg("program_file_path"), py::arg("correction_file_path"));
-    m.def("close", &close_connection, "close the open connection, if any");
-    m.def("get_card_info", &get_card_info, "get info for the connected card; throws RtcConnectionError on failure");
-    m.def("init_list_loading", &init_list_loading, "initialise the given list (1 or 2)");
+    m.def("check_connection", &check_connection, "check the active connection to the eth box: throws RtcConnectionError on failure, otherwise does nothing. If it fails, errors must be cleared afterwards.", release_gil);
+    m.def("connect", &connect, "connect to the eth-box at the given IP", py::arg("ip_string"), py::arg("program_file_path"), py::arg("correction_file_path"), release_gil);
+    m.def("reconnect", &reconnect, "connect to the eth-box at the given IP without loading the program and correction files again, returning the serial number: throws RtcError if the card has no program loaded", py::arg("ip_string"), release_gil);
+    m.def("close", &close_connection, "close the open connection, if any", release_gil);
+    m.def("get_card_info", &get_card_info, "get info for the connected card; throws RtcConnectionError on failure", release_gil);
+    m.def("init_list_loading", &init_list_loading, "initialise the given list (1 or 2)", release_gil);
     m.def("get_list_statuses", &get_list_statuses, "get the statuses of the command lists");
-    m.def("get_error", &get_error, "get the current error code. 0 is no error. table of errors is on p387, get_error_string() can be called for a human-readable version.");
-    m.def("get_error_string", &get_error_string, "get human-readable error info");
-    m.def("clear_errors", &clear_all_errors, "clear errors in the RTC6 library");
+    m.def("get_status_snapshot", &get_status_snapshot, "read the input pointer, list space, list status bits, IO status and last error in one call", release_gil);
+    m.def("get_error", &get_error, "get the current error code. 0 is no error. table of errors is on p387, get_error_string() can be called for a human-readable version.", release_gil);
+    m.def("get_error_string", &get_error_string, "get human-readable error info", release_gil);
+    m.def("clear_errors", &clear_all_errors, "clear errors in the RTC6 library", release_gil);
 
-    m.def("add_arc_to", &arc_abs, py::arg("x"), py::arg("y"), py::arg("angle"));
-    m.def("add_jump_to", &jump_abs, py::arg("x"), py::arg("y"));
-    m.def("add_line_to", &mark_abs, py::arg("x"), py::arg("y"));
-    m.def("add_laser_on", &laser_on_list, "turn the laser on for n bits of time, see page 450 ", py::arg("time_10us"));
+    m.def("add_arc_to", &arc_abs, py::arg("x"), py::arg("y"), py::arg("angle"), release_gil);
+    m.def("add_jump_to", &jump_abs, py::arg("x"), py::arg("y"), release_gil);
+    m.def("add_line_to", &mark_abs, py::arg("x"), py::arg("y"), release_gil);
+    m.def("add_path", &add_path, "write whole arrays of path commands (see PathCommandType) to the list in one call, returns (commands written, input pointer)", py::arg("types"), py::arg("x"), py::arg("y"), py::arg("angle"));
+    m.def("add_laser_on", &laser_on_list, "turn the laser on for n bits of time, see page 450 ", py::arg("time_10us"), release_gil);
 
     // simple control commands
-    m.def("set_mark_speed_ctrl", &set_mark_speed_ctrl, "set the speed for marks", py::arg("speed"));
-    m.def("set_jump_speed_ctrl", &set_jump_speed_ctrl, "set the speed for jumps", py::arg("speed"));
-    m.def("set_scanner_delays", &set_scanner_delays_ctrl, "set the scanner delays, in 10us increments, see manual p150", py::arg("jump"), py::arg("mark"), py::arg("polygon"));
+    m.def("set_mark_speed_ctrl", &set_mark_speed_ctrl, "set the speed for marks", py::arg("speed"), release_gil);
+    m.def("set_jump_speed_ctrl", &set_jump_speed_ctrl, "set the speed for jumps", py::arg("speed"), release_gil);
+    m.def("set_scanner_delays", &set_scanner_delays_ctrl, "set the scanner delays, in 10us increments, see manual p150", py::arg("jump"), py::arg("mark"), py::arg("polygon"), release_gil);
 
     // list commands
-    m.def("list_nop", &list_nop, "no-op command for timing/synchronization");
-    m.def("save_and_restart_timer", &save_and_restart_timer, "save current timer state and restart");
-    m.def("set_angle_list", &set_angle_list, "set rotation angle for list", py::arg("headNo"), py::arg("angle"), py::arg("at_once"));
-    m.def("set_offset_xyz_list", &set_offset_xyz_list, "set XYZ offset for list", py::arg("headNo"), py::arg("x"), py::arg("y"), py::arg("z"), py::arg("at_once"));
-    m.def("activate_scanahead_autodelays_list", &activate_scanahead_autodelays_list, "enable scanahead auto delays for list", py::arg("mode"));
-    m.def("set_scanahead_laser_shifts_list", &set_scanahead_laser_shifts_list, "set scanahead laser shifts", py::arg("dLasOn"), py::arg("dLasOff"));
-    m.def("set_scanahead_line_params_list", &set_scanahead_line_params_list, "set scanahead line params", py::arg("cornerScale"), py::arg("endScale"), py::arg("accScale"));
-    m.def("set_firstpulse_killer_list", &set_firstpulse_killer_list, "configure first-pulse killer for list", py::arg("length"));
-    m.def("set_laser_pulses", &set_laser_pulses, "set laser pulse on/off durations (10us units)", py::arg("halfPeriod"), py::arg("pulseLength"));
-    m.def("set_wobbel_mode", &set_wobbel_mode, "set wobble/modulation mode", py::arg("transversal"), py::arg("longditudinal"), py::arg("freq"), py::arg("mode"));
-    m.def("set_sky_writing_para_list", &set_sky_writing_para_list, "set sky-writing parameters for list", py::arg("timelag"), py::arg("laserOnShift"), py::arg("nPrev"), py::arg("nPost"));
-    m.def("execute_list", &execute_list, "execute the current list");
-    m.def("get_last_error", &get_last_error, "get the last error for an ethernet command");
-    m.def("set_laser_mode", &set_laser_mode_by_enum_string, "set the mode of the laser, see p645", py::arg("mode"));
-    m.def("set_laser_delays", &set_laser_delays, "set the delays for the laser, see p136", py::arg("laser_on_delay"), py::arg("laser_off_delay"));
-    m.def("set_laser_control", &set_laser_control, "set the control settings of the laser, see p641", py::arg("settings"));
-    m.def("get_input_pointer", &get_input_pointer, "get the pointer of list input");
-    m.def("config_list_memory", &config_list, "set the memory for each position list, see p330", py::arg("list_1_mem"), py::arg("list_2_mem"));
-    m.def("load_list", &load_list, "set the pointer to load at position of list_no, see p330", py::arg("list_no"), py::arg("position"));
-    m.def("set_end_of_list", &set_end_of_list, "set the end of the list to be at the current pointer position");
-
-    m.def("get_io_status", &get_io_status, "---");
-    m.def("get_list_space", &get_list_space, "---");
-    m.def("get_config_list", &get_config_list, "---");
+    m.def("list_nop", &list_nop, "no-op command for timing/synchronization", release_gil);
+    m.def("save_and_restart_timer", &save_and_restart_timer, "save current timer state and restart", release_gil);
+    m.def("set_angle_list", &set_angle_list, "set rotation angle for list", py::arg("headNo"), py::arg("angle"), py::arg("at_once"), release_gil);
+    m.def("set_offset_xyz_list", &set_offset_xyz_list, "set XYZ offset for list", py::arg("headNo"), py::arg("x"), py::arg("y"), py::arg("z"), py::arg("at_once"), release_gil);
+    m.def("activate_scanahead_autodelays_list", &activate_scanahead_autodelays_list, "enable scanahead auto delays for list", py::arg("mode"), release_gil);
+    m.def("set_scanahead_laser_shifts_list", &set_scanahead_laser_shifts_list, "set scanahead laser shifts", py::arg("dLasOn"), py::arg("dLasOff"), release_gil);
+    m.def("set_scanahead_line_params_list", &set_scanahead_line_params_list, "set scanahead line params", py::arg("cornerScale"), py::arg("endScale"), py::arg("accScale"), release_gil);
+    m.def("set_firstpulse_killer_list", &set_firstpulse_killer_list, "configure first-pulse killer for list", py::arg("length"), release_gil);
+    m.def("set_laser_pulses", &set_laser_pulses, "set laser pulse on/off durations (10us units)", py::arg("halfPeriod"), py::arg("pulseLength"), release_gil);
+    m.def("set_wobbel_mode", &set_wobbel_mode, "set wobble/modulation mode", py::arg("transversal"), py::arg("longditudinal"), py::arg("freq"), py::arg("mode"), release_gil);
+    m.def("set_sky_writing_para_list", &set_sky_writing_para_list, "set sky-writing parameters for list", py::arg("timelag"), py::arg("laserOnShift"), py::arg("nPrev"), py::arg("nPost"), release_gil);
+    m.def("apply_list_config", &apply_list_config, "apply all the header settings of an execution list (see ListConfig) in one call", py::arg("config"), release_gil);
+    m.def("execute_list", &execute_list, "execute the current list", release_gil);
+    m.def("get_last_error", &get_last_error, "get the last error for an ethernet command", release_gil);
+    m.def("set_laser_mode", &set_laser_mode_by_enum_string, "set the mode of the laser, see p645", py::arg("mode"), release_gil);
+    m.def("set_laser_delays", &set_laser_delays, "set the delays for the laser, see p136", py::arg("laser_on_delay"), py::arg("laser_off_delay"), release_gil);
+    m.def("set_laser_control", &set_laser_control, "set the control settings of the laser, see p641", py::arg("settings"), release_gil);
+    m.def("get_input_pointer", &get_input_pointer, "get the pointer of list input", release_gil);
+    m.def("config_list_memory", &config_list, "set the memory for each position list, see p330", py::arg("list_1_mem"), py::arg("list_2_mem"), release_gil);
+    m.def("load_list", &load_list, "set the pointer to load at position of list_no, see p330", py::arg("list_no"), py::arg("position"), release_gil);
+    m.def("set_end_of_list", &set_end_of_list, "set the end of the list to be at the current pointer position", release_gil);
+    m.def("auto_change", &auto_change, "start the other list as soon as the currently executing one finishes", release_gil);
+    m.def("list_repeat", &list_repeat, "mark the start of a block of list commands to be repeated by list_until", release_gil);
+    m.def("list_until", &list_until, "repeat the list commands since list_repeat, running them number times in total", py::arg("number"), release_gil);
+
+    m.def("get_io_status", &get_io_status, "---", release_gil);
+    m.def("get_list_space", &get_list_space, "---", release_gil);
+    m.def("get_config_list", &get_config_list, "---", release_gil);
+
+    // The same functions for one card of several, see Card
+    py::class_<Card>(m, "Card", "handle for one eth box, with the same functions as this module for driving it alongside others")
+        .def(py::init<>())
+        .def_property_readonly_static("RtcError", [rtcError](py::object) { return rtcError; })
+        .def_property_readonly_static("RtcConnectionError", [rtcConnectionError](py::object) { return rtcConnectionError; })
+        .def_property_readonly_static("RtcListError", [rtcListError](py::object) { return rtcListError; })
+        .def_property_readonly_static("CardInfo", [cardInfo](py::object) { return cardInfo; })
+        .def_property_readonly_static("StatusSnapshot", [statusSnapshot](py::object) { return statusSnapshot; })
+        .def_property_readonly_static("ListConfig", [listConfig](py::object) { return listConfig; })
+        .def_property_readonly_static("ListStatus", [listStatus](py::object) { return listStatus; })
+        .def_property_readonly_static("PathCommandType", [pathCommandType](py::object) { return pathCommandType; })
+        .def_property_readonly_static("LaserMode", [laserMode](py::object) { return laserMode; })
+        .def("check_connection", &Card::check_connection, "check the connection to this card's eth box: throws RtcConnectionError on failure", release_gil)
+        .def("connect", &Card::connect, "connect to the eth-box at the given IP, returning the serial number", py::arg("ip_string"), py::arg("program_file_path"), py::arg("correction_file_path"), release_gil)
+        .def("reconnect", &Card::reconnect, "connect to the eth-box at the given IP without loading the program and correction files again, returning the serial number: throws RtcError if the card has no program loaded", py::arg("ip_string"), release_gil)
+        .def("close", &Card::close, "release the card", release_gil)
+        .def("get_card_info", &Card::get_card_info, "get info for the card; throws RtcConnectionError on failure", release_gil)
+        .def("init_list_loading", &Card::init_list_loading, "initialise the given list (1 or 2)", py::arg("list_no"), release_gil)
+        .def("get_list_statuses", &Card::get_list_statuses, "get the statuses of the command lists")
+        .def("get_status_snapshot", &Card::get_status_snapshot, "read the input pointer, list space, list status bits, IO status and last error in one call", release_gil)
+        .def("get_error", &Card::get_error, "get the current error code of the card, 0 is no error", release_gil)
+        .def("get_error_string", &Card::get_error_string, "get human-readable error info", release_gil)
+        .def("clear_errors", &Card::clear_errors, "clear the card's errors", release_gil)
+        .def("add_arc_to", &Card::add_arc_to, py::arg("x"), py::arg("y"), py::arg("angle"), release_gil)
+        .def("add_jump_to", &Card::add_jump_to, py::arg("x"), py::arg("y"), release_gil)
+        .def("add_line_to", &Card::add_line_to, py::arg("x"), py::arg("y"), release_gil)
+        .def("add_path", &Card::add_path, "write whole arrays of path commands (see PathCommandType) to the list in one call, returns (commands written, input pointer)", py::arg("types"), py::arg("x"), py::arg("y"), py::arg("angle"))
+        .def("add_laser_on", &Card::add_laser_on, "turn the laser on for n bits of time, see page 450 ", py::arg("time_10us"), release_gil)
+        .def("set_mark_speed_ctrl", &Card::set_mark_speed_ctrl, "set the speed for marks", py::arg("speed"), release_gil)
+        .def("set_jump_speed_ctrl", &Card::set_jump_speed_ctrl, "set the speed for jumps", py::arg("speed"), release_gil)
+        .def("set_scanner_delays", &Card::set_scanner_delays, "set the scanner delays, in 10us increments, see manual p150", py::arg("jump"), py::arg("mark"), py::arg("polygon"), release_gil)
+        .def("list_nop", &Card::list_nop, "no-op command for timing/synchronization", release_gil)
+        .def("save_and_restart_timer", &Card::save_and_restart_timer, "save current timer state and restart", release_gil)
+        .def("set_angle_list", &Card::set_angle_list, "set rotation angle for list", py::arg("headNo"), py::arg("angle"), py::arg("at_once"), release_gil)
+        .def("set_offset_xyz_list", &Card::set_offset_xyz_list, "set XYZ offset for list", py::arg("headNo"), py::arg("x"), py::arg("y"), py::arg("z"), py::arg("at_once"), release_gil)
+        .def("activate_scanahead_autodelays_list", &Card::activate_scanahead_autodelays_list, "enable scanahead auto delays for list", py::arg("mode"), release_gil)
+        .def("set_scanahead_laser_shifts_list", &Card::set_scanahead_laser_shifts_list, "set scanahead laser shifts", py::arg("dLasOn"), py::arg("dLasOff"), release_gil)
+        .def("set_scanahead_line_params_list", &Card::set_scanahead_line_params_list, "set scanahead line params", py::arg("cornerScale"), py::arg("endScale"), py::arg("accScale"), release_gil)
+        .def("set_firstpulse_killer_list", &Card::set_firstpulse_killer_list, "configure first-pulse killer for list", py::arg("length"), release_gil)
+        .def("set_laser_pulses", &Card::set_laser_pulses, "set laser pulse on/off durations (10us units)", py::arg("halfPeriod"), py::arg("pulseLength"), release_gil)
+        .def("set_wobbel_mode", &Card::set_wobbel_mode, "set wobble/modulation mode", py::arg("transversal"), py::arg("longditudinal"), py::arg("freq"), py::arg("mode"), release_gil)
+        .def("set_sky_writing_para_list", &Card::set_sky_writing_para_list, "set sky-writing parameters for list", py::arg("timelag"), py::arg("laserOnShift"), py::arg("nPrev"), py::arg("nPost"), release_gil)
+        .def("apply_list_config", &Card::apply_list_config, "apply all the header settings of an execution list (see ListConfig) in one call", py::arg("config"), release_gil)
+        .def("execute_list", &Card::execute_list, "execute the given list", py::arg("list_no"), release_gil)
+        .def("get_last_error", &Card::get_last_error, "get the last error for an ethernet command", release_gil)
+        .def("set_laser_mode", &Card::set_laser_mode, "set the mode of the laser, see p645", py::arg("mode"), release_gil)
+        .def("set_laser_delays", &Card::set_laser_delays, "set the delays for the laser, see p136", py::arg("laser_on_delay"), py::arg("laser_off_delay"), release_gil)
+        .def("set_laser_control", &Card::set_laser_control, "set the control settings of the laser, see p641", py::arg("settings"), release_gil)
+        .def("get_input_pointer", &Card::get_input_pointer, "get the pointer of list input", release_gil)
+        .def("config_list_memory", &Card::config_list_memory, "set the memory for each position list, see p330", py::arg("list_1_mem"), py::arg("list_2_mem"), release_gil)
+        .def("load_list", &Card::load_list, "set the pointer to load at position of list_no, see p330", py::arg("list_no"), py::arg("position"), release_gil)
+        .def("set_end_of_list", &Card::set_end_of_list, "set the end of the list to be at the current pointer position", release_gil)
+        .def("auto_change", &Card::auto_change, "start the other list as soon as the currently executing one finishes", release_gil)
+        .def("list_repeat", &Card::list_repeat, "mark the start of a block of list commands to be repeated by list_until", release_gil)
+        .def("list_until", &Card::list_until, "repeat the list commands since list_repeat, running them number times in total", py::arg("number"), release_gil)
+        .def("get_io_status", &Card::get_io_status, "---", release_gil)
+        .def("get_list_space", &Card::get_list_space, "---", release_gil);
 }
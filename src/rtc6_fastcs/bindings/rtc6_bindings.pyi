@@ -3,20 +3,31 @@ bindings for the scanlab rtc6 ethernet laser controller
 """
 
 from __future__ import annotations
+
 import typing
 
+import numpy
+import numpy.typing
+
 __all__: list[str] = [
+    "Card",
     "CardInfo",
     "LaserMode",
+    "ListConfig",
     "ListStatus",
+    "PathCommandType",
     "RtcConnectionError",
     "RtcError",
     "RtcListError",
+    "StatusSnapshot",
     "activate_scanahead_autodelays_list",
     "add_arc_to",
     "add_jump_to",
     "add_laser_on",
     "add_line_to",
+    "add_path",
+    "apply_list_config",
+    "auto_change",
     "check_connection",
     "clear_errors",
     "close",
@@ -32,9 +43,13 @@ __all__: list[str] = [
     "get_last_error",
     "get_list_space",
     "get_list_statuses",
+    "get_status_snapshot",
     "init_list_loading",
     "list_nop",
+    "list_repeat",
+    "list_until",
     "load_list",
+    "reconnect",
     "save_and_restart_timer",
     "set_angle_list",
     "set_end_of_list",
@@ -53,6 +68,288 @@ __all__: list[str] = [
     "set_wobbel_mode",
 ]
 
+class Card:
+    """
+    handle for one eth box, with the same functions as this module for driving it alongside others
+    """
+
+    CardInfo: typing.ClassVar[type[CardInfo]]
+    LaserMode: typing.ClassVar[type[LaserMode]]
+    ListConfig: typing.ClassVar[type[ListConfig]]
+    ListStatus: typing.ClassVar[type[ListStatus]]
+    PathCommandType: typing.ClassVar[type[PathCommandType]]
+    RtcConnectionError: typing.ClassVar[type[RtcConnectionError]]
+    RtcError: typing.ClassVar[type[RtcError]]
+    RtcListError: typing.ClassVar[type[RtcListError]]
+    StatusSnapshot: typing.ClassVar[type[StatusSnapshot]]
+    def __init__(self) -> None: ...
+    def activate_scanahead_autodelays_list(self, mode: typing.SupportsInt) -> None:
+        """
+        enable scanahead auto delays for list
+        """
+
+    def add_arc_to(
+        self, x: typing.SupportsInt, y: typing.SupportsInt, angle: typing.SupportsFloat
+    ) -> None: ...
+    def add_jump_to(self, x: typing.SupportsInt, y: typing.SupportsInt) -> None: ...
+    def add_laser_on(self, time_10us: typing.SupportsInt) -> None:
+        """
+        turn the laser on for n bits of time, see page 450
+        """
+
+    def add_line_to(self, x: typing.SupportsInt, y: typing.SupportsInt) -> None: ...
+    def add_path(
+        self,
+        types: numpy.typing.ArrayLike,
+        x: numpy.typing.ArrayLike,
+        y: numpy.typing.ArrayLike,
+        angle: numpy.typing.ArrayLike,
+    ) -> tuple[int, int]:
+        """
+        write whole arrays of path commands (see PathCommandType) to the list in one call, returns (commands written, input pointer)
+        """
+
+    def apply_list_config(self, config: ListConfig) -> None:
+        """
+        apply all the header settings of an execution list (see ListConfig) in one call
+        """
+
+    def auto_change(self) -> None:
+        """
+        start the other list as soon as the currently executing one finishes
+        """
+
+    def check_connection(self) -> None:
+        """
+        check the connection to this card's eth box: throws RtcConnectionError on failure
+        """
+
+    def clear_errors(self) -> None:
+        """
+        clear the card's errors
+        """
+
+    def close(self) -> None:
+        """
+        release the card
+        """
+
+    def config_list_memory(
+        self, list_1_mem: typing.SupportsInt, list_2_mem: typing.SupportsInt
+    ) -> None:
+        """
+        set the memory for each position list, see p330
+        """
+
+    def connect(
+        self, ip_string: str, program_file_path: str, correction_file_path: str
+    ) -> int:
+        """
+        connect to the eth-box at the given IP, returning the serial number
+        """
+
+    def execute_list(self, list_no: typing.SupportsInt) -> None:
+        """
+        execute the given list
+        """
+
+    def get_card_info(self) -> CardInfo:
+        """
+        get info for the card; throws RtcConnectionError on failure
+        """
+
+    def get_error(self) -> int:
+        """
+        get the current error code of the card, 0 is no error
+        """
+
+    def get_error_string(self) -> str:
+        """
+        get human-readable error info
+        """
+
+    def get_input_pointer(self) -> int:
+        """
+        get the pointer of list input
+        """
+
+    def get_io_status(self) -> int:
+        """
+        ---
+        """
+
+    def get_last_error(self) -> int:
+        """
+        get the last error for an ethernet command
+        """
+
+    def get_list_space(self) -> int:
+        """
+        ---
+        """
+
+    def get_list_statuses(self) -> list:
+        """
+        get the statuses of the command lists
+        """
+
+    def get_status_snapshot(self) -> StatusSnapshot:
+        """
+        read the input pointer, list space, list status bits, IO status and last error in one call
+        """
+
+    def init_list_loading(self, list_no: typing.SupportsInt) -> None:
+        """
+        initialise the given list (1 or 2)
+        """
+
+    def list_nop(self) -> None:
+        """
+        no-op command for timing/synchronization
+        """
+
+    def list_repeat(self) -> None:
+        """
+        mark the start of a block of list commands to be repeated by list_until
+        """
+
+    def list_until(self, number: typing.SupportsInt) -> None:
+        """
+        repeat the list commands since list_repeat, running them number times in total
+        """
+
+    def load_list(
+        self, list_no: typing.SupportsInt, position: typing.SupportsInt
+    ) -> int:
+        """
+        set the pointer to load at position of list_no, see p330
+        """
+
+    def reconnect(self, ip_string: str) -> int:
+        """
+        connect to the eth-box at the given IP without loading the program and correction files again, returning the serial number: throws RtcError if the card has no program loaded
+        """
+
+    def save_and_restart_timer(self) -> None:
+        """
+        save current timer state and restart
+        """
+
+    def set_angle_list(
+        self,
+        headNo: typing.SupportsInt,
+        angle: typing.SupportsFloat,
+        at_once: typing.SupportsInt,
+    ) -> None:
+        """
+        set rotation angle for list
+        """
+
+    def set_end_of_list(self) -> None:
+        """
+        set the end of the list to be at the current pointer position
+        """
+
+    def set_firstpulse_killer_list(self, length: typing.SupportsInt) -> None:
+        """
+        configure first-pulse killer for list
+        """
+
+    def set_jump_speed_ctrl(self, speed: typing.SupportsFloat) -> None:
+        """
+        set the speed for jumps
+        """
+
+    def set_laser_control(self, settings: typing.SupportsInt) -> None:
+        """
+        set the control settings of the laser, see p641
+        """
+
+    def set_laser_delays(
+        self, laser_on_delay: typing.SupportsInt, laser_off_delay: typing.SupportsInt
+    ) -> None:
+        """
+        set the delays for the laser, see p136
+        """
+
+    def set_laser_mode(self, mode: str) -> None:
+        """
+        set the mode of the laser, see p645
+        """
+
+    def set_laser_pulses(
+        self, halfPeriod: typing.SupportsInt, pulseLength: typing.SupportsInt
+    ) -> None:
+        """
+        set laser pulse on/off durations (10us units)
+        """
+
+    def set_mark_speed_ctrl(self, speed: typing.SupportsFloat) -> None:
+        """
+        set the speed for marks
+        """
+
+    def set_offset_xyz_list(
+        self,
+        headNo: typing.SupportsInt,
+        x: typing.SupportsInt,
+        y: typing.SupportsInt,
+        z: typing.SupportsInt,
+        at_once: typing.SupportsInt,
+    ) -> None:
+        """
+        set XYZ offset for list
+        """
+
+    def set_scanahead_laser_shifts_list(
+        self, dLasOn: typing.SupportsInt, dLasOff: typing.SupportsInt
+    ) -> None:
+        """
+        set scanahead laser shifts
+        """
+
+    def set_scanahead_line_params_list(
+        self,
+        cornerScale: typing.SupportsInt,
+        endScale: typing.SupportsInt,
+        accScale: typing.SupportsInt,
+    ) -> None:
+        """
+        set scanahead line params
+        """
+
+    def set_scanner_delays(
+        self,
+        jump: typing.SupportsInt,
+        mark: typing.SupportsInt,
+        polygon: typing.SupportsInt,
+    ) -> None:
+        """
+        set the scanner delays, in 10us increments, see manual p150
+        """
+
+    def set_sky_writing_para_list(
+        self,
+        timelag: typing.SupportsFloat,
+        laserOnShift: typing.SupportsInt,
+        nPrev: typing.SupportsInt,
+        nPost: typing.SupportsInt,
+    ) -> None:
+        """
+        set sky-writing parameters for list
+        """
+
+    def set_wobbel_mode(
+        self,
+        transversal: typing.SupportsInt,
+        longditudinal: typing.SupportsInt,
+        freq: typing.SupportsFloat,
+        mode: typing.SupportsInt,
+    ) -> None:
+        """
+        set wobble/modulation mode
+        """
+
 class CardInfo:
     @property
     def firmware_version(self) -> int: ...
@@ -107,6 +404,20 @@ class LaserMode:
     @property
     def value(self) -> int: ...
 
+class ListConfig:
+    angle: float
+    firstpulse_killer: int
+    jump_speed: float
+    laser_pulses: tuple[int, int]
+    mark_speed: float
+    offset_xyz: tuple[int, int, int]
+    scanahead_autodelays: int
+    scanahead_laser_shifts: tuple[int, int]
+    scanahead_line_params: tuple[int, int, int]
+    sky_writing_para: tuple[float, int, int, int]
+    wobbel_mode: tuple[int, int, float, int]
+    def __init__(self) -> None: ...
+
 class ListStatus:
     """
     Members:
@@ -154,6 +465,71 @@ class ListStatus:
     @property
     def value(self) -> int: ...
 
+class PathCommandType:
+    """
+    Members:
+
+      JUMP
+
+      LINE
+
+      ARC
+
+      SET_MARK_SPEED
+
+      SET_JUMP_SPEED
+
+      SET_LASER_POWER
+
+      SET_TRIGGER
+
+      SUB_CALL_REPEAT
+
+      LIST_NOP
+
+      SAVE_AND_RESTART_TIMER
+    """
+
+    ARC: typing.ClassVar[PathCommandType]  # value = <PathCommandType.ARC: 2>
+    JUMP: typing.ClassVar[PathCommandType]  # value = <PathCommandType.JUMP: 0>
+    LINE: typing.ClassVar[PathCommandType]  # value = <PathCommandType.LINE: 1>
+    LIST_NOP: typing.ClassVar[PathCommandType]  # value = <PathCommandType.LIST_NOP: 8>
+    SAVE_AND_RESTART_TIMER: typing.ClassVar[
+        PathCommandType
+    ]  # value = <PathCommandType.SAVE_AND_RESTART_TIMER: 9>
+    SET_JUMP_SPEED: typing.ClassVar[
+        PathCommandType
+    ]  # value = <PathCommandType.SET_JUMP_SPEED: 4>
+    SET_LASER_POWER: typing.ClassVar[
+        PathCommandType
+    ]  # value = <PathCommandType.SET_LASER_POWER: 5>
+    SET_MARK_SPEED: typing.ClassVar[
+        PathCommandType
+    ]  # value = <PathCommandType.SET_MARK_SPEED: 3>
+    SET_TRIGGER: typing.ClassVar[
+        PathCommandType
+    ]  # value = <PathCommandType.SET_TRIGGER: 6>
+    SUB_CALL_REPEAT: typing.ClassVar[
+        PathCommandType
+    ]  # value = <PathCommandType.SUB_CALL_REPEAT: 7>
+    __members__: typing.ClassVar[
+        dict[str, PathCommandType]
+    ]  # value = {'JUMP': <PathCommandType.JUMP: 0>, 'LINE': <PathCommandType.LINE: 1>, 'ARC': <PathCommandType.ARC: 2>, 'SET_MARK_SPEED': <PathCommandType.SET_MARK_SPEED: 3>, 'SET_JUMP_SPEED': <PathCommandType.SET_JUMP_SPEED: 4>, 'SET_LASER_POWER': <PathCommandType.SET_LASER_POWER: 5>, 'SET_TRIGGER': <PathCommandType.SET_TRIGGER: 6>, 'SUB_CALL_REPEAT': <PathCommandType.SUB_CALL_REPEAT: 7>, 'LIST_NOP': <PathCommandType.LIST_NOP: 8>, 'SAVE_AND_RESTART_TIMER': <PathCommandType.SAVE_AND_RESTART_TIMER: 9>}
+    def __eq__(self, other: typing.Any) -> bool: ...
+    def __getstate__(self) -> int: ...
+    def __hash__(self) -> int: ...
+    def __index__(self) -> int: ...
+    def __init__(self, value: typing.SupportsInt) -> None: ...
+    def __int__(self) -> int: ...
+    def __ne__(self, other: typing.Any) -> bool: ...
+    def __repr__(self) -> str: ...
+    def __setstate__(self, state: typing.SupportsInt) -> None: ...
+    def __str__(self) -> str: ...
+    @property
+    def name(self) -> str: ...
+    @property
+    def value(self) -> int: ...
+
 class RtcConnectionError(Exception):
     pass
 
@@ -163,6 +539,18 @@ class RtcError(Exception):
 class RtcListError(Exception):
     pass
 
+class StatusSnapshot:
+    @property
+    def input_pointer(self) -> int: ...
+    @property
+    def io_status(self) -> int: ...
+    @property
+    def last_error(self) -> int: ...
+    @property
+    def list_space(self) -> int: ...
+    @property
+    def list_status(self) -> int: ...
+
 def activate_scanahead_autodelays_list(mode: typing.SupportsInt) -> None:
     """
     enable scanahead auto delays for list
@@ -178,6 +566,26 @@ def add_laser_on(time_10us: typing.SupportsInt) -> None:
     """
 
 def add_line_to(x: typing.SupportsInt, y: typing.SupportsInt) -> None: ...
+def add_path(
+    types: numpy.typing.ArrayLike,
+    x: numpy.typing.ArrayLike,
+    y: numpy.typing.ArrayLike,
+    angle: numpy.typing.ArrayLike,
+) -> tuple[int, int]:
+    """
+    write whole arrays of path commands (see PathCommandType) to the list in one call, returns (commands written, input pointer)
+    """
+
+def apply_list_config(config: ListConfig) -> None:
+    """
+    apply all the header settings of an execution list (see ListConfig) in one call
+    """
+
+def auto_change() -> None:
+    """
+    start the other list as soon as the currently executing one finishes
+    """
+
 def check_connection() -> None:
     """
     check the active connection to the eth box: throws RtcConnectionError on failure, otherwise does nothing. If it fails, errors must be cleared afterwards.
@@ -205,6 +613,11 @@ def connect(ip_string: str, program_file_path: str, correction_file_path: str) -
     connect to the eth-box at the given IP
     """
 
+def reconnect(ip_string: str) -> int:
+    """
+    connect to the eth-box at the given IP without loading the program and correction files again, returning the serial number: throws RtcError if the card has no program loaded
+    """
+
 def execute_list(arg0: typing.SupportsInt) -> None:
     """
     execute the current list
@@ -255,6 +668,11 @@ def get_list_statuses() -> list:
     get the statuses of the command lists
     """
 
+def get_status_snapshot() -> StatusSnapshot:
+    """
+    read the input pointer, list space, list status bits, IO status and last error in one call
+    """
+
 def init_list_loading(arg0: typing.SupportsInt) -> None:
     """
     initialise the given list (1 or 2)
@@ -265,6 +683,16 @@ def list_nop() -> None:
     no-op command for timing/synchronization
     """
 
+def list_repeat() -> None:
+    """
+    mark the start of a block of list commands to be repeated by list_until
+    """
+
+def list_until(number: typing.SupportsInt) -> None:
+    """
+    repeat the list commands since list_repeat, running them number times in total
+    """
+
 def load_list(list_no: typing.SupportsInt, position: typing.SupportsInt) -> int:
     """
     set the pointer to load at position of list_no, see p330
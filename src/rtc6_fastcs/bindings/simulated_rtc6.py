@@ -0,0 +1,557 @@
+"""Pure python stand-in for rtc6_bindings, for running the IOC without a card.
+
+SimulatedRtc6 has the same functions, enums and exceptions as the compiled module,
+so an instance can be passed anywhere rtc6_bindings is used. It keeps the two
+command lists, the input pointer and the list statuses, and works out how long
+each list takes to run from the speeds and scanner delays. Every call blocks for
+the configured Ethernet latency, plus a little per list command sent.
+"""
+
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+import numpy as np
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+
+# Commands which only exist in the simulated lists, after the CommandType codes
+LASER_ON = 100  # x is the time in 10us
+OTHER = 101  # list commands which take no time, e.g. set_angle_list
+
+DEFAULT_LIST_MEMORY = 1 << 22
+LIST_CONFIG_COMMANDS = 9  # list commands sent by apply_list_config
+CLOCK_PERIOD = 10e-6  # delays and list_nop are in units of the 10us clock
+
+
+# pybind11 registers all three directly on Exception, so RtcError doesn't catch the
+# other two on the real card either
+class RtcError(Exception):
+    pass
+
+
+class RtcConnectionError(Exception):
+    pass
+
+
+class RtcListError(Exception):
+    pass
+
+
+class ListStatus(IntEnum):
+    LOAD1 = 0
+    LOAD2 = 1
+    READY1 = 2
+    READY2 = 3
+    BUSY1 = 4
+    BUSY2 = 5
+    USED1 = 6
+    USED2 = 7
+
+
+PathCommandType = CommandType
+
+
+class LaserMode(IntEnum):
+    CO2 = 0
+    YAG1 = 1
+    YAG2 = 2
+    YAG3 = 3
+    LASER4 = 4
+    YAG5 = 5
+    LASER6 = 6
+
+
+@dataclass
+class CardInfo:
+    firmware_version: int
+    serial_number: int
+    ip_address: str
+    is_acquired: bool
+
+
+@dataclass
+class StatusSnapshot:
+    input_pointer: int
+    list_space: int
+    list_status: int
+    io_status: int
+    last_error: int
+
+
+@dataclass
+class ListConfig:
+    angle: float = 90.0
+    offset_xyz: tuple[int, int, int] = (0, 0, 0)
+    mark_speed: float = 271.68
+    jump_speed: float = 815.04
+    scanahead_autodelays: int = 1
+    scanahead_laser_shifts: tuple[int, int] = (0, 0)
+    scanahead_line_params: tuple[int, int, int] = (0, 100, 100)
+    firstpulse_killer: int = 6400
+    laser_pulses: tuple[int, int] = (3200, 640)
+    wobbel_mode: tuple[int, int, float, int] = (0, 0, 0.0, 0)
+    sky_writing_para: tuple[float, int, int, int] = (0.0, 0, 0, 0)
+
+
+@dataclass
+class _SimList:
+    size: int = DEFAULT_LIST_MEMORY
+    segments: list[PathArrays] = field(default_factory=list)
+    length: int = 0
+    end: int | None = None  # set by set_end_of_list
+    repeats: list[tuple[int, int, int]] = field(default_factory=list)
+    repeat_start: int | None = None
+    started_at: float | None = None
+    finishes_at: float | None = None
+
+    def commands(self) -> PathArrays:
+        if len(self.segments) > 1:
+            self.segments = [
+                PathArrays(
+                    *(
+                        np.concatenate([getattr(s, f) for s in self.segments])
+                        for f in ("cmd_type", "x", "y", "angle")
+                    )
+                )
+            ]
+        return self.segments[0] if self.segments else PathArrays.empty()
+
+    def truncate(self, position: int) -> None:
+        self.segments = [self.commands()[:position]]
+        self.length = min(self.length, position)
+        self.end = None
+        self.repeats = [r for r in self.repeats if r[1] <= position]
+        self.repeat_start = None
+        self.started_at = self.finishes_at = None
+
+
+class SimulatedRtc6:
+    """A simulated card, used in place of the rtc6_bindings module.
+
+    latency is the round trip of one Ethernet call, and command_time is added to
+    it for each list command sent. Execution times are multiplied by time_scale,
+    so tests can run jobs faster than the real card would. calls counts the calls
+    made to each function.
+    """
+
+    RtcError = RtcError
+    RtcConnectionError = RtcConnectionError
+    RtcListError = RtcListError
+    ListStatus = ListStatus
+    PathCommandType = PathCommandType
+    LaserMode = LaserMode
+    CardInfo = CardInfo
+    StatusSnapshot = StatusSnapshot
+    ListConfig = ListConfig
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        command_time: float = 0.0,
+        time_scale: float = 1.0,
+        serial_number: int = 123456,
+    ) -> None:
+        self.latency = latency
+        self.command_time = command_time
+        self.time_scale = time_scale
+        self.serial_number = serial_number
+        # Set to False to make connect fail, as if the box was unreachable
+        self.reachable = True
+        # Set by connect, clear it as if the card was power cycled
+        self.program_loaded = False
+        self.calls: dict[str, int] = {}
+        self._ip = ""
+        self._connected = False
+        self._error = 0
+        self._lists = {1: _SimList(), 2: _SimList()}
+        self._loading = 1
+        self._chained: int | None = None  # list started by auto_change
+        self._position = (0.0, 0.0)
+        # bits/ms and 10us, as for the real card
+        self._mark_speed = 250.0
+        self._jump_speed = 1000.0
+        self._delays = {"jump": 0, "mark": 0, "polygon": 0}
+
+    def _round_trip(self, name: str, commands: int = 0) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+        delay = self.latency + commands * self.command_time
+        if delay > 0:
+            time.sleep(delay)
+
+    def _append(self, name: str, commands: PathArrays) -> None:
+        self._round_trip(name, len(commands))
+        sim_list = self._lists[self._loading]
+        if sim_list.length + len(commands) > sim_list.size:
+            self._error |= 1 << 6
+            raise RtcListError(
+                f"List {self._loading} is full, {sim_list.length} of {sim_list.size}"
+                f" used and {len(commands)} more sent"
+            )
+        sim_list.segments.append(commands)
+        sim_list.length += len(commands)
+
+    def _append_one(self, name: str, cmd: int, x=0, y=0, angle=0.0) -> None:
+        self._append(name, PathArrays([cmd], [x], [y], [angle]))
+
+    # Execution model
+
+    def _durations(self, commands: PathArrays) -> np.ndarray:
+        """Time taken by each command, and moves the head to the end of them"""
+        n = len(commands)
+        if not n:
+            return np.zeros(0)
+        cmd = commands.cmd_type
+        index = np.arange(n)
+        geometry = commands.is_geometry()
+        # Position before each command is the end of the last geometry before it
+        last = np.maximum.accumulate(np.where(geometry, index, -1))
+        before = np.concatenate(([-1], last[:-1]))
+        end_x = commands.x.astype(np.float64)
+        end_y = commands.y.astype(np.float64)
+        arcs = np.flatnonzero(cmd == CommandType.ARC)
+        for i in arcs:
+            # Each arc ends where its start is rotated about the centre, which
+            # depends on the arcs before, so these are done in order
+            start = (
+                (end_x[before[i]], end_y[before[i]])
+                if before[i] >= 0
+                else self._position
+            )
+            theta = np.radians(commands.angle[i])
+            dx, dy = start[0] - commands.x[i], start[1] - commands.y[i]
+            end_x[i] = commands.x[i] + dx * np.cos(theta) - dy * np.sin(theta)
+            end_y[i] = commands.y[i] + dx * np.sin(theta) + dy * np.cos(theta)
+        has_start = before >= 0
+        start_x = np.where(has_start, end_x[np.maximum(before, 0)], self._position[0])
+        start_y = np.where(has_start, end_y[np.maximum(before, 0)], self._position[1])
+        distance = np.hypot(end_x - start_x, end_y - start_y)
+        radius = np.hypot(start_x - commands.x, start_y - commands.y)
+        distance[arcs] = radius[arcs] * np.radians(np.abs(commands.angle[arcs]))
+
+        def speed(code: int, initial: float) -> np.ndarray:
+            last_set = np.maximum.accumulate(np.where(cmd == code, index, -1))
+            speeds = np.where(
+                last_set >= 0, commands.angle[np.maximum(last_set, 0)], initial
+            )
+            return np.maximum(speeds, 1e-9)
+
+        mark_speed = speed(CommandType.SET_MARK_SPEED, self._mark_speed)
+        jump_speed = speed(CommandType.SET_JUMP_SPEED, self._jump_speed)
+        marks = (cmd == CommandType.LINE) | (cmd == CommandType.ARC)
+        jumps = cmd == CommandType.JUMP
+        next_is_mark = np.concatenate((marks[1:], [False]))
+        delay_ticks = np.select(
+            [jumps, marks & next_is_mark, marks, cmd == CommandType.LIST_NOP],
+            [self._delays["jump"], self._delays["polygon"], self._delays["mark"], 1],
+            0,
+        )
+        delay_ticks = np.where(cmd == LASER_ON, commands.x, delay_ticks)
+        move_ms = np.where(
+            jumps, distance / jump_speed, np.where(marks, distance / mark_speed, 0.0)
+        )
+        if geometry.any():
+            final = np.flatnonzero(geometry)[-1]
+            self._position = (float(end_x[final]), float(end_y[final]))
+        self._mark_speed, self._jump_speed = (
+            float(mark_speed[-1]),
+            float(jump_speed[-1]),
+        )
+        return move_ms / 1000 + delay_ticks * CLOCK_PERIOD
+
+    def _run_time(self, sim_list: _SimList) -> float:
+        end = sim_list.length if sim_list.end is None else sim_list.end
+        durations = self._durations(sim_list.commands()[:end])
+        total = durations.sum()
+        for start, stop, passes in sim_list.repeats:
+            total += (passes - 1) * durations[start:stop].sum()
+        return float(total) * self.time_scale
+
+    def _start(self, list_no: int, at: float) -> None:
+        sim_list = self._lists[list_no]
+        sim_list.started_at = at
+        sim_list.finishes_at = at + self._run_time(sim_list)
+
+    def _busy(self, list_no: int, now: float) -> bool:
+        finishes_at = self._lists[list_no].finishes_at
+        return finishes_at is not None and now < finishes_at
+
+    def _advance(self) -> float:
+        """Start a list chained by auto_change once the other has finished"""
+        now = time.monotonic()
+        if self._chained is not None:
+            other = self._lists[3 - self._chained]
+            if other.finishes_at is not None and other.finishes_at <= now:
+                self._start(self._chained, other.finishes_at)
+                self._chained = None
+        return now
+
+    def _status_bits(self) -> int:
+        now = self._advance()
+        bits = 0
+        for list_no, sim_list in self._lists.items():
+            if self._busy(list_no, now):
+                bits |= 1 << ListStatus[f"BUSY{list_no}"]
+            elif sim_list.finishes_at is not None:
+                bits |= 1 << ListStatus[f"USED{list_no}"]
+            elif sim_list.end is not None:
+                bits |= 1 << ListStatus[f"READY{list_no}"]
+            elif list_no == self._loading:
+                bits |= 1 << ListStatus[f"LOAD{list_no}"]
+        return bits
+
+    def _input_pointer(self) -> int:
+        offset = 0 if self._loading == 1 else self._lists[1].size
+        return offset + self._lists[self._loading].length
+
+    # Connection and information
+
+    def connect(
+        self, ip_string: str, program_file_path: str, correction_file_path: str
+    ) -> int:
+        self._round_trip("connect")
+        if not self.reachable:
+            self._error |= 1 << 3
+            raise RtcError(f"Simulated card at {ip_string} is not reachable")
+        self._ip = ip_string
+        self._connected = True
+        self.program_loaded = True
+        # Loading the program resets the settings
+        self._mark_speed = 250.0
+        self._jump_speed = 1000.0
+        self._delays = {"jump": 0, "mark": 0, "polygon": 0}
+        return self.serial_number
+
+    def reconnect(self, ip_string: str) -> int:
+        self._round_trip("reconnect")
+        if not self.reachable:
+            self._error |= 1 << 3
+            raise RtcError(f"Simulated card at {ip_string} is not reachable")
+        if not self.program_loaded:
+            raise RtcError("Card 1 has no program loaded")
+        self._ip = ip_string
+        self._connected = True
+        return self.serial_number
+
+    def close(self, card: int = 1) -> None:
+        self._round_trip("close")
+        if not self._connected:
+            raise RtcConnectionError(
+                "Could not release card - maybe it was not acquired?"
+            )
+        self._connected = False
+
+    def check_connection(self) -> None:
+        self._round_trip("check_connection")
+        if not (self._connected and self.reachable):
+            self._error |= 1 << 13
+            raise RtcConnectionError("Checking connection to the eth box failed!")
+
+    def get_card_info(self) -> CardInfo:
+        self.check_connection()
+        self._round_trip("get_card_info")
+        return CardInfo(1, self.serial_number, self._ip, self._connected)
+
+    def get_error(self) -> int:
+        self._round_trip("get_error")
+        return self._error
+
+    def get_last_error(self) -> int:
+        self._round_trip("get_last_error")
+        return self._error
+
+    def get_error_string(self) -> str:
+        self._round_trip("get_error_string")
+        return f"Simulated error bits {self._error:#x}" if self._error else ""
+
+    def clear_errors(self) -> None:
+        self._round_trip("clear_errors")
+        self._error = 0
+
+    def get_io_status(self) -> int:
+        self._round_trip("get_io_status")
+        return 0
+
+    def get_config_list(self) -> None:
+        self._round_trip("get_config_list")
+
+    # List status
+
+    def get_input_pointer(self) -> int:
+        self._round_trip("get_input_pointer")
+        return self._input_pointer()
+
+    def get_list_space(self) -> int:
+        self._round_trip("get_list_space")
+        sim_list = self._lists[self._loading]
+        return sim_list.size - sim_list.length
+
+    def get_list_statuses(self) -> list[ListStatus]:
+        self._round_trip("get_list_statuses")
+        bits = self._status_bits()
+        return [status for status in ListStatus if bits & (1 << status)]
+
+    def get_status_snapshot(self) -> StatusSnapshot:
+        self._round_trip("get_status_snapshot")
+        sim_list = self._lists[self._loading]
+        return StatusSnapshot(
+            input_pointer=self._input_pointer(),
+            list_space=sim_list.size - sim_list.length,
+            list_status=self._status_bits(),
+            io_status=0,
+            last_error=self._error,
+        )
+
+    # List management
+
+    def config_list_memory(self, list_1_mem: int, list_2_mem: int) -> None:
+        self._round_trip("config_list_memory")
+        self._lists = {1: _SimList(size=list_1_mem), 2: _SimList(size=list_2_mem)}
+        self._loading = 1
+        self._chained = None
+
+    def init_list_loading(self, list_no: int) -> None:
+        self._round_trip("init_list_loading")
+        self._load(list_no, 0)
+
+    def load_list(self, list_no: int, position: int) -> int:
+        self._round_trip("load_list")
+        return self._load(list_no, position)
+
+    def _load(self, list_no: int, position: int) -> int:
+        if self._busy(list_no, self._advance()) or self._chained == list_no:
+            self._error |= 1 << 5
+            return 0
+        self._lists[list_no].truncate(position)
+        self._loading = list_no
+        return list_no
+
+    def set_end_of_list(self) -> None:
+        self._round_trip("set_end_of_list", 1)
+        sim_list = self._lists[self._loading]
+        sim_list.end = sim_list.length
+
+    def execute_list(self, list_no: int) -> None:
+        self._round_trip("execute_list")
+        now = self._advance()
+        if self._busy(3 - list_no, now) or self._busy(list_no, now):
+            self._error |= 1 << 5
+            return
+        self._start(list_no, now)
+
+    def auto_change(self) -> None:
+        self._round_trip("auto_change")
+        running = [n for n in self._lists if self._busy(n, self._advance())]
+        if running:
+            self._chained = 3 - running[0]
+
+    def list_repeat(self) -> None:
+        self._append_one("list_repeat", OTHER)
+        self._lists[self._loading].repeat_start = self._lists[self._loading].length
+
+    def list_until(self, number: int) -> None:
+        sim_list = self._lists[self._loading]
+        if sim_list.repeat_start is not None:
+            sim_list.repeats.append((sim_list.repeat_start, sim_list.length, number))
+            sim_list.repeat_start = None
+        self._append_one("list_until", OTHER)
+
+    # List commands
+
+    def add_jump_to(self, x: int, y: int) -> None:
+        self._append_one("add_jump_to", CommandType.JUMP, x, y)
+
+    def add_line_to(self, x: int, y: int) -> None:
+        self._append_one("add_line_to", CommandType.LINE, x, y)
+
+    def add_arc_to(self, x: int, y: int, angle: float) -> None:
+        self._append_one("add_arc_to", CommandType.ARC, x, y, angle)
+
+    def add_laser_on(self, time_10us: int) -> None:
+        self._append_one("add_laser_on", LASER_ON, time_10us)
+
+    def add_path(self, types, x, y, angle) -> tuple[int, int]:
+        commands = PathArrays(types, x, y, angle)
+        if (
+            len(commands)
+            and commands.cmd_type.max() > CommandType.SAVE_AND_RESTART_TIMER
+        ):
+            raise RtcListError("Unknown path command type")
+        self._append("add_path", commands)
+        return len(commands), self._input_pointer()
+
+    def list_nop(self) -> None:
+        self._append_one("list_nop", CommandType.LIST_NOP)
+
+    def save_and_restart_timer(self) -> None:
+        self._append_one("save_and_restart_timer", CommandType.SAVE_AND_RESTART_TIMER)
+
+    def set_angle_list(self, headNo: int, angle: float, at_once: int) -> None:
+        self._append_one("set_angle_list", OTHER)
+
+    def set_offset_xyz_list(
+        self, headNo: int, x: int, y: int, z: int, at_once: int
+    ) -> None:
+        self._append_one("set_offset_xyz_list", OTHER)
+
+    def activate_scanahead_autodelays_list(self, mode: int) -> None:
+        self._append_one("activate_scanahead_autodelays_list", OTHER)
+
+    def set_scanahead_laser_shifts_list(self, dLasOn: int, dLasOff: int) -> None:
+        self._append_one("set_scanahead_laser_shifts_list", OTHER)
+
+    def set_scanahead_line_params_list(
+        self, cornerScale: int, endScale: int, accScale: int
+    ) -> None:
+        self._append_one("set_scanahead_line_params_list", OTHER)
+
+    def set_firstpulse_killer_list(self, length: int) -> None:
+        self._append_one("set_firstpulse_killer_list", OTHER)
+
+    def set_laser_pulses(self, halfPeriod: int, pulseLength: int) -> None:
+        self._append_one("set_laser_pulses", OTHER)
+
+    def set_wobbel_mode(
+        self, transversal: int, longditudinal: int, freq: float, mode: int
+    ) -> None:
+        self._append_one("set_wobbel_mode", OTHER)
+
+    def set_sky_writing_para_list(
+        self, timelag: float, laserOnShift: int, nPrev: int, nPost: int
+    ) -> None:
+        self._append_one("set_sky_writing_para_list", OTHER)
+
+    def apply_list_config(self, config: ListConfig) -> None:
+        # Nine list commands, and the two speeds which act straight away
+        commands = LIST_CONFIG_COMMANDS
+        self._append(
+            "apply_list_config",
+            PathArrays(np.full(commands, OTHER), *np.zeros((3, commands))),
+        )
+        self._mark_speed = config.mark_speed
+        self._jump_speed = config.jump_speed
+
+    # Control commands, which act straight away
+
+    def set_mark_speed_ctrl(self, speed: float) -> None:
+        self._round_trip("set_mark_speed_ctrl")
+        self._mark_speed = speed
+
+    def set_jump_speed_ctrl(self, speed: float) -> None:
+        self._round_trip("set_jump_speed_ctrl")
+        self._jump_speed = speed
+
+    def set_scanner_delays(self, jump: int, mark: int, polygon: int) -> None:
+        self._round_trip("set_scanner_delays")
+        self._delays = {"jump": jump, "mark": mark, "polygon": polygon}
+
+    def set_laser_mode(self, mode: str) -> None:
+        self._round_trip("set_laser_mode")
+        if mode not in LaserMode.__members__:
+            raise RtcError(f"Failed to set laser mode with unknown mode {mode} ")
+
+    def set_laser_delays(self, laser_on_delay: int, laser_off_delay: int) -> None:
+        self._round_trip("set_laser_delays")
+
+    def set_laser_control(self, settings: int) -> None:
+        self._round_trip("set_laser_control")
@@ -1,3 +1,7 @@
-from rtc6_fastcs.controller.rtc_controller import RtcController
+from rtc6_fastcs.controller.rtc_controller import (
+    BoxConfig,
+    RtcController,
+    RtcMultiController,
+)
 
-__all__ = ["RtcController"]
+__all__ = ["BoxConfig", "RtcController", "RtcMultiController"]
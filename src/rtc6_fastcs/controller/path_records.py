@@ -0,0 +1,58 @@
+from functools import partial
+
+import numpy as np
+from softioc import builder
+
+from rtc6_fastcs.controller.rtc_controller import (
+    RtcControlSettings,
+    RtcListOperations,
+)
+from rtc6_fastcs.execution_list import ExecutionListConfig
+from rtc6_fastcs.path_commands import MAX_PATH_LENGTH
+
+# record name: (PathArrays field, dtype)
+PATH_WAVEFORMS = {
+    "TYPE": ("cmd_type", np.uint8),
+    "X": ("x", np.int32),
+    "Y": ("y", np.int32),
+    "ANGLE": ("angle", np.float64),
+}
+
+
+def create_path_records(pv_prefix: str, path: RtcListOperations.Path) -> None:
+    """Create the waveform records which stage arrays on the PATH sub-controller.
+
+    fastcs only supports scalar attributes, so these are made directly with the
+    softioc builder. They must be created after the fastcs records and before the
+    IOC is started.
+    """
+    record_prefix = ":".join([pv_prefix] + path.path)
+    for record_name, (field, dtype) in PATH_WAVEFORMS.items():
+        builder.WaveformOut(
+            f"{record_prefix}:{record_name}",
+            datatype=dtype,
+            length=MAX_PATH_LENGTH,
+            always_update=True,
+            on_update=partial(path.stage, field),
+        )
+
+
+def create_job_config_record(pv_prefix: str, control: RtcControlSettings) -> None:
+    """Create the JOBCONFIG waveform, which applies a whole ExecutionListConfig.
+
+    It takes the array from ExecutionListConfig.to_array, and completes the put
+    once the settings have been sent, so a job is set up with one put. Like the
+    path records, it must be created between the fastcs records and the IOC start.
+    """
+
+    async def apply(values: np.ndarray) -> None:
+        await control.apply_job_config(ExecutionListConfig.from_array(values))
+
+    builder.WaveformOut(
+        ":".join([pv_prefix, *control.path, "JOBCONFIG"]),
+        datatype=np.float64,
+        length=ExecutionListConfig().to_array().size,
+        always_update=True,
+        blocking=True,
+        on_update=apply,
+    )
@@ -1,10 +1,40 @@
 import asyncio
+import hashlib
 import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, TypeVar
 
-from rtc6_fastcs.bindings.rtc6_bindings import CardInfo, RtcError
+from rtc6_fastcs.controller.settings_cache import SettingsCache
+
+if TYPE_CHECKING:
+    from rtc6_fastcs.bindings.rtc6_bindings import CardInfo
 
 LOGGER = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Connection attempts back off from the first delay to the longest
+RETRY_DELAY_FIRST = 0.1
+RETRY_DELAY_MAX = 10.0
+
+
+def files_digest(*paths: str) -> str:
+    """Hash of the contents of the files, and of every file under any directories"""
+    digest = hashlib.sha256()
+    for path in map(Path, paths):
+        files = (
+            sorted(p for p in path.rglob("*") if p.is_file())
+            if path.is_dir()
+            else [path]
+        )
+        for file in files:
+            digest.update(f"{file}\0".encode())
+            if file.is_file():
+                digest.update(file.read_bytes())
+    return digest.hexdigest()
+
 
 class RtcConnection:
     def __init__(
@@ -13,37 +43,98 @@ class RtcConnection:
         program_file: str,
         correction_file: str,
         retry_connect: bool = True,
+        bindings: Any = None,
     ) -> None:
-        from rtc6_fastcs.bindings import rtc6_bindings as bindings
+        """bindings defaults to a handle for one card from the compiled rtc6_bindings,
+        or can be a SimulatedRtc6 to run without a card"""
+        if bindings is None:
+            from rtc6_fastcs.bindings import rtc6_bindings
+
+            bindings = rtc6_bindings.Card()
 
-        retry_connect = True
         self._bindings = bindings
         self._ip = box_ip
         self._program_file = program_file
         self._correction_file = correction_file
         self._retry_connect = retry_connect
+        # The card runs commands in the order they arrive, so every call for it goes
+        # through this one thread. This keeps slow network calls off the event loop
+        # without letting them overlap, while other cards have threads of their own.
+        self._worker = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"rtc6-{box_ip}"
+        )
+        # Connecting loads the program files, which resets the card's settings
+        self.settings = SettingsCache()
+        # files_digest of what was last loaded onto each card, by serial number
+        self._loaded: dict[int, str] = {}
 
     def set_retry_connect(self, value: bool):
         self._retry_connect = value
 
-    def get_card_info(self) -> CardInfo:
-        return self._bindings.get_card_info()
+    async def call(self, func: Callable[..., T], *args) -> T:
+        """Run func(*args) on the card worker thread and wait for the result.
+
+        Calls run in the order they are made. Anything which must not have other
+        commands put between its calls should be done in a single func.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._worker, func, *args)
+
+    async def get_card_info(self) -> "CardInfo":
+        return await self.call(self._bindings.get_card_info)
 
     def get_bindings(self):
         return self._bindings
 
-    async def connect(self) -> None:
+    async def connect(self, retry: bool | None = None) -> None:
+        """Connect to the card, loading the program and correction files onto it.
+
+        If this connection already loaded the same files onto the same card, and it
+        still has a program running, they aren't loaded again. This makes
+        reconnecting after a network drop much quicker.
+
+        Failed attempts are retried with backoff if retry is set, which defaults to
+        retry_connect.
+        """
+        retry = self._retry_connect if retry is None else retry
+        self.settings.clear()
+        files = await asyncio.to_thread(
+            files_digest, self._program_file, self._correction_file
+        )
         connected = 0
+        delay = RETRY_DELAY_FIRST
         while not connected:
             try:
-                connected = self._bindings.connect(
-                    self._ip, self._program_file, self._correction_file
+                connected = await self._reconnect(files) or await self.call(
+                    self._bindings.connect,
+                    self._ip,
+                    self._program_file,
+                    self._correction_file,
                 )
-            except RtcError as e:
-                if not self._retry_connect:
+            except self._bindings.RtcError as e:
+                if not retry:
                     raise Exception("Not retrying failed connection") from e
-                LOGGER.warning(f"Connection failed: {e.args[0]}! Retrying...")
-                await asyncio.sleep(1)
+                LOGGER.warning(
+                    f"Connection failed: {e.args[0]}! Retrying in {delay:g} s..."
+                )
+                await asyncio.sleep(delay)
+                delay = min(2 * delay, RETRY_DELAY_MAX)
+        self._loaded[connected] = files
+
+    async def _reconnect(self, files: str) -> int:
+        """The serial number if the card could be reused with the files it has"""
+        if files not in self._loaded.values():
+            return 0
+        try:
+            serial = await self.call(self._bindings.reconnect, self._ip)
+        except self._bindings.RtcError as e:
+            LOGGER.info(f"Loading the card files again: {e.args[0]}")
+            return 0
+        if self._loaded.get(serial) != files:
+            return 0
+        LOGGER.info(f"Card {serial} already has the program and correction files")
+        return serial
 
     async def close(self) -> None:
-        self._bindings.close()
+        self.settings.clear()
+        await self.call(self._bindings.close)
@@ -1,35 +1,98 @@
 import asyncio
 import logging
+import time
 from collections.abc import Callable
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Any
+from typing import TYPE_CHECKING, Any, TypeVar
 
 import numpy as np
 from fastcs.attributes import AttrR, AttrRW, AttrW, Sender
-from fastcs.controller import Controller, SubController
+from fastcs.controller import BaseController, Controller, SubController
 from fastcs.datatypes import Bool, Float, Int, String
-from fastcs.wrappers import command
+from fastcs.wrappers import command, scan
 
-from rtc6_fastcs.bindings import rtc6_bindings as rtc6
 from rtc6_fastcs.controller.rtc_connection import RtcConnection
+from rtc6_fastcs.execution_list import LIST_CONFIG_FIELDS, ExecutionListConfig
+from rtc6_fastcs.field_bounds import (
+    FIELD_LIMIT,
+    FieldBounds,
+    check_bounds,
+    clip_to_bounds,
+)
+from rtc6_fastcs.job_duration import TimingSettings, estimate_duration
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+from rtc6_fastcs.transform import (
+    apply_affine,
+    arc_direction,
+    linear,
+    load_correction_matrix,
+    transform_path,
+)
+
+if TYPE_CHECKING:
+    from rtc6_fastcs.bindings import rtc6_bindings as rtc6
 
 LOGGER = logging.getLogger(__name__)
 
+# Total list memory is split evenly so that one list can load while the other runs,
+# apart from the protected area at the top which keeps the subroutines called by
+# SUB_CALL_REPEAT. Those are stored on the card by the vendor software (LaserDESK),
+# not by this IOC, see RtcListOperations.subroutines_loaded.
+TOTAL_LIST_MEMORY = 1 << 23
+SUBROUTINE_MEMORY = 1 << 16
+LIST_MEMORY = (TOTAL_LIST_MEMORY - SUBROUTINE_MEMORY) // 2
+# Room left on list 1 for the settings commands put ahead of a streamed path
+STREAM_CHUNK_MAX = LIST_MEMORY - 1024
+STREAM_POLL_PERIOD = 0.01
+# A list still busy after this long, from the estimated duration of the whole
+# stream, is taken to be stuck and the stream fails
+STREAM_TIMEOUT_FACTOR = 2.0
+STREAM_TIMEOUT_MIN = 5.0
+# The status scan runs this often, but only reads the card once its period is up
+STATUS_SCAN_TICK = 0.01
+# How often the supervisor checks the card still answers
+CONNECTION_CHECK_PERIOD = 1.0
+# LaserMode in the bindings, page 645 of the manual
+LASER_MODES = ["CO2", "YAG1", "YAG2", "YAG3", "LASER4", "YAG5", "LASER6"]
+
+T = TypeVar("T")
+
 
 class ConnectedSubController(SubController):
     def __init__(self, conn: RtcConnection) -> None:
         super().__init__()
         self._conn = conn
 
+    async def call(self, func: Callable[..., T], *args) -> T:
+        """Call the bindings on the card worker thread, see RtcConnection.call"""
+        return await self._conn.call(func, *args)
+
+    def get_bindings(self):
+        return self._conn.get_bindings()
+
 
 class RtcInfoController(ConnectedSubController):
     firmware_version = AttrR(Int(), group="Information")
     serial_number = AttrR(Int(), group="Information")
     ip_address = AttrR(String(), group="Information")
     is_acquired = AttrR(Bool(znam="False", onam="True"), group="Information")
+    io_status = AttrR(Int(), group="Status")
+    last_error = AttrR(Int(), group="Status")
+    # How often the card status is read while a list is executing, and otherwise
+    status_period_busy = AttrRW(Float(units="s"), group="Status", initial_value=0.02)
+    status_period_idle = AttrRW(Float(units="s"), group="Status", initial_value=1.0)
+    connected = AttrR(Bool(znam="Disconnected", onam="Connected"), group="Connection")
+    reconnects = AttrR(Int(), group="Connection")
+    # From losing the connection to having restored the card, for the last drop
+    recovery_time = AttrR(Float(units="s"), group="Connection")
+    # Upload the last path from PATH:Proc again after reconnecting, ready to run
+    reupload_after_reconnect = AttrRW(
+        Bool(znam="No", onam="Yes"), group="Connection", initial_value=False
+    )
 
     async def proc_cardinfo(self) -> None:
-        info = self._conn.get_card_info()
+        info = await self._conn.get_card_info()
         await asyncio.gather(
             self.firmware_version.set(info.firmware_version),
             self.serial_number.set(info.serial_number),
@@ -37,27 +100,127 @@ class RtcInfoController(ConnectedSubController):
             self.is_acquired.set(info.is_acquired),
         )
 
+    async def update_status(self, snapshot: "rtc6.StatusSnapshot") -> None:
+        await asyncio.gather(
+            self.io_status.set(snapshot.io_status),
+            self.last_error.set(snapshot.last_error),
+        )
+
 
 class RtcControlSettings(ConnectedSubController):
+    def __init__(self, conn: RtcConnection) -> None:
+        super().__init__(conn)
+        # As last set, for estimating how long paths take
+        self.timing = TimingSettings()
+        self.last_job_config: ExecutionListConfig | None = None
+
+    async def set_on_card(self, name: str, *args) -> None:
+        """Call the named binding, unless the card already has this setting.
+
+        See SettingsCache, which is cleared on every connect.
+        """
+        settings = self._conn.settings
+        if settings.is_current(name, args):
+            return
+        try:
+            await self.call(getattr(self.get_bindings(), name), *args)
+        except BaseException:
+            settings.forget(name)
+            raise
+        settings.sent(name, args)
+
+    async def restore(self, settings: dict[str, Any]) -> None:
+        """Send control settings again, as from SettingsCache.control_settings"""
+        for name, args in settings.items():
+            await self.set_on_card(name, *args)
+
+    async def apply_job_config(self, config: ExecutionListConfig) -> None:
+        """Apply the header settings of an execution list in one call to the card.
+
+        This is what the JOBCONFIG waveform made by create_job_config_record does,
+        in place of a put to each of the settings below. Nothing is sent if the
+        card already has all of them.
+        """
+        settings = self._conn.settings
+        calls = {
+            "set_angle_list": (1, config.angle, 0),
+            "set_offset_xyz_list": (1, *config.offset_xyz, 0),
+            "set_mark_speed_ctrl": (config.mark_speed,),
+            "set_jump_speed_ctrl": (config.jump_speed,),
+            "activate_scanahead_autodelays_list": (config.scanahead_autodelays,),
+            "set_scanahead_laser_shifts_list": config.scanahead_laser_shifts,
+            "set_scanahead_line_params_list": config.scanahead_line_params,
+            "set_firstpulse_killer_list": (config.firstpulse_killer,),
+            "set_laser_pulses": config.laser_pulses,
+            "set_wobbel_mode": config.wobbel_mode,
+            "set_sky_writing_para_list": config.sky_writing_para,
+        }
+        self.timing.mark_speed = config.mark_speed
+        self.timing.jump_speed = config.jump_speed
+        self.last_job_config = config
+        if all(settings.is_current(name, args) for name, args in calls.items()):
+            return
+        bindings = self.get_bindings()
+        list_config = bindings.ListConfig()
+        for name in LIST_CONFIG_FIELDS:
+            setattr(list_config, name, getattr(config, name))
+        try:
+            await self.call(bindings.apply_list_config, list_config)
+        except BaseException:
+            for name in calls:
+                settings.forget(name)
+            raise
+        for name, args in calls.items():
+            settings.sent(name, args)
+
+    def set_by_path(self, commands: PathArrays) -> None:
+        """Account for the speeds a path sets, which the card has once it runs.
+
+        The cached speeds would then be wrong, so they are forgotten and sent again
+        next time, and the timing takes the last speeds the path sets.
+        """
+        for cmd_type, name, setting in (
+            (CommandType.SET_MARK_SPEED, "set_mark_speed_ctrl", "mark_speed"),
+            (CommandType.SET_JUMP_SPEED, "set_jump_speed_ctrl", "jump_speed"),
+        ):
+            speeds = commands.angle[commands.cmd_type == cmd_type]
+            if speeds.size:
+                self._conn.settings.forget(name)
+                setattr(self.timing, setting, float(speeds[-1]))
+
+    @command(group="LaserControl")
+    async def forget_settings(self):
+        """Send every setting again, e.g. if the card was reset outside the IOC"""
+        self._conn.settings.clear()
+
     @dataclass
     class ControlSettingsHandler(Sender):
-        cmd: Callable
+        cmd: str  # name of the function in the bindings
 
-        async def put(
-            self, controller: ConnectedSubController, attr: AttrW, value: Any
-        ):
-            self.cmd(value)
+        async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
+            await controller.set_on_card(self.cmd, value)
+
+    @dataclass
+    class TimingSettingHandler(ControlSettingsHandler):
+        setting: str  # field of TimingSettings
+
+        async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
+            await super().put(controller, attr, value)
+            setattr(controller.timing, self.setting, value)
 
     @dataclass
     class DelaysHandler(Sender):
         update_period: float | None = None
 
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
-            rtc6.set_scanner_delays(
+            delays = (
                 controller.jump_delay.get(),
                 controller.mark_delay.get(),
                 controller.polygon_delay.get(),
             )
+            await controller.set_on_card("set_scanner_delays", *delays)
+            timing = controller.timing
+            timing.jump_delay, timing.mark_delay, timing.polygon_delay = delays
 
         async def update(self, controller: "RtcControlSettings", attr: AttrR): ...
 
@@ -65,15 +228,19 @@ class RtcControlSettings(ConnectedSubController):
     class LaserPulsesHandler(Sender):
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
             halfPeriod, pulseLength = map(int, value.split(","))
-            rtc6.set_laser_pulses(halfPeriod, pulseLength)
+            await controller.set_on_card("set_laser_pulses", halfPeriod, pulseLength)
 
     @dataclass
     class WobbelModeHandler(Sender):
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
             # transversal, longitudinal, freq, mode
             parts = value.split(",")
-            rtc6.set_wobbel_mode(
-                int(parts[0]), int(parts[1]), float(parts[2]), int(parts[3])
+            await controller.set_on_card(
+                "set_wobbel_mode",
+                int(parts[0]),
+                int(parts[1]),
+                float(parts[2]),
+                int(parts[3]),
             )
 
     @dataclass
@@ -81,8 +248,12 @@ class RtcControlSettings(ConnectedSubController):
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
             # timelag, laserOnShift, nPrev, nPost
             parts = value.split(",")
-            rtc6.set_sky_writing_para_list(
-                float(parts[0]), int(parts[1]), int(parts[2]), int(parts[3])
+            await controller.set_on_card(
+                "set_sky_writing_para_list",
+                float(parts[0]),
+                int(parts[1]),
+                int(parts[2]),
+                int(parts[3]),
             )
 
     @dataclass
@@ -90,14 +261,20 @@ class RtcControlSettings(ConnectedSubController):
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
             # headNo, angle, at_once
             parts = value.split(",")
-            rtc6.set_angle_list(int(parts[0]), float(parts[1]), int(parts[2]))
+            await controller.set_on_card(
+                "set_angle_list",
+                int(parts[0]),
+                float(parts[1]),
+                int(parts[2]),
+            )
 
     @dataclass
     class OffsetXYZListHandler(Sender):
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
             # headNo, x, y, z, at_once
             parts = value.split(",")
-            rtc6.set_offset_xyz_list(
+            await controller.set_on_card(
+                "set_offset_xyz_list",
                 int(parts[0]),
                 int(parts[1]),
                 int(parts[2]),
@@ -110,53 +287,63 @@ class RtcControlSettings(ConnectedSubController):
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
             # dLasOn, dLasOff
             parts = value.split(",")
-            rtc6.set_scanahead_laser_shifts_list(int(parts[0]), int(parts[1]))
+            await controller.set_on_card(
+                "set_scanahead_laser_shifts_list",
+                int(parts[0]),
+                int(parts[1]),
+            )
 
     @dataclass
     class ScanaheadLineParamsHandler(Sender):
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
             # cornerScale, endScale, accScale
             parts = value.split(",")
-            rtc6.set_scanahead_line_params_list(
-                int(parts[0]), int(parts[1]), int(parts[2])
+            await controller.set_on_card(
+                "set_scanahead_line_params_list",
+                int(parts[0]),
+                int(parts[1]),
+                int(parts[2]),
             )
 
     @dataclass
     class LaserDelaysHandler(Sender):
         async def put(self, controller: "RtcControlSettings", attr: AttrW, value: Any):
             # laser_on_delay, laser_off_delay
-            parts = value.split(",")
-            rtc6.set_laser_delays(int(parts[0]), int(parts[1]))
+            laser_on_delay, laser_off_delay = map(int, value.split(","))
+            await controller.set_on_card(
+                "set_laser_delays", laser_on_delay, laser_off_delay
+            )
+            controller.timing.laser_off_delay = laser_off_delay
 
     # Page 645 of the manual
     laser_mode = AttrW(
         String(),
         group="LaserControl",
-        allowed_values=[rtc6.LaserMode(i).name for i in range(7)],
-        handler=ControlSettingsHandler(rtc6.set_laser_mode),
+        allowed_values=LASER_MODES,
+        handler=ControlSettingsHandler("set_laser_mode"),
     )
     laser_control = AttrW(
         Int(),
         group="LaserControl",
-        handler=ControlSettingsHandler(rtc6.set_laser_control),
+        handler=ControlSettingsHandler("set_laser_control"),
     )
     mark_speed = AttrW(
         Float(),
         group="LaserControl",
-        handler=ControlSettingsHandler(rtc6.set_mark_speed_ctrl),
+        handler=TimingSettingHandler("set_mark_speed_ctrl", "mark_speed"),
     )
     jump_speed = AttrW(
         Float(),
         group="LaserControl",
-        handler=ControlSettingsHandler(rtc6.set_jump_speed_ctrl),
+        handler=TimingSettingHandler("set_jump_speed_ctrl", "jump_speed"),
     )
     list_nop = AttrW(
-        Int(), group="ListProgramming", handler=ControlSettingsHandler(rtc6.list_nop)
+        Int(), group="ListProgramming", handler=ControlSettingsHandler("list_nop")
     )
     save_restart_timer = AttrW(
         Int(),
         group="ListProgramming",
-        handler=ControlSettingsHandler(rtc6.save_and_restart_timer),
+        handler=ControlSettingsHandler("save_and_restart_timer"),
     )
     laser_pulses = AttrW(
         String(), group="ListProgramming", handler=LaserPulsesHandler()
@@ -164,7 +351,7 @@ class RtcControlSettings(ConnectedSubController):
     firstpulse_killer = AttrW(
         Int(),
         group="ListProgramming",
-        handler=ControlSettingsHandler(rtc6.set_firstpulse_killer_list),
+        handler=ControlSettingsHandler("set_firstpulse_killer_list"),
     )
     wobbel_mode = AttrW(
         String(),
@@ -189,7 +376,7 @@ class RtcControlSettings(ConnectedSubController):
     scanahead_autodelays = AttrW(
         Int(),
         group="ListProgramming",
-        handler=ControlSettingsHandler(rtc6.activate_scanahead_autodelays_list),
+        handler=ControlSettingsHandler("activate_scanahead_autodelays_list"),
     )
     scanahead_laser_shifts = AttrW(
         String(),
@@ -229,20 +416,52 @@ class XYCorrectedConnectedSubController(ConnectedSubController):
     def __init__(
         self, conn: RtcConnection, coordinate_correction_matrix: np.ndarray
     ) -> None:
+        """The matrix should already be validated, see load_correction_matrix"""
         super().__init__(conn)
         self.coordinate_correction_matrix = coordinate_correction_matrix
+        self.correction = linear(coordinate_correction_matrix)
+        self._arc_direction = arc_direction(coordinate_correction_matrix)
+
+    def correct_points(self, xy: np.ndarray) -> np.ndarray:
+        """Correct an Nx2 array of points for the laser / oav optics"""
+        return apply_affine(self.correction, xy)
 
     def correct_xy(self, x: int, y: int) -> tuple[int, int]:
         """Correct for transformations in the laser / oav optics"""
-        print(f"Correcting {(x, y)} by {self.coordinate_correction_matrix}")
-        corrected = np.matmul(self.coordinate_correction_matrix, [x, y])
-        as_ints = (int(corrected[0]), int(corrected[1]))
-        print(f"Result: {corrected} => {as_ints}")
-        return as_ints
+        ((corrected_x, corrected_y),) = self.correct_points(np.array([[x, y]]))
+        return int(corrected_x), int(corrected_y)
+
+    def correct_arc_angle(self, angle: float) -> float:
+        """Arcs run the other way if the correction mirrors the field"""
+        return angle * self._arc_direction
 
 
 class RtcListOperations(XYCorrectedConnectedSubController):
     list_pointer_position = AttrR(Int(), group="ListInfo")
+    list_space = AttrR(Int(), group="ListInfo")
+    list_status = AttrR(Int(), group="ListInfo")  # bit n is set for ListStatus n
+    busy = AttrR(Bool(znam="Idle", onam="Busy"), group="ListInfo")
+    # Clients wait for executions_done to reach the value executions_started had
+    # when they started a job, which doesn't depend on the order the commands and
+    # status updates arrive in
+    executions_started = AttrR(Int(), group="ListInfo")
+    executions_done = AttrR(Int(), group="ListInfo")
+    # Counts executions which could not be started or streamed, so that clients
+    # waiting on executions_done can stop waiting
+    executions_failed = AttrR(Int(), group="ListInfo")
+    last_failure = AttrR(String(), group="ListInfo")
+    # Set once the subroutines called by SUB_CALL_REPEAT have been stored in the
+    # protected area. Until then paths which call them are refused, rather than
+    # jumping into memory which holds nothing.
+    subroutines_loaded = AttrRW(
+        Bool(znam="No", onam="Yes"), group="ListInfo", initial_value=False
+    )
+
+    def __init__(
+        self, conn: RtcConnection, coordinate_correction_matrix: np.ndarray
+    ) -> None:
+        super().__init__(conn, coordinate_correction_matrix)
+        self.streaming = False
 
     class AddJump(XYCorrectedConnectedSubController):
         x = AttrRW(Int(), group="ListOps")
@@ -250,11 +469,9 @@ class RtcListOperations(XYCorrectedConnectedSubController):
 
         @command(group="ListOps")
         async def proc(self):
-            print("adding jump")
             bindings = self._conn.get_bindings()
             x, y = self.correct_xy(self.x.get(), self.y.get())
-            bindings.add_jump_to(x, y)
-            print("---")
+            await self._conn.call(bindings.add_jump_to, x, y)
 
     class AddArc(XYCorrectedConnectedSubController):
         x = AttrRW(Int(), group="ListOps")
@@ -263,11 +480,10 @@ class RtcListOperations(XYCorrectedConnectedSubController):
 
         @command()
         async def proc(self):
-            print("adding arc")
             bindings = self._conn.get_bindings()
             x, y = self.correct_xy(self.x.get(), self.y.get())
-            bindings.add_arc_to(x, y, self.angle.get())
-            print("---")
+            angle = self.correct_arc_angle(self.angle.get())
+            await self._conn.call(bindings.add_arc_to, x, y, angle)
 
     class AddLine(XYCorrectedConnectedSubController):
         x = AttrRW(Int(), group="ListOps")
@@ -275,59 +491,376 @@ class RtcListOperations(XYCorrectedConnectedSubController):
 
         @command()
         async def proc(self):
-            print("adding line")
             bindings = self._conn.get_bindings()
-            bindings.add_line_to(*self.correct_xy(self.x.get(), self.y.get()))
-            print("---")
+            x, y = self.correct_xy(self.x.get(), self.y.get())
+            await self._conn.call(bindings.add_line_to, x, y)
+
+    class Path(XYCorrectedConnectedSubController):
+        """Whole-path upload, one put per array instead of per vertex.
+
+        fastcs has no array attributes, so the arrays are written to the
+        waveform records made by create_path_records, which stage them here.
+        """
+
+        commands_written = AttrR(Int(), group="ListOps")
+        input_pointer = AttrR(Int(), group="ListInfo")
+        chunk_size = AttrRW(
+            Int(min=1, max=STREAM_CHUNK_MAX), group="ListOps", initial_value=10000
+        )
+        passes = AttrRW(Int(min=1), group="ListOps", initial_value=1)
+        # From the control settings as last set, see job_duration
+        estimated_duration = AttrR(Float(units="s"), group="ListOps")
+        # Where the corrected path may go, in bits. This is the whole field unless
+        # it is narrowed to keep clear of something on the beamline. Paths which
+        # leave it are refused before anything is sent to the card, or if clip is
+        # set their jumps and lines are moved back inside it.
+        safe_x_min = AttrRW(
+            Int(min=-FIELD_LIMIT, max=FIELD_LIMIT),
+            group="Bounds",
+            initial_value=-FIELD_LIMIT,
+        )
+        safe_x_max = AttrRW(
+            Int(min=-FIELD_LIMIT, max=FIELD_LIMIT),
+            group="Bounds",
+            initial_value=FIELD_LIMIT,
+        )
+        safe_y_min = AttrRW(
+            Int(min=-FIELD_LIMIT, max=FIELD_LIMIT),
+            group="Bounds",
+            initial_value=-FIELD_LIMIT,
+        )
+        safe_y_max = AttrRW(
+            Int(min=-FIELD_LIMIT, max=FIELD_LIMIT),
+            group="Bounds",
+            initial_value=FIELD_LIMIT,
+        )
+        clip = AttrRW(
+            Bool(znam="Reject", onam="Clip"), group="Bounds", initial_value=False
+        )
+
+        def __init__(
+            self,
+            conn: RtcConnection,
+            coordinate_correction_matrix: np.ndarray,
+            list_operations: "RtcListOperations",
+            control_settings: RtcControlSettings,
+        ) -> None:
+            super().__init__(conn, coordinate_correction_matrix)
+            self._list_operations = list_operations
+            self._control_settings = control_settings
+            self._staged = PathArrays.empty()
+            # From proc, to upload again after reconnecting
+            self.last_upload: tuple[PathArrays, int] | None = None
+
+        def stage(self, field: str, value: np.ndarray) -> None:
+            setattr(self._staged, field, value)
+
+        def _corrected(self) -> PathArrays:
+            commands = PathArrays(
+                self._staged.cmd_type,
+                self._staged.x,
+                self._staged.y,
+                self._staged.angle,
+            )
+            if (
+                np.any(commands.cmd_type == CommandType.SUB_CALL_REPEAT)
+                and not self._list_operations.subroutines_loaded.get()
+            ):
+                raise ValueError(
+                    "Path calls subroutines, but SubroutinesLoaded is not set. Store "
+                    "them in the protected list area first."
+                )
+            commands = transform_path(self.correction, commands)
+            bounds = FieldBounds(
+                self.safe_x_min.get(),
+                self.safe_x_max.get(),
+                self.safe_y_min.get(),
+                self.safe_y_max.get(),
+            )
+            if self.clip.get():
+                return clip_to_bounds(commands, bounds)
+            check_bounds(commands, bounds)
+            return commands
+
+        def _write_path(self, commands: PathArrays, passes: int = 1) -> tuple[int, int]:
+            """Runs on the card worker, so nothing can land inside the repeat"""
+            bindings = self._conn.get_bindings()
+            if passes > 1:
+                bindings.list_repeat()
+            result = bindings.add_path(
+                commands.cmd_type, commands.x, commands.y, commands.angle
+            )
+            if passes > 1:
+                bindings.list_until(passes)
+            return result
+
+        def _write_chunk(
+            self, commands: PathArrays, list_no: int | None
+        ) -> tuple[int, int]:
+            """Load list_no, if given, then add the chunk and end the list.
+
+            Runs on the card worker as a whole, so nothing else can be added to the
+            list between the chunk and its end.
+            """
+            bindings = self._conn.get_bindings()
+            if list_no is not None and not bindings.load_list(list_no, 0):
+                raise bindings.RtcListError(
+                    f"List {list_no} could not be loaded, the card refused it"
+                )
+            result = self._write_path(commands)
+            bindings.set_end_of_list()
+            return result
+
+        async def _add_path(self, commands: PathArrays, passes: int = 1) -> None:
+            await self._written(
+                *await self._conn.call(self._write_path, commands, passes)
+            )
+
+        async def _written(self, written: int, pointer: int) -> None:
+            await asyncio.gather(
+                self.commands_written.set(written), self.input_pointer.set(pointer)
+            )
+
+        @command(group="ListOps")
+        async def proc(self):
+            """Add the path to the list once, to be run the given number of passes.
+
+            Repeats are done by the card with list_repeat / list_until, so the
+            upload and the list memory used don't grow with the number of passes.
+            """
+            commands, passes = self._corrected(), self.passes.get()
+            await self.estimated_duration.set(
+                estimate_duration(commands, self._control_settings.timing, passes)
+            )
+            self._control_settings.set_by_path(commands)
+            await self._add_path(commands, passes)
+            self.last_upload = (commands, passes)
+
+        async def reupload(self) -> None:
+            """Add the path from the last proc to the list again"""
+            if self.last_upload is not None:
+                await self._add_path(*self.last_upload)
+
+        @command(group="ListOps")
+        async def stream(self):
+            """Load the path in chunks, alternating between lists 1 and 2.
+
+            The first chunk goes on the end of list 1 as started by init_list, which
+            is executed as soon as it is loaded. Each following chunk is loaded into
+            whichever list is not running and chained on with auto_change, so the
+            upload overlaps the marking. The list does not need to be ended or
+            executed afterwards. The whole stream counts as one execution.
+
+            A repeat can't span two lists, so for more than one pass the path is
+            repeated here before it is split into chunks.
+            """
+            async with self._list_operations.reporting_failure():
+                await self._stream()
+
+        async def _stream(self):
+            commands = self._corrected().tile(self.passes.get())
+            duration = estimate_duration(commands, self._control_settings.timing)
+            await self.estimated_duration.set(duration)
+            self._control_settings.set_by_path(commands)
+            chunk_size = self.chunk_size.get()
+            timeout = STREAM_TIMEOUT_FACTOR * duration + STREAM_TIMEOUT_MIN
+            # Stay busy between chunks, even if the upload falls behind
+            self._list_operations.streaming = True
+            try:
+                for index, start in enumerate(range(0, len(commands), chunk_size)):
+                    list_no = 1 + index % 2
+                    if index:
+                        await self._wait_until_idle(list_no, timeout)
+                    await self._written(
+                        *await self._conn.call(
+                            self._write_chunk,
+                            commands[start : start + chunk_size],
+                            list_no if index else None,
+                        )
+                    )
+                    if index:
+                        await self._conn.call(self._chain_list, list_no)
+                    else:
+                        await self._list_operations.start_execution(1)
+            finally:
+                self._list_operations.streaming = False
+
+        def _status(self, name: str, list_no: int) -> "rtc6.ListStatus":
+            return self._conn.get_bindings().ListStatus.__members__[f"{name}{list_no}"]
+
+        async def _wait_until_idle(self, list_no: int, timeout: float) -> None:
+            bindings = self._conn.get_bindings()
+            busy = self._status("BUSY", list_no)
+            try:
+                async with asyncio.timeout(timeout):
+                    while busy in await self._conn.call(bindings.get_list_statuses):
+                        await asyncio.sleep(STREAM_POLL_PERIOD)
+            except TimeoutError as e:
+                raise TimeoutError(
+                    f"List {list_no} was still busy after {timeout:.1f} s"
+                ) from e
+
+        def _chain_list(self, list_no: int) -> None:
+            """Start list_no when the other list finishes, or now if it already has.
+
+            This checks the list statuses between its commands, so it runs on the card
+            worker as a whole.
+            """
+            bindings = self._conn.get_bindings()
+            other_busy = self._status("BUSY", 3 - list_no)
+            if other_busy in bindings.get_list_statuses():
+                bindings.auto_change()
+                # The other list may have finished before auto_change arrived, in
+                # which case nothing will start this one
+                statuses = bindings.get_list_statuses()
+                if other_busy in statuses or any(
+                    self._status(name, list_no) in statuses for name in ("BUSY", "USED")
+                ):
+                    return
+            LOGGER.debug(f"Upload fell behind marking, starting list {list_no}")
+            bindings.execute_list(list_no)
 
     @command()
     async def init_list(self):
         rtc6 = self._conn.get_bindings()
-        rtc6.config_list_memory(10000000, 1)  # Just put everything on list one
-        rtc6.init_list_loading(1)
+        # list 2 is for streaming
+        await self._conn.call(rtc6.config_list_memory, LIST_MEMORY, LIST_MEMORY)
+        await self._conn.call(rtc6.init_list_loading, 1)
+        # List settings in a list which never ran didn't reach the card
+        self._conn.settings.list_discarded()
 
     @command()
     async def end_list(self):
         rtc6 = self._conn.get_bindings()
-        rtc6.set_end_of_list()
+        await self._conn.call(rtc6.set_end_of_list)
 
     @command()
     async def execute_list(self):
-        rtc6 = self._conn.get_bindings()
-        rtc6.execute_list(1)
+        async with self.reporting_failure():
+            await self.start_execution(1)
+
+    @asynccontextmanager
+    async def reporting_failure(self):
+        """Publish any error from a command which starts an execution, then raise"""
+        try:
+            yield
+        except Exception as e:
+            await asyncio.gather(
+                self.last_failure.set(f"{type(e).__name__}: {e}"),
+                self.executions_failed.set(self.executions_failed.get() + 1),
+            )
+            raise
+
+    async def start_execution(self, list_no: int) -> None:
+        await self._conn.call(self._conn.get_bindings().execute_list, list_no)
+        self._conn.settings.list_executed()
+        await asyncio.gather(
+            self.busy.set(True),
+            self.executions_started.set(self.executions_started.get() + 1),
+        )
 
+    async def abandon_execution(self, reason: str) -> None:
+        """Report a running execution as failed, if the card may have lost it.
 
-class RtcController(Controller):
-    def __init__(
+        A stream reports its own failure, when its next card call fails.
+        """
+        if not self.busy.get() or self.streaming:
+            return
+        await asyncio.gather(
+            self.last_failure.set(reason),
+            self.executions_failed.set(self.executions_failed.get() + 1),
+        )
+        await asyncio.gather(
+            self.busy.set(False),
+            self.executions_done.set(self.executions_started.get()),
+        )
+
+    async def update_status(
+        self, snapshot: "rtc6.StatusSnapshot", started: int
+    ) -> None:
+        """Update ListInfo, and mark executions done once the card is idle.
+
+        started is executions_started as it was before the snapshot was read. Only
+        those executions can be retired by it, as one started while the snapshot
+        was in flight may not show as busy yet.
+
+        The values in the snapshot are read from the card one after another, so
+        busy comes from the list status alone and nothing else is checked against it.
+        """
+        bindings = self._conn.get_bindings()
+        busy_bits = (1 << bindings.ListStatus.BUSY1.value) | (
+            1 << bindings.ListStatus.BUSY2.value
+        )
+        busy = self.streaming or bool(snapshot.list_status & busy_bits)
+        await asyncio.gather(
+            self.list_pointer_position.set(snapshot.input_pointer),
+            self.list_space.set(snapshot.list_space),
+            self.list_status.set(snapshot.list_status),
+        )
+        if self.executions_started.get() != started:
+            # Leave busy as start_execution set it until a snapshot catches up
+            return
+        await self.busy.set(busy)
+        if not busy and self.executions_done.get() != started:
+            await self.executions_done.set(started)
+
+
+@dataclass
+class BoxConfig:
+    box_ip: str
+    program_file_dir: str
+    correction_file: str
+    coordinate_system_correction_file: str = ""
+
+
+class RtcCardBase(BaseController):
+    """The sub-controllers, connection and scans for one eth box.
+
+    This is the root RtcController when the IOC drives one box, or an RtcCard under
+    RtcMultiController for each of several. Every box has its own connection and
+    worker thread, so uploads and executions on different boxes run at the same time.
+    """
+
+    def _add_card(
         self,
         box_ip: str,
         program_file_dir: str,
         correction_file: str,
         coordinate_system_correction_file: str = "",
         retry_connect: bool = False,
+        bindings: Any = None,
     ) -> None:
-        super().__init__()
+        """Create the connection and sub-controllers, once the path is known.
+
+        bindings is passed on to RtcConnection, e.g. to use a SimulatedRtc6
+        """
         try:
-            self.coordinate_system_transform = np.loadtxt(
+            self.coordinate_system_transform = load_correction_matrix(
                 coordinate_system_correction_file
             )
-        except Exception:
+        except OSError:
             LOGGER.warning(
                 "Failed to open coordinate system transformation file, "
                 "defaulting to identity matrix."
             )
-            self.coordinate_system_transform = np.array([[1, 0], [0, 1]])
+            self.coordinate_system_transform = np.identity(2)
         self._conn = RtcConnection(
-            box_ip, program_file_dir, correction_file, retry_connect
+            box_ip, program_file_dir, correction_file, retry_connect, bindings
         )
 
         self._info_controller = RtcInfoController(self._conn)
         self.register_sub_controller("INFO", self._info_controller)
-        self.register_sub_controller("CONTROL", RtcControlSettings(self._conn))
+        self.control_settings = RtcControlSettings(self._conn)
+        self.register_sub_controller("CONTROL", self.control_settings)
         list_controller = RtcListOperations(
             self._conn, self.coordinate_system_transform
         )
         self.register_sub_controller("LIST", list_controller)
+        self._list_controller = list_controller
+        self._last_status_update = -float("inf")
+        # Set while the connection is lost, see recover
+        self._lost_at: float | None = None
+        self._settings_to_restore: dict[str, Any] = {}
         list_controller.register_sub_controller(
             "ADDJUMP",
             list_controller.AddJump(self._conn, self.coordinate_system_transform),
@@ -340,10 +873,187 @@ class RtcController(Controller):
             "ADDLINE",
             list_controller.AddLine(self._conn, self.coordinate_system_transform),
         )
+        self.path_controller = list_controller.Path(
+            self._conn,
+            self.coordinate_system_transform,
+            list_controller,
+            self.control_settings,
+        )
+        list_controller.register_sub_controller("PATH", self.path_controller)
 
     async def connect(self) -> None:
         await self._conn.connect()
         await self._info_controller.proc_cardinfo()
+        await self._info_controller.connected.set(True)
+
+    @scan(CONNECTION_CHECK_PERIOD)
+    async def supervise_connection(self):
+        """Check the card still answers, and recover the connection if not.
+
+        A recovery which fails part way, e.g. because the card drops again, is
+        tried again on the next check, until the card is connected again.
+        """
+        bindings = self._conn.get_bindings()
+        try:
+            await self._conn.call(bindings.check_connection)
+            if self._info_controller.connected.get():
+                return
+        except (bindings.RtcError, bindings.RtcConnectionError) as e:
+            LOGGER.warning(f"Lost the connection to the card: {e}")
+        try:
+            await self.recover()
+        except Exception as e:
+            # The scan would stop for good if this was raised
+            LOGGER.error(f"Failed to recover the connection to the card: {e}")
+
+    async def recover(self) -> None:
+        """Reconnect, retrying with backoff, then restore the card's state.
+
+        The control settings are sent again, as the card may have been reset, and
+        the last path is uploaded again if reupload_after_reconnect is set. An
+        execution which was running is reported as failed, as it can't be known
+        whether it finished.
+        """
+        info = self._info_controller
+        if self._lost_at is None:
+            # Kept until a recovery succeeds, as a failed one may have reset the
+            # cache
+            self._lost_at = time.monotonic()
+            self._settings_to_restore = self._conn.settings.control_settings()
+        await info.connected.set(False)
+        await self._list_controller.abandon_execution(
+            "Lost the connection to the card while executing"
+        )
+        await self._conn.connect(retry=True)
+        await self.control_settings.restore(self._settings_to_restore)
+        if info.reupload_after_reconnect.get():
+            await self._reupload()
+        await info.proc_cardinfo()
+        recovery_time = time.monotonic() - self._lost_at
+        self._lost_at = None
+        LOGGER.info(f"Recovered the connection to the card in {recovery_time:.3f} s")
+        await asyncio.gather(
+            info.connected.set(True),
+            info.reconnects.set(info.reconnects.get() + 1),
+            info.recovery_time.set(recovery_time),
+        )
+
+    async def _reupload(self) -> None:
+        """Load the last job into list 1 again, with its config, ready to run"""
+        if self.path_controller.last_upload is None:
+            return
+        await self._list_controller.init_list()
+        if self.control_settings.last_job_config is not None:
+            await self.control_settings.apply_job_config(
+                self.control_settings.last_job_config
+            )
+        await self.path_controller.reupload()
+
+    @scan(STATUS_SCAN_TICK)
+    async def update_status(self):
+        """Read the card status in one call and update INFO and LIST from it.
+
+        This is done every status_period_busy while a list is executing and every
+        status_period_idle otherwise. Starting a list sets busy straight away, so
+        the faster period applies from the next tick.
+        """
+        period = (
+            self._info_controller.status_period_busy.get()
+            if self._list_controller.busy.get()
+            else self._info_controller.status_period_idle.get()
+        )
+        now = time.monotonic()
+        if (
+            now - self._last_status_update < period
+            or not self._info_controller.connected.get()
+        ):
+            return
+        self._last_status_update = now
+        bindings = self._conn.get_bindings()
+        started = self._list_controller.executions_started.get()
+        try:
+            snapshot = await self._conn.call(bindings.get_status_snapshot)
+        except bindings.RtcError as e:
+            LOGGER.warning(f"Could not read card status: {e}")
+            return
+        await asyncio.gather(
+            self._info_controller.update_status(snapshot),
+            self._list_controller.update_status(snapshot, started),
+        )
 
     async def close(self) -> None:
         await self._conn.close()
+
+
+class RtcController(RtcCardBase, Controller):
+    def __init__(
+        self,
+        box_ip: str,
+        program_file_dir: str,
+        correction_file: str,
+        coordinate_system_correction_file: str = "",
+        retry_connect: bool = False,
+        bindings: Any = None,
+    ) -> None:
+        """bindings is passed on to RtcConnection, e.g. to use a SimulatedRtc6"""
+        super().__init__()
+        self._add_card(
+            box_ip,
+            program_file_dir,
+            correction_file,
+            coordinate_system_correction_file,
+            retry_connect,
+            bindings,
+        )
+
+
+class RtcCard(RtcCardBase, SubController):
+    def __init__(
+        self,
+        parent: BaseController,
+        name: str,
+        box: BoxConfig,
+        retry_connect: bool = False,
+        bindings: Any = None,
+    ) -> None:
+        """Register as name under parent, before the sub-controllers are added so that
+        their paths start with it"""
+        super().__init__()
+        parent.register_sub_controller(name, self)
+        self._add_card(
+            box.box_ip,
+            box.program_file_dir,
+            box.correction_file,
+            box.coordinate_system_correction_file,
+            retry_connect,
+            bindings,
+        )
+
+
+class RtcMultiController(Controller):
+    def __init__(
+        self,
+        boxes: list[BoxConfig],
+        retry_connect: bool = False,
+        bindings: list[Any] | None = None,
+    ) -> None:
+        """One RtcCard for each box, named CARD1, CARD2 and so on.
+
+        bindings has one entry for each box if given, e.g. a SimulatedRtc6 for each
+        """
+        super().__init__()
+        bindings = bindings or [None] * len(boxes)
+        if len(bindings) != len(boxes):
+            raise ValueError(f"Got bindings for {len(bindings)} of {len(boxes)} boxes")
+        self.cards = [
+            RtcCard(self, f"CARD{number}", box, retry_connect, card_bindings)
+            for number, (box, card_bindings) in enumerate(
+                zip(boxes, bindings, strict=True), start=1
+            )
+        ]
+
+    async def connect(self) -> None:
+        await asyncio.gather(*(card.connect() for card in self.cards))
+
+    async def close(self) -> None:
+        await asyncio.gather(*(card.close() for card in self.cards))
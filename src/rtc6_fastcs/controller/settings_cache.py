@@ -0,0 +1,79 @@
+from collections.abc import Hashable
+
+# Bindings which set something on the card straight away
+CONTROL_SETTINGS = frozenset(
+    {
+        "set_laser_mode",
+        "set_laser_control",
+        "set_mark_speed_ctrl",
+        "set_jump_speed_ctrl",
+        "set_scanner_delays",
+        "set_laser_delays",
+    }
+)
+# Bindings which add a setting to the list, so it is set when the list runs
+LIST_SETTINGS = frozenset(
+    {
+        "set_angle_list",
+        "set_offset_xyz_list",
+        "activate_scanahead_autodelays_list",
+        "set_scanahead_laser_shifts_list",
+        "set_scanahead_line_params_list",
+        "set_firstpulse_killer_list",
+        "set_laser_pulses",
+        "set_wobbel_mode",
+        "set_sky_writing_para_list",
+    }
+)
+
+
+class SettingsCache:
+    """The arguments each setting was last sent to the card with.
+
+    Writes which would change nothing can then be skipped. List settings only take
+    effect when their list runs, so until then they are pending, and are dropped if
+    the list is started again without being run. A pending setting still makes the
+    same write redundant, as the list already has it.
+
+    Anything which isn't a known setting, such as list_nop, is never current.
+    """
+
+    def __init__(self) -> None:
+        self._applied: dict[str, Hashable] = {}
+        self._pending: dict[str, Hashable] = {}
+
+    def is_current(self, name: str, args: Hashable) -> bool:
+        if name in self._pending:
+            return self._pending[name] == args
+        return name in self._applied and self._applied[name] == args
+
+    def sent(self, name: str, args: Hashable) -> None:
+        if name in LIST_SETTINGS:
+            self._pending[name] = args
+        elif name in CONTROL_SETTINGS:
+            self._applied[name] = args
+
+    def control_settings(self) -> dict[str, Hashable]:
+        """The control settings the card has, to send again after it is reset"""
+        return {
+            name: args
+            for name, args in self._applied.items()
+            if name in CONTROL_SETTINGS
+        }
+
+    def forget(self, name: str) -> None:
+        """The card may or may not have this setting, e.g. after a failed write"""
+        self._applied.pop(name, None)
+        self._pending.pop(name, None)
+
+    def list_executed(self) -> None:
+        self._applied.update(self._pending)
+        self._pending.clear()
+
+    def list_discarded(self) -> None:
+        self._pending.clear()
+
+    def clear(self) -> None:
+        """Nothing is known about the card, e.g. after it was reset or reconnected"""
+        self._applied.clear()
+        self._pending.clear()
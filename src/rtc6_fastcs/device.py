@@ -1,5 +1,17 @@
-from bluesky.protocols import Triggerable
-from ophyd_async.core import AsyncStageable, AsyncStatus, StandardReadable
+import asyncio
+import os
+
+import numpy as np
+from bluesky.protocols import Flyable, Preparable, Triggerable
+from ophyd_async.core import (
+    Array1D,
+    AsyncStageable,
+    AsyncStatus,
+    SignalX,
+    StandardReadable,
+    StrictEnum,
+    wait_for_value,
+)
 from ophyd_async.epics.core import (
     epics_signal_r,
     epics_signal_rw,
@@ -7,6 +19,12 @@ from ophyd_async.epics.core import (
     epics_signal_x,
 )
 
+from rtc6_fastcs.path_commands import CA_MAX_ARRAY_BYTES
+
+# Whole paths are written as single waveforms, which need more than the default CA
+# array size. This has to be set before the CA context is created.
+os.environ.setdefault("EPICS_CA_MAX_ARRAY_BYTES", str(CA_MAX_ARRAY_BYTES))
+
 
 class Rtc6ControlSettings(StandardReadable):
     def __init__(self, prefix: str = "CONTROL:", name: str = "") -> None:
@@ -15,6 +33,8 @@ class Rtc6ControlSettings(StandardReadable):
             # TODO: make a python Enum to match the c++ enum
             # so that we can limit this to the allowed values
             self.laser_mode = epics_signal_rw(str, prefix + "LaserMode")
+            # A whole ExecutionListConfig, see ExecutionListConfig.to_array
+            self.job_config = epics_signal_w(Array1D[np.float64], prefix + "JOBCONFIG")
             # This should be split up and made nicer if it is ever really used,
             # but currently is always just set to 0
             self.laser_control = epics_signal_rw(int, prefix + "LaserControl")
@@ -52,6 +72,8 @@ class Rtc6Info(StandardReadable):
             self.serial_number = epics_signal_r(int, prefix + "SerialNumber")
             self.ip_address = epics_signal_r(str, prefix + "IpAddress")
             self.is_acquired = epics_signal_r(str, prefix + "IsAcquired")
+            self.io_status = epics_signal_r(int, prefix + "IoStatus")
+            self.last_error = epics_signal_r(int, prefix + "LastError")
 
 
 class Rtc6List(StandardReadable):
@@ -83,24 +105,103 @@ class Rtc6List(StandardReadable):
                 self.y = epics_signal_w(int, prefix + "Y")
                 self.proc = epics_signal_x(prefix + "Proc")
 
+    class Path(StandardReadable):
+        def __init__(self, prefix: str = "PATH:", name: str = "") -> None:
+            """Whole-path upload in columns, see `add_path` in the bindings"""
+            super().__init__(name)
+            with self.add_children_as_readables():
+                self.cmd_type = epics_signal_w(Array1D[np.uint8], prefix + "TYPE")
+                self.x = epics_signal_w(Array1D[np.int32], prefix + "X")
+                self.y = epics_signal_w(Array1D[np.int32], prefix + "Y")
+                self.angle = epics_signal_w(Array1D[np.float64], prefix + "ANGLE")
+                self.proc = epics_signal_x(prefix + "Proc")
+                self.stream = epics_signal_x(prefix + "Stream")
+                self.chunk_size = epics_signal_rw(int, prefix + "ChunkSize")
+                self.passes = epics_signal_rw(int, prefix + "Passes")
+                self.commands_written = epics_signal_r(int, prefix + "CommandsWritten")
+                self.estimated_duration = epics_signal_r(
+                    float, prefix + "EstimatedDuration"
+                )
+
     def __init__(self, prefix: str = "LIST:", name: str = "") -> None:
         super().__init__(name)
         with self.add_children_as_readables():
             self.add_arc = self.AddArc(prefix + "ADDARC:")
             self.add_line = self.AddLine(prefix + "ADDLINE:")
             self.add_jump = self.AddJump(prefix + "ADDJUMP:")
+            self.path = self.Path(prefix + "PATH:")
             self.init_list = epics_signal_x(prefix + "InitList")
             self.end_list = epics_signal_x(prefix + "EndList")
             self.execute_list = epics_signal_x(prefix + "ExecuteList")
+            self.list_pointer_position = epics_signal_r(
+                int, prefix + "ListPointerPosition"
+            )
+            self.list_space = epics_signal_r(int, prefix + "ListSpace")
+            self.list_status = epics_signal_r(int, prefix + "ListStatus")
+            self.busy = epics_signal_r(bool, prefix + "Busy")
+            self.executions_started = epics_signal_r(int, prefix + "ExecutionsStarted")
+            self.executions_done = epics_signal_r(int, prefix + "ExecutionsDone")
+            self.executions_failed = epics_signal_r(int, prefix + "ExecutionsFailed")
+            self.last_failure = epics_signal_r(str, prefix + "LastFailure")
+            self.subroutines_loaded = epics_signal_rw(
+                bool, prefix + "SubroutinesLoaded"
+            )
+
+    async def start(self, command: SignalX) -> tuple[int, int]:
+        """Trigger a command which starts the list executing.
+
+        Returns the values executions_done and executions_failed will reach once it
+        has finished or failed. These are read before the command is sent, as the
+        IOC may not have acted on the command by the time the put returns.
+        """
+        done_at = await self.executions_started.get_value() + 1
+        failed_at = await self.executions_failed.get_value() + 1
+        await command.trigger()
+        return done_at, failed_at
+
+    async def wait_until_done(self, done_at: int, failed_at: int) -> None:
+        """Wait on monitors of executions_done and executions_failed, see start.
+
+        Raises if the IOC reports a failure first, e.g. because the path could not
+        be written, in which case executions_done would never be reached.
+        """
+        done = asyncio.ensure_future(
+            wait_for_value(
+                self.executions_done, lambda done: done >= done_at, timeout=None
+            )
+        )
+        failed = asyncio.ensure_future(
+            wait_for_value(
+                self.executions_failed, lambda failed: failed >= failed_at, timeout=None
+            )
+        )
+        try:
+            await asyncio.wait([done, failed], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            done.cancel()
+            failed.cancel()
+        if failed.done() and not failed.cancelled():
+            raise RuntimeError(
+                f"List execution failed: {await self.last_failure.get_value()}"
+            )
+
+
+class ListStart(StrictEnum):
+    """What kickoff does to start marking"""
+
+    EXECUTE = "Execute"  # end the loaded list and execute it
+    STREAM = "Stream"  # stream the staged path, see Rtc6List.Path
 
 
-class Rtc6Eth(StandardReadable, AsyncStageable, Triggerable):
+class Rtc6Eth(StandardReadable, Flyable, Preparable, AsyncStageable, Triggerable):
     def __init__(self, prefix: str = "RTC6ETH:", name: str = "") -> None:
         super().__init__(name)
         with self.add_children_as_readables():
             self.info = Rtc6Info(prefix + "INFO:")
             self.control_settings = Rtc6ControlSettings(prefix + "CONTROL:")
             self.list = Rtc6List(prefix + "LIST:")
+        self._list_start = ListStart.EXECUTE
+        self._done_at: tuple[int, int] | None = None
 
     @AsyncStatus.wrap
     async def stage(self):
@@ -110,16 +211,31 @@ class Rtc6Eth(StandardReadable, AsyncStageable, Triggerable):
         await self.list.init_list.trigger()
 
     @AsyncStatus.wrap
-    async def trigger(self):
-        """Set the end of the list at the current position and set it to execute"""
-        await self.list.end_list.trigger()
-        await self.list.execute_list.trigger()
+    async def prepare(self, value: ListStart):
+        """Choose how the next kickoff starts marking"""
+        self._list_start = ListStart(value)
+
+    @AsyncStatus.wrap
+    async def kickoff(self):
+        """Start marking, by default ending the list and setting it to execute"""
+        list_start, self._list_start = self._list_start, ListStart.EXECUTE
+        if list_start == ListStart.STREAM:
+            self._done_at = await self.list.start(self.list.path.stream)
+        else:
+            await self.list.end_list.trigger()
+            self._done_at = await self.list.start(self.list.execute_list)
 
     @AsyncStatus.wrap
     async def complete(self):
-        """Wait for the current list execution to complete"""
-        # Todo add a signal for this with get_status
-        # and change trigger to kickoff
+        """Wait for the list execution started by the last kickoff to complete"""
+        if self._done_at is not None:
+            await self.list.wait_until_done(*self._done_at)
+
+    @AsyncStatus.wrap
+    async def trigger(self):
+        """Set the end of the list, execute it and wait for it to finish"""
+        await self.kickoff()
+        await self.complete()
 
     @AsyncStatus.wrap
     async def unstage(self): ...
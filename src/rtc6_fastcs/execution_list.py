@@ -0,0 +1,196 @@
+import logging
+import re
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+from rtc6_fastcs.transform import CALIBRATION_FACTOR
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class ExecutionListConfig:
+    """Configuration extracted from vendor execution list header"""
+
+    calibration_factor: float = CALIBRATION_FACTOR
+    angle: float = 90.0
+    offset_xyz: tuple[int, int, int] = (0, 0, 0)
+    mark_speed: float = 271.68
+    jump_speed: float = 815.04
+    scanahead_autodelays: int = 1
+    scanahead_laser_shifts: tuple[int, int] = (0, 0)
+    scanahead_line_params: tuple[int, int, int] = (0, 100, 100)
+    firstpulse_killer: int = 6400
+    laser_pulses: tuple[int, int] = (3200, 640)
+    wobbel_mode: tuple[int, int, float, int] = (0, 0, 0.0, 0)
+    sky_writing_para: tuple[float, int, int, int] = (0.0, 0, 0, 0)
+
+    def to_array(self) -> np.ndarray:
+        """The settings applied to the card, flattened in field order.
+
+        This is the layout of CONTROL:JOBCONFIG, which applies them all in one put.
+        """
+        return np.concatenate(
+            [np.atleast_1d(getattr(self, name)) for name in LIST_CONFIG_FIELDS],
+            dtype=np.float64,
+        )
+
+    @classmethod
+    def from_array(cls, values: np.ndarray) -> "ExecutionListConfig":
+        """The inverse of to_array, with the calibration factor left as default"""
+        values = np.asarray(values, dtype=np.float64)
+        config = cls()
+        expected = config.to_array().size
+        if values.shape != (expected,):
+            raise ValueError(
+                f"Expected {expected} job config values, got {values.shape}"
+            )
+        position = 0
+        for name in LIST_CONFIG_FIELDS:
+            # Each value keeps the type of its default
+            default = getattr(config, name)
+            if isinstance(default, tuple):
+                parts = values[position : position + len(default)]
+                value = tuple(type(d)(v) for d, v in zip(default, parts, strict=True))
+                position += len(default)
+            else:
+                value = type(default)(values[position])
+                position += 1
+            setattr(config, name, value)
+        return config
+
+
+# The fields applied to the card, the calibration factor is only used for the path
+LIST_CONFIG_FIELDS = tuple(
+    f.name for f in fields(ExecutionListConfig) if f.name != "calibration_factor"
+)
+
+
+# One vendor call per line, e.g. "n_mark_abs(2, 516, -683);". The first argument
+# is always the card number, which is dropped.
+_CALL = re.compile(r"^\s*n_(\w+)\(\s*\d+\s*,?([^)]*)\)", re.MULTILINE)
+
+# Header commands, as (config field, converter for the arguments after the card)
+_CONFIG_COMMANDS: dict[str, tuple[str, Callable[[list[str]], Any]]] = {
+    "set_angle_list": ("angle", lambda a: float(a[1])),
+    "set_offset_xyz_list": ("offset_xyz", lambda a: (int(a[1]), int(a[2]), int(a[3]))),
+    "set_mark_speed": ("mark_speed", lambda a: float(a[0])),
+    "set_jump_speed": ("jump_speed", lambda a: float(a[0])),
+    "activate_scanahead_autodelays_list": ("scanahead_autodelays", lambda a: int(a[0])),
+    "set_scanahead_laser_shifts_list": (
+        "scanahead_laser_shifts",
+        lambda a: (int(a[0]), int(a[1])),
+    ),
+    "set_scanahead_line_params_list": (
+        "scanahead_line_params",
+        lambda a: (int(a[0]), int(a[1]), int(a[2])),
+    ),
+    "set_firstpulse_killer_list": ("firstpulse_killer", lambda a: int(a[0])),
+    "set_laser_pulses": ("laser_pulses", lambda a: (int(a[0]), int(a[1]))),
+    "set_wobbel_mode": (
+        "wobbel_mode",
+        lambda a: (int(a[0]), int(a[1]), float(a[2]), int(a[3])),
+    ),
+    "set_sky_writing_para_list": (
+        "sky_writing_para",
+        lambda a: (float(a[0]), int(a[1]), int(a[2]), int(a[3])),
+    ),
+}
+
+# List commands, as (command type, converter to the x, y and angle columns).
+# See CommandType for what each column means for the non-geometry commands.
+_PATH_COMMANDS: dict[
+    str, tuple[CommandType, Callable[[list[str]], tuple[int, int, float]]]
+] = {
+    "jump_abs": (CommandType.JUMP, lambda a: (int(a[0]), int(a[1]), 0.0)),
+    "mark_abs": (CommandType.LINE, lambda a: (int(a[0]), int(a[1]), 0.0)),
+    "arc_abs": (CommandType.ARC, lambda a: (int(a[0]), int(a[1]), float(a[2]))),
+    "set_mark_speed": (CommandType.SET_MARK_SPEED, lambda a: (0, 0, float(a[0]))),
+    "set_jump_speed": (CommandType.SET_JUMP_SPEED, lambda a: (0, 0, float(a[0]))),
+    "set_laser_power": (
+        CommandType.SET_LASER_POWER,
+        lambda a: (int(a[0]), int(a[1]), 0.0),
+    ),
+    "set_trigger": (
+        CommandType.SET_TRIGGER,
+        lambda a: (int(a[0]), int(a[1]), float(a[2])),
+    ),
+    "sub_call_repeat": (
+        CommandType.SUB_CALL_REPEAT,
+        lambda a: (int(a[0]), int(a[1]), 0.0),
+    ),
+    "list_nop": (CommandType.LIST_NOP, lambda a: (0, 0, 0.0)),
+    "save_and_restart_timer": (
+        CommandType.SAVE_AND_RESTART_TIMER,
+        lambda a: (0, 0, 0.0),
+    ),
+}
+
+# The controller ends the list itself
+_SKIPPED_COMMANDS = {"set_end_of_list"}
+
+
+def parse_execution_list(
+    filepath: str | Path,
+) -> tuple[ExecutionListConfig, PathArrays]:
+    """
+    Parse a vendor execution list file and extract config and path commands.
+
+    The file is tokenized in a single pass, dispatching on the function name.
+    Header settings seen before the first jump, mark or arc go into the config,
+    and any later speed changes stay in the path at the point they were made.
+    List commands (laser power, triggers, subroutine calls, nops and timers) are
+    kept in the path in order. Subroutine calls refer to subroutines which must
+    already be stored in the protected list area, and the controller refuses them
+    until it is told they are. Anything else is logged and skipped.
+
+    Args:
+        filepath: Path to the RTCExecutionlist_*.txt file
+
+    Returns:
+        Tuple of (config, path commands)
+    """
+    config = ExecutionListConfig()
+    cmd_types: list[int] = []
+    xs: list[int] = []
+    ys: list[int] = []
+    angles: list[float] = []
+    unsupported: Counter[str] = Counter()
+    in_path = False
+
+    with open(filepath) as f:
+        content = f.read()
+
+    cal_match = re.search(r"Calibration Factor:\s*([\d.]+)", content)
+    if cal_match:
+        config.calibration_factor = float(cal_match.group(1))
+
+    for name, arguments in _CALL.findall(content):
+        args = arguments.split(",")
+        if not in_path and name in _CONFIG_COMMANDS:
+            field, convert = _CONFIG_COMMANDS[name]
+            setattr(config, field, convert(args))
+        elif name in _PATH_COMMANDS:
+            cmd_type, convert = _PATH_COMMANDS[name]
+            x, y, angle = convert(args)
+            cmd_types.append(cmd_type)
+            xs.append(x)
+            ys.append(y)
+            angles.append(angle)
+            in_path = in_path or cmd_type <= CommandType.ARC
+        elif name not in _SKIPPED_COMMANDS:
+            unsupported[name] += 1
+
+    if unsupported:
+        LOGGER.warning(
+            f"Skipped unsupported commands in {filepath}: {dict(unsupported)}"
+        )
+    return config, PathArrays(
+        np.array(cmd_types), np.array(xs), np.array(ys), np.array(angles)
+    )
@@ -0,0 +1,135 @@
+"""Checking that a path stays inside the field before it is sent to the card.
+
+The card only finds a position it can't reach once it gets to it, part way through
+the upload or the cut, so whole paths are checked here first. Every command is
+checked at once, from the box around where it goes: its end point, or for an arc
+everything it sweeps through.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+from rtc6_fastcs.path_optimisation import end_points
+
+# The RTC6 field is 20 bits each way
+FIELD_LIMIT = (1 << 19) - 1
+
+# Directions of the points on a circle furthest along each axis
+_EXTREMES = np.array([[1, 0], [0, 1], [-1, 0], [0, -1]])
+_EXTREME_ANGLES = np.array([0, 90, 180, 270])
+
+
+@dataclass(frozen=True)
+class FieldBounds:
+    """A region the head may go anywhere in, in bits, including the edges"""
+
+    x_min: int = -FIELD_LIMIT
+    x_max: int = FIELD_LIMIT
+    y_min: int = -FIELD_LIMIT
+    y_max: int = FIELD_LIMIT
+
+    def __post_init__(self):
+        if self.x_min > self.x_max or self.y_min > self.y_max:
+            raise ValueError(f"Bounds are empty: {self}")
+
+    def intersection(self, other: "FieldBounds") -> "FieldBounds":
+        return FieldBounds(
+            max(self.x_min, other.x_min),
+            min(self.x_max, other.x_max),
+            max(self.y_min, other.y_min),
+            min(self.y_max, other.y_max),
+        )
+
+
+FIELD = FieldBounds()
+
+
+def command_extents(
+    commands: PathArrays, start: tuple[float, float] = (0, 0)
+) -> tuple[np.ndarray, np.ndarray]:
+    """The lower and upper corners of the box each command goes to, as Nx2 arrays.
+
+    Lines are straight, so once their start is in a rectangle they stay in it if
+    their end is. Arcs can bulge out past both ends, so their box also takes in
+    the sides of the circle they sweep through.
+    """
+    ends = end_points(commands, start)
+    lower, upper = ends.copy(), ends.copy()
+    arcs = np.flatnonzero(commands.cmd_type == CommandType.ARC)
+    if arcs.size:
+        before = np.vstack(([start], ends[:-1]))[arcs]
+        centre = np.column_stack((commands.x, commands.y))[arcs].astype(np.float64)
+        offset = before - centre
+        radius = np.hypot(*offset.T)
+        start_angle = np.degrees(np.arctan2(offset[:, 1], offset[:, 0]))[:, None]
+        sweep = commands.angle[arcs][:, None]
+        # How far round from the start each side is, going the way the arc does
+        travel = np.where(
+            sweep >= 0,
+            (_EXTREME_ANGLES - start_angle) % 360,
+            (start_angle - _EXTREME_ANGLES) % 360,
+        )
+        extremes = centre[:, None] + radius[:, None, None] * _EXTREMES
+        # Sides the arc doesn't reach are replaced with its end, which is in anyway
+        reached = np.where(
+            (travel <= np.abs(sweep))[..., None], extremes, ends[arcs, None]
+        )
+        lower[arcs] = np.minimum(before, reached.min(axis=1))
+        upper[arcs] = np.maximum(before, reached.max(axis=1))
+    return lower, upper
+
+
+def out_of_bounds(
+    commands: PathArrays,
+    bounds: FieldBounds = FIELD,
+    start: tuple[float, float] = (0, 0),
+) -> np.ndarray:
+    """Mask of the commands which go outside bounds"""
+    lower, upper = command_extents(commands, start)
+    return (
+        (lower[:, 0] < bounds.x_min)
+        | (upper[:, 0] > bounds.x_max)
+        | (lower[:, 1] < bounds.y_min)
+        | (upper[:, 1] > bounds.y_max)
+    )
+
+
+def check_bounds(
+    commands: PathArrays,
+    bounds: FieldBounds = FIELD,
+    start: tuple[float, float] = (0, 0),
+) -> None:
+    """Raise a ValueError if any command goes outside bounds"""
+    outside = np.flatnonzero(out_of_bounds(commands, bounds, start))
+    if outside.size:
+        first = outside[0]
+        raise ValueError(
+            f"{outside.size} path commands go outside {bounds}, the first is "
+            f"{CommandType(commands.cmd_type[first]).name} {first} to "
+            f"({commands.x[first]}, {commands.y[first]})"
+        )
+
+
+def clip_to_bounds(
+    commands: PathArrays,
+    bounds: FieldBounds = FIELD,
+    start: tuple[float, float] = (0, 0),
+) -> PathArrays:
+    """Move the jumps and lines which leave bounds to the nearest point in them.
+
+    Arcs can't be clipped without changing their shape, so a ValueError is raised
+    if any still go outside.
+    """
+    moves = (commands.cmd_type == CommandType.JUMP) | (
+        commands.cmd_type == CommandType.LINE
+    )
+    clipped = PathArrays(
+        commands.cmd_type,
+        np.where(moves, np.clip(commands.x, bounds.x_min, bounds.x_max), commands.x),
+        np.where(moves, np.clip(commands.y, bounds.y_min, bounds.y_max), commands.y),
+        commands.angle,
+    )
+    check_bounds(clipped, bounds, start)
+    return clipped
@@ -0,0 +1,63 @@
+import logging
+import os
+from hashlib import sha256
+from pathlib import Path
+
+from rtc6_fastcs.execution_list import ExecutionListConfig, parse_execution_list
+from rtc6_fastcs.job_file import JOB_SUFFIX, read_job, write_job
+from rtc6_fastcs.path_commands import PathArrays
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_DIR_ENV = "RTC6_FASTCS_JOB_CACHE"
+# Bump this whenever the parser output or the cache layout changes, so that entries
+# written by an older version are not picked up
+CACHE_VERSION = 4
+
+
+def default_cache_dir() -> Path:
+    if cache_dir := os.environ.get(CACHE_DIR_ENV):
+        return Path(cache_dir)
+    xdg_cache = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(xdg_cache) / "rtc6_fastcs" / "jobs"
+
+
+def load_execution_list(
+    filepath: str | Path, cache_dir: str | Path | None = None
+) -> tuple[ExecutionListConfig, PathArrays]:
+    """Load a vendor execution list, only parsing it if it is not already cached.
+
+    Entries are keyed by a hash of the file content, and any entry made from an
+    earlier version of the same file is removed when a new one is written. They are
+    job files, so a cached job is mapped rather than read, see job_file.
+
+    Args:
+        filepath: Path to the RTCExecutionlist_*.txt file
+        cache_dir: Where to keep compiled jobs, see default_cache_dir
+
+    Returns:
+        Tuple of (config, path commands)
+    """
+    filepath = Path(filepath).resolve()
+    cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+    source_key = sha256(str(filepath).encode()).hexdigest()[:16]
+    content_key = sha256(
+        CACHE_VERSION.to_bytes(4, "little") + filepath.read_bytes()
+    ).hexdigest()
+    entry = cache_dir / f"{filepath.stem}-{source_key}-{content_key}{JOB_SUFFIX}"
+
+    if entry.exists():
+        try:
+            return read_job(entry)
+        except (OSError, ValueError, KeyError) as e:
+            LOGGER.warning(f"Ignoring unreadable job cache entry {entry}: {e}")
+
+    config, commands = parse_execution_list(filepath)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale in cache_dir.glob(f"{filepath.stem}-{source_key}-*{JOB_SUFFIX}"):
+            stale.unlink(missing_ok=True)
+        write_job(entry, config, commands)
+    except OSError as e:
+        LOGGER.warning(f"Could not write job cache entry {entry}: {e}")
+    return config, commands
@@ -0,0 +1,129 @@
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+from rtc6_fastcs.path_optimisation import end_points
+
+# Scanner delays and list_nop are in ticks of the 10us clock, manual p150
+CLOCK_PERIOD = 10e-6
+# Laser delays are in 1/64 us, manual p136
+LASER_DELAY_PERIOD = 1e-6 / 64
+
+
+@dataclass
+class TimingSettings:
+    """The settings on the card which decide how long a path takes to mark.
+
+    The laser on delay isn't one, as the mirrors start moving without waiting for
+    the laser to come on.
+    """
+
+    mark_speed: float = 250.0  # bits/ms
+    jump_speed: float = 1000.0  # bits/ms
+    jump_delay: int = 0  # 10us
+    mark_delay: int = 0  # 10us
+    polygon_delay: int = 0  # 10us
+    laser_off_delay: int = 0  # 1/64 us
+
+
+def _end_of_mark(settings: TimingSettings) -> float:
+    return max(
+        settings.mark_delay * CLOCK_PERIOD,
+        settings.laser_off_delay * LASER_DELAY_PERIOD,
+    )
+
+
+def command_durations(
+    commands: PathArrays,
+    settings: TimingSettings,
+    start: tuple[float, float] = (0, 0),
+) -> np.ndarray:
+    """Time in seconds the card spends on each command of the path.
+
+    Moves take their length over the speed, with arcs the length along the arc.
+    Each jump is followed by the jump delay, each mark by the polygon delay if
+    another mark follows it and otherwise by the mark delay, or the laser off
+    delay if that is longer as the next move waits for the laser to be off.
+    Speed changes in the path apply to the moves after them. Subroutine calls
+    can't be timed from here, so take no time.
+    """
+    if not len(commands):
+        return np.zeros(0)
+    cmd = commands.cmd_type
+    index = np.arange(len(commands))
+    ends = end_points(commands, start)
+    before = np.vstack(([start], ends[:-1]))
+    arcs = cmd == CommandType.ARC
+    distance = np.hypot(*(ends - before).T)
+    radius = np.hypot(*(before - np.column_stack((commands.x, commands.y))).T)
+    distance[arcs] = radius[arcs] * np.radians(np.abs(commands.angle[arcs]))
+
+    def speed(code: int, initial: float) -> np.ndarray:
+        last_set = np.maximum.accumulate(np.where(cmd == code, index, -1))
+        speeds = np.where(
+            last_set >= 0, commands.angle[np.maximum(last_set, 0)], initial
+        )
+        return np.maximum(speeds, 1e-9)
+
+    jumps = cmd == CommandType.JUMP
+    marks = (cmd == CommandType.LINE) | arcs
+    move_ms = np.select(
+        [jumps, marks],
+        [
+            distance / speed(CommandType.SET_JUMP_SPEED, settings.jump_speed),
+            distance / speed(CommandType.SET_MARK_SPEED, settings.mark_speed),
+        ],
+        0.0,
+    )
+    end_of_mark = _end_of_mark(settings)
+    next_is_mark = np.append(marks[1:], False)
+    delay = np.select(
+        [jumps, marks & next_is_mark, marks, cmd == CommandType.LIST_NOP],
+        [
+            settings.jump_delay * CLOCK_PERIOD,
+            settings.polygon_delay * CLOCK_PERIOD,
+            end_of_mark,
+            CLOCK_PERIOD,
+        ],
+        0.0,
+    )
+    return move_ms / 1000 + delay
+
+
+def estimate_duration(
+    commands: PathArrays,
+    settings: TimingSettings,
+    passes: int = 1,
+    start: tuple[float, float] = (0, 0),
+) -> float:
+    """Time in seconds to mark the path the given number of passes.
+
+    See command_durations. Each pass after the first starts from where the last
+    one finished, at the speeds it finished at. This is the same as estimating
+    the path tiled passes times, without making the tiled path.
+    """
+    if not len(commands):
+        return 0.0
+    first = float(command_durations(commands, settings, start).sum())
+    if passes == 1:
+        return first
+    # Speeds set in the path are still set for the passes after
+    speeds = {}
+    for code, name in (
+        (CommandType.SET_MARK_SPEED, "mark_speed"),
+        (CommandType.SET_JUMP_SPEED, "jump_speed"),
+    ):
+        if np.any(commands.cmd_type == code):
+            speeds[name] = float(commands.angle[commands.cmd_type == code][-1])
+    finish = end_points(commands, start)[-1]
+    repeat = replace(settings, **speeds)
+    per_pass = float(command_durations(commands, repeat, (finish[0], finish[1])).sum())
+    marks = (commands.cmd_type == CommandType.LINE) | (
+        commands.cmd_type == CommandType.ARC
+    )
+    if marks[0] and marks[-1]:
+        # Each pass runs on into the next as one polygon, so only the last one
+        # ends with the mark delay
+        per_pass -= _end_of_mark(settings) - settings.polygon_delay * CLOCK_PERIOD
+    return first + (passes - 1) * per_pass
@@ -0,0 +1,121 @@
+"""A binary job file, which can be mapped into memory instead of being read.
+
+A .rtcjob file holds the config and the path arrays of a job, laid out as:
+
+- MAGIC, then the length of the header as a little endian uint32
+- the header, as JSON: the config, the number of commands, and the dtype and
+  offset of each path array from the first aligned byte after the header
+- each path array in turn, starting on a multiple of COLUMN_ALIGNMENT bytes into
+  the file
+
+Loading one maps the arrays from the file, so it takes the same time however many
+commands the job has, and never builds a PathCommand for each of them.
+"""
+
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+
+from rtc6_fastcs.execution_list import ExecutionListConfig, parse_execution_list
+from rtc6_fastcs.path_commands import PathArrays
+
+JOB_SUFFIX = ".rtcjob"
+# Bump the last byte whenever the layout changes
+MAGIC = b"RTCJOB\x00\x01"
+COLUMN_ALIGNMENT = 64
+# Fixed byte order, so files can be moved between machines
+COLUMNS = {"cmd_type": "|u1", "x": "<i4", "y": "<i4", "angle": "<f8"}
+_HEADER_LENGTH = np.dtype("<u4")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // COLUMN_ALIGNMENT) * COLUMN_ALIGNMENT
+
+
+def _data_start(header_length: int) -> int:
+    return _align(len(MAGIC) + _HEADER_LENGTH.itemsize + header_length)
+
+
+def write_job(
+    filepath: str | Path, config: ExecutionListConfig, commands: PathArrays
+) -> None:
+    """Write a job to a .rtcjob file, replacing any file already there"""
+    filepath = Path(filepath)
+    length = len(commands)
+    columns, offset = {}, 0
+    for name, dtype in COLUMNS.items():
+        columns[name] = {"dtype": dtype, "offset": offset}
+        offset = _align(offset + length * np.dtype(dtype).itemsize)
+    header = {"config": asdict(config), "length": length, "columns": columns}
+    encoded = json.dumps(header).encode()
+    data_start = _data_start(len(encoded))
+
+    # Write then move, so a reader never sees a partially written file
+    partial = filepath.with_suffix(f".{os.getpid()}.tmp")
+    with open(partial, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array(len(encoded), dtype=_HEADER_LENGTH).tobytes())
+        f.write(encoded)
+        for name, column in columns.items():
+            f.seek(data_start + column["offset"])
+            f.write(np.ascontiguousarray(getattr(commands, name), column["dtype"]))
+        # Pad to the end of the last column, so it can always be mapped
+        f.truncate(data_start + offset)
+    os.replace(partial, filepath)
+
+
+def read_job(filepath: str | Path) -> tuple[ExecutionListConfig, PathArrays]:
+    """Load a .rtcjob file.
+
+    The path arrays are read only views of the file, which is only read from disk
+    as they are used.
+
+    Raises:
+        ValueError: If the file is not a job file, or is from another version
+    """
+    with open(filepath, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{filepath} is not a version {MAGIC[-1]} job file")
+        (header_length,) = np.frombuffer(
+            f.read(_HEADER_LENGTH.itemsize), _HEADER_LENGTH
+        )
+        header = json.loads(f.read(int(header_length)))
+    length, data_start = header["length"], _data_start(int(header_length))
+    arrays = {
+        name: (
+            np.memmap(
+                filepath,
+                column["dtype"],
+                "r",
+                data_start + column["offset"],
+                (length,),
+            )
+            if length
+            else np.empty(0, column["dtype"])
+        )
+        for name, column in header["columns"].items()
+    }
+    config = ExecutionListConfig()
+    for name, value in header["config"].items():
+        # JSON has no tuples
+        setattr(config, name, tuple(value) if isinstance(value, list) else value)
+    return config, PathArrays(**arrays)
+
+
+def convert_execution_list(
+    source: str | Path, destination: str | Path | None = None
+) -> Path:
+    """Convert a vendor execution list to a .rtcjob file, returning where it went.
+
+    By default it goes next to the source, with the .rtcjob suffix.
+    """
+    source = Path(source)
+    destination = (
+        source.with_suffix(JOB_SUFFIX) if destination is None else Path(destination)
+    )
+    write_job(destination, *parse_execution_list(source))
+    return destination
@@ -0,0 +1,105 @@
+from collections.abc import Iterable
+from dataclasses import dataclass
+from enum import IntEnum
+
+import numpy as np
+
+# Whole paths are sent over CA as single waveforms, one per column
+MAX_PATH_LENGTH = 1_000_000
+# Large enough for the biggest (float64) column plus headroom for CA overhead.
+# Needs to be set in the environment of both the IOC and the client before their
+# CA contexts are created.
+CA_MAX_ARRAY_BYTES = MAX_PATH_LENGTH * 8 + 16384
+
+
+class CommandType(IntEnum):
+    """Path command codes, matching PathCommandType in the bindings.
+
+    Geometry commands come first. The rest are list commands which reuse the
+    columns for their arguments:
+
+    - SET_MARK_SPEED, SET_JUMP_SPEED: angle is the speed in bits/ms
+    - SET_LASER_POWER: x is the port, y is the power
+    - SET_TRIGGER: x is the period, y and angle are the two signals
+    - SUB_CALL_REPEAT: x is the subroutine index, y is the repeat count
+    - LIST_NOP, SAVE_AND_RESTART_TIMER: no arguments
+    """
+
+    JUMP = 0
+    LINE = 1
+    ARC = 2
+    SET_MARK_SPEED = 3
+    SET_JUMP_SPEED = 4
+    SET_LASER_POWER = 5
+    SET_TRIGGER = 6
+    SUB_CALL_REPEAT = 7
+    LIST_NOP = 8
+    SAVE_AND_RESTART_TIMER = 9
+
+
+@dataclass
+class PathCommand:
+    """A single path command, usually a jump, line or arc"""
+
+    cmd_type: str  # "jump", "line", "arc", or another CommandType name
+    x: int
+    y: int
+    angle: float | None = None  # Only for arcs
+
+
+@dataclass
+class PathArrays:
+    """Path commands in columns, in the layout taken by add_path in the bindings"""
+
+    cmd_type: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    angle: np.ndarray
+
+    def __post_init__(self):
+        self.cmd_type = np.asarray(self.cmd_type, dtype=np.uint8)
+        self.x = np.asarray(self.x, dtype=np.int32)
+        self.y = np.asarray(self.y, dtype=np.int32)
+        self.angle = np.asarray(self.angle, dtype=np.float64)
+        lengths = {len(self.cmd_type), len(self.x), len(self.y), len(self.angle)}
+        if len(lengths) != 1:
+            raise ValueError(
+                "Path arrays must all be the same length, got "
+                f"cmd_type: {len(self.cmd_type)}, x: {len(self.x)}, "
+                f"y: {len(self.y)}, angle: {len(self.angle)}"
+            )
+
+    def __len__(self) -> int:
+        return len(self.cmd_type)
+
+    def __getitem__(self, index: slice) -> "PathArrays":
+        return PathArrays(
+            self.cmd_type[index], self.x[index], self.y[index], self.angle[index]
+        )
+
+    def is_geometry(self) -> np.ndarray:
+        """Mask of the jumps, lines and arcs, whose x and y are positions"""
+        return self.cmd_type <= CommandType.ARC
+
+    def tile(self, repeats: int) -> "PathArrays":
+        """The whole path repeated end to end"""
+        return PathArrays(
+            np.tile(self.cmd_type, repeats),
+            np.tile(self.x, repeats),
+            np.tile(self.y, repeats),
+            np.tile(self.angle, repeats),
+        )
+
+    @classmethod
+    def empty(cls) -> "PathArrays":
+        return cls(np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+
+    @classmethod
+    def from_commands(cls, commands: Iterable[PathCommand]) -> "PathArrays":
+        commands = list(commands)
+        return cls(
+            np.array([CommandType[cmd.cmd_type.upper()] for cmd in commands]),
+            np.array([cmd.x for cmd in commands]),
+            np.array([cmd.y for cmd in commands]),
+            np.array([cmd.angle or 0.0 for cmd in commands]),
+        )
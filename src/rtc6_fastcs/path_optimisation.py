@@ -0,0 +1,514 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+
+# 2-opt is quadratic in the number of chains for each pass, so longer runs of
+# chains are only put in nearest neighbour order
+TWO_OPT_MAX_CHAINS = 2000
+TWO_OPT_MAX_PASSES = 20
+# Fewest lines worth replacing with an arc, and the largest arc radius in bits.
+# Flatter runs are left as lines, for simplify_path to merge.
+ARC_FIT_MIN_LINES = 3
+ARC_FIT_MAX_RADIUS = 1 << 20
+_FIELDS = ("cmd_type", "x", "y", "angle")
+
+
+@dataclass
+class JumpReport:
+    """Jump distances in bits before and after reordering, and the time saved"""
+
+    chains: int  # reorderable mark chains
+    jump_distance_before: float
+    jump_distance_after: float
+    time_saved: float  # seconds, at the jump speed given
+
+    def __str__(self) -> str:
+        return (
+            f"{self.chains} chains, jump distance {self.jump_distance_before:.0f} "
+            f"-> {self.jump_distance_after:.0f} bits, "
+            f"saving {self.time_saved * 1e3:.3f} ms"
+        )
+
+
+def end_points(commands: PathArrays, start: tuple[float, float] = (0, 0)):
+    """Position of the head after each command, as an Nx2 float array.
+
+    Arcs are about (x, y) through angle degrees, so end where the position before
+    them is rotated about that centre. Commands which aren't geometry don't move.
+    """
+    index = np.arange(len(commands))
+    # Index of the last geometry command up to each command, or -1 for the start
+    last = np.maximum.accumulate(np.where(commands.is_geometry(), index, -1))
+    ends = np.vstack(([start], np.column_stack((commands.x, commands.y)))).astype(
+        np.float64
+    )
+    for i in np.flatnonzero(commands.cmd_type == CommandType.ARC):
+        # Each arc starts where the one before it may have ended, so these are
+        # done in order
+        before = ends[last[i - 1] + 1] if i else ends[0]
+        theta = np.radians(commands.angle[i])
+        dx, dy = before - ends[i + 1]
+        ends[i + 1] += (
+            dx * np.cos(theta) - dy * np.sin(theta),
+            dx * np.sin(theta) + dy * np.cos(theta),
+        )
+    return ends[last + 1]
+
+
+def jump_distance(commands: PathArrays, start: tuple[float, float] = (0, 0)) -> float:
+    """Total length of the jumps in a path, starting from start"""
+    ends = end_points(commands, start)
+    before = np.vstack(([start], ends[:-1]))
+    jumps = commands.cmd_type == CommandType.JUMP
+    return float(np.hypot(*(ends[jumps] - before[jumps]).T).sum())
+
+
+def optimise_jump_order(
+    commands: PathArrays,
+    reverse: bool = True,
+    start: tuple[float, float] = (0, 0),
+    jump_speed: float = 815.04,
+) -> tuple[PathArrays, JumpReport]:
+    """Reorder the mark chains in a path to shorten the jumps between them.
+
+    A chain starts with a jump and runs up to the next one. Chains made of only
+    lines and arcs can be marked in any order, but any other command changes the
+    state for the chains after it, so a chain holding one stays where it is and
+    only the chains between those are reordered. Chains with nothing to mark are
+    kept in place too, as they are usually a move to a park position.
+
+    Each run of chains is put in nearest neighbour order from where the head is,
+    then improved with 2-opt, and left as it was if that doesn't shorten its
+    jumps. If reverse is set, chains may also be marked from their far end, with
+    arcs turning the other way. Arc end points are rounded to the nearest bit where
+    a reversed line has to end on one.
+
+    jump_speed is in bits/ms, as for set_jump_speed, and is only used for the
+    time saved in the report. start is where the head is before the path.
+    """
+    ends = end_points(commands, start)
+    jump_at = np.flatnonzero(commands.cmd_type == CommandType.JUMP)
+    bounds = np.append(jump_at, len(commands))
+    output = [commands[: bounds[0]]] if len(jump_at) else [commands]
+    position = ends[jump_at[0] - 1] if len(jump_at) and jump_at[0] else start
+    run: list[tuple[int, int]] = []
+    chains = 0
+
+    def flush(end: np.ndarray | None) -> None:
+        """Add the run of chains so far, ordered to finish near end"""
+        nonlocal chains
+        if run:
+            chains += len(run)
+            for begin, stop, flip in _order_chains(run, ends, position, end, reverse):
+                output.append(
+                    _reversed_chain(commands, ends, begin, stop)
+                    if flip
+                    else commands[begin:stop]
+                )
+            run.clear()
+
+    for begin, stop in zip(bounds[:-1], bounds[1:], strict=True):
+        chain_types = commands.cmd_type[begin:stop]
+        if np.all(chain_types <= CommandType.ARC) and np.any(chain_types[1:]):
+            run.append((begin, stop))
+            continue
+        flush(ends[begin])
+        output.append(commands[begin:stop])
+        position = ends[stop - 1]
+    flush(None)
+
+    optimised = PathArrays(
+        *(np.concatenate([getattr(p, f) for p in output]) for f in _FIELDS)
+    )
+    before = jump_distance(commands, start)
+    after = jump_distance(optimised, start)
+    report = JumpReport(chains, before, after, (before - after) / jump_speed / 1000)
+    return optimised, report
+
+
+def _reversed_chain(
+    commands: PathArrays, ends: np.ndarray, begin: int, stop: int
+) -> PathArrays:
+    """The chain marked from its last point back to its jump"""
+    chain = commands[begin + 1 : stop]
+    # Each command now moves to where it used to start from, and arcs turn back
+    cmd_type = chain.cmd_type[::-1]
+    is_arc = cmd_type == CommandType.ARC
+    targets = np.rint(ends[begin : stop - 1][::-1])
+    last = np.rint(ends[stop - 1])
+    return PathArrays(
+        np.append(CommandType.JUMP, cmd_type),
+        np.append(last[0], np.where(is_arc, chain.x[::-1], targets[:, 0])),
+        np.append(last[1], np.where(is_arc, chain.y[::-1], targets[:, 1])),
+        np.append(0.0, np.where(is_arc, -chain.angle[::-1], 0.0)),
+    )
+
+
+def _distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.hypot(*(np.asarray(a) - np.asarray(b)).T)
+
+
+def _order_chains(
+    run: list[tuple[int, int]],
+    ends: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray | None,
+    reverse: bool,
+) -> list[tuple[int, int, bool]]:
+    """Order a run of chains between start and the fixed point after them, if any.
+
+    Returns (begin, stop, reversed) for each chain in the order to mark them.
+    """
+    begins = np.array([begin for begin, _ in run])
+    stops = np.array([stop for _, stop in run])
+    # Where each chain is entered and left when marked forwards
+    entry, exit_ = ends[begins], ends[stops - 1]
+
+    # Nearest neighbour
+    order: list[int] = []
+    flipped: list[bool] = []
+    remaining = np.ones(len(run), dtype=bool)
+    position = start
+    for _ in range(len(run)):
+        forwards = np.where(remaining, _distance(entry, position), np.inf)
+        backwards = np.where(remaining, _distance(exit_, position), np.inf)
+        nearest = int(np.argmin(forwards))
+        flip = reverse and backwards.min() < forwards[nearest]
+        if flip:
+            nearest = int(np.argmin(backwards))
+        order.append(nearest)
+        flipped.append(flip)
+        remaining[nearest] = False
+        position = entry[nearest] if flip else exit_[nearest]
+
+    order_array, flipped_array = np.array(order), np.array(flipped)
+    if len(run) <= TWO_OPT_MAX_CHAINS:
+        order_array, flipped_array = _two_opt(
+            entry, exit_, order_array, flipped_array, start, end, reverse
+        )
+    # Neither of those is sure to beat the order the chains came in
+    original = np.arange(len(run)), np.zeros(len(run), dtype=bool)
+    if _jump_length(entry, exit_, order_array, flipped_array, start, end) >= (
+        _jump_length(entry, exit_, *original, start, end)
+    ):
+        order_array, flipped_array = original
+    return [
+        (int(begins[i]), int(stops[i]), bool(flip))
+        for i, flip in zip(order_array, flipped_array, strict=True)
+    ]
+
+
+def _jump_length(
+    entry: np.ndarray,
+    exit_: np.ndarray,
+    order: np.ndarray,
+    flipped: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray | None,
+) -> float:
+    """Total length of the jumps into, between and out of chains in order"""
+    ins = np.where(flipped[:, None], exit_[order], entry[order])
+    outs = np.where(flipped[:, None], entry[order], exit_[order])
+    jumps_from = np.vstack(([start], outs))
+    jumps_to = ins if end is None else np.vstack((ins, [end]))
+    return float(_distance(jumps_from[: len(jumps_to)], jumps_to).sum())
+
+
+def _two_opt(
+    entry: np.ndarray,
+    exit_: np.ndarray,
+    order: np.ndarray,
+    flipped: np.ndarray,
+    start: np.ndarray,
+    end: np.ndarray | None,
+    reverse: bool,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Reverse the stretches of the order which shorten the jumps the most.
+
+    Reversing a stretch also reverses each chain in it if reverse is set, which
+    leaves the jumps inside it the same length. Otherwise those jumps change, and
+    the difference is taken from cumulative sums of the jumps either way round.
+    """
+    n = len(order)
+    for _ in range(TWO_OPT_MAX_PASSES):
+        improved = False
+        for k in range(n):
+            ins = np.where(flipped[:, None], exit_[order], entry[order])
+            outs = np.where(flipped[:, None], entry[order], exit_[order])
+            before = start if k == 0 else outs[k - 1]
+            m = np.arange(k, n)
+            # The jump from the end of chain m to whatever follows it
+            following = ins[np.minimum(m + 1, n - 1)]
+            if end is not None:
+                following[m == n - 1] = end
+            has_following = (m < n - 1) | (end is not None)
+            if reverse:
+                first, last = outs[m], ins[k]
+                inside = np.zeros(len(m))
+            else:
+                first, last = ins[m], outs[[k]]
+                forwards = np.append(0, np.cumsum(_distance(outs[:-1], ins[1:])))
+                backwards = np.append(0, np.cumsum(_distance(outs[1:], ins[:-1])))
+                inside = (backwards[m] - backwards[k]) - (forwards[m] - forwards[k])
+            delta = (
+                _distance(first, before)
+                - _distance(ins[k], before)
+                + np.where(
+                    has_following,
+                    _distance(last, following) - _distance(outs[m], following),
+                    0.0,
+                )
+                + inside
+            )
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                stop = k + best + 1
+                order[k:stop] = order[k:stop][::-1].copy()
+                flipped[k:stop] = flipped[k:stop][::-1].copy()
+                if reverse:
+                    flipped[k:stop] = ~flipped[k:stop]
+                improved = True
+        if not improved:
+            break
+    return order, flipped
+
+
+def simplify_path(commands: PathArrays, tolerance: float = 0.0) -> PathArrays:
+    """Remove commands which make little or no difference to what is marked.
+
+    Jumps straight followed by another jump are dropped, as are moves which end
+    where they start, apart from whole circles and the first move, as where the
+    head starts from is not known. Runs of lines are then simplified with
+    Douglas-Peucker, dropping points within tolerance bits of the line from the
+    point kept before them to the one kept after. With the default of 0 only
+    points on a straight line between their neighbours are dropped, which leaves
+    the marks the same.
+
+    Other commands are kept where they are, and runs of lines don't extend past
+    them, so speed changes still apply to the same marks.
+    """
+    commands = _collapse_jumps(commands)
+    ends = end_points(commands)
+    before = np.vstack((ends[:1], ends[:-1]))
+    geometry = commands.is_geometry()
+    first = np.argmax(geometry) if geometry.any() else len(commands)
+    # A whole circle ends where it starts, but still marks
+    circle = (commands.cmd_type == CommandType.ARC) & (commands.angle != 0)
+    # Arcs end off the grid, so positions are compared to the nearest bit
+    still = geometry & ~circle & np.all(np.rint(ends) == np.rint(before), axis=1)
+    still[: first + 1] = False
+    commands = _collapse_jumps(commands[~still])
+
+    # points[i + 1] is the end of command i, so a run of lines from command f to l
+    # is the polyline points[f : l + 2], starting from where the head was before
+    # it. That isn't known for a run at the very start, which starts at its first
+    # point instead.
+    points = np.vstack(([[0.0, 0.0]], end_points(commands)))
+    lines = commands.cmd_type == CommandType.LINE
+    first_lines = np.flatnonzero(lines & ~np.append(False, lines[:-1]))
+    last_lines = np.flatnonzero(lines & ~np.append(lines[1:], False))
+    starts = np.maximum(first_lines, 1)
+    stops = last_lines + 1
+    keep = ~lines
+    keep[first_lines[first_lines == 0]] = True
+    keep[last_lines] = True
+    keep[_douglas_peucker(points, starts, stops, tolerance) - 1] = True
+    return commands[keep]
+
+
+def _collapse_jumps(commands: PathArrays) -> PathArrays:
+    """Drop jumps which are straight followed by another jump"""
+    jumps = commands.cmd_type == CommandType.JUMP
+    return commands[~(jumps & np.append(jumps[1:], False))]
+
+
+def _douglas_peucker(
+    points: np.ndarray, starts: np.ndarray, stops: np.ndarray, tolerance: float
+) -> np.ndarray:
+    """Indices of the points to keep inside each polyline points[start:stop + 1].
+
+    All the polylines are split together, one level of the recursion at a time,
+    so the work for each level is done in numpy however many there are.
+    """
+    kept = []
+    while len(starts):
+        active = stops - starts >= 2
+        starts, stops = starts[active], stops[active]
+        if not len(starts):
+            break
+        # Every point strictly inside each range, and the range it is in
+        lengths = stops - starts - 1
+        group = np.repeat(np.arange(len(starts)), lengths)
+        offsets = np.cumsum(lengths) - lengths
+        inside = starts[group] + 1 + np.arange(len(group)) - offsets[group]
+        distance = _segment_distance(
+            points[inside], points[starts[group]], points[stops[group]]
+        )
+        # Furthest point in each range, the first if there is a tie
+        largest = np.maximum.reduceat(distance, offsets)
+        candidates = np.flatnonzero(distance == largest[group])
+        furthest = candidates[
+            np.searchsorted(group[candidates], np.arange(len(starts)))
+        ]
+        split = largest > tolerance
+        middle = inside[furthest[split]]
+        kept.append(middle)
+        starts, stops = (
+            np.concatenate((starts[split], middle)),
+            np.concatenate((middle, stops[split])),
+        )
+    return np.concatenate(kept) if kept else np.zeros(0, dtype=int)
+
+
+def _segment_distance(p: np.ndarray, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Distance from each point p to the segment from a to b"""
+    ab = b - a
+    length_squared = np.einsum("ij,ij->i", ab, ab)
+    t = np.einsum("ij,ij->i", p - a, ab) / np.where(length_squared, length_squared, 1)
+    nearest = a + np.clip(t, 0, 1)[:, None] * ab
+    return np.hypot(*(p - nearest).T)
+
+
+def fit_arcs(commands: PathArrays, tolerance: float = 1.0) -> PathArrays:
+    """Replace runs of lines which follow a circle with arcs.
+
+    Exported paths approximate circles with many short lines, each of which takes
+    a list command and is followed by the polygon delay. Each run of lines is
+    covered from its start by the longest arcs which fit, of at least
+    ARC_FIT_MIN_LINES lines. An arc fits if every vertex and the middle of every
+    line are within tolerance bits of it, it turns one way by less than a whole
+    circle, and it ends within tolerance of the last vertex. Arc centres are whole
+    bits, and the fit is checked with the centre rounded.
+
+    As for simplify_path, runs of lines don't extend past other commands, and one
+    at the very start of the path starts from its first point.
+    """
+    points = np.vstack(([[0.0, 0.0]], end_points(commands)))
+    lines = commands.cmd_type == CommandType.LINE
+    first_lines = np.flatnonzero(lines & ~np.append(False, lines[:-1]))
+    last_lines = np.flatnonzero(lines & ~np.append(lines[1:], False))
+    keep = np.ones(len(commands), dtype=bool)
+    cmd_type, x, y, angle = (
+        commands.cmd_type.copy(),
+        commands.x.copy(),
+        commands.y.copy(),
+        commands.angle.copy(),
+    )
+    # points[k] to points[k + 1] is command k, so the run of lines from command f
+    # to l is points[f : l + 2], and an arc over points a to b replaces commands a
+    # to b - 1, going in place of the last of them
+    starts, stops = np.maximum(first_lines, 1), last_lines + 1
+    run = np.full(len(points), -1)
+    for index, (start, stop) in enumerate(zip(starts, stops, strict=True)):
+        run[start : stop + 1] = index
+    # Only the starts of the shortest arcs which fit can start longer ones, and
+    # those are found for every run together
+    first = np.flatnonzero(
+        (run[:-ARC_FIT_MIN_LINES] >= 0)
+        & (run[:-ARC_FIT_MIN_LINES] == run[ARC_FIT_MIN_LINES:])
+    )
+    if not len(first):
+        return commands
+    windows = np.lib.stride_tricks.sliding_window_view(
+        points, ARC_FIT_MIN_LINES + 1, axis=0
+    )[first].transpose(0, 2, 1)
+    fitted = first[_fit_arcs(windows, tolerance)[0]]
+    covered = 0
+    for start, stop in zip(fitted, stops[run[fitted]], strict=True):
+        if start < covered:
+            continue
+        covered, centre, sweep = _longest_arc(points, start, stop, tolerance)
+        keep[start : covered - 1] = False
+        cmd_type[covered - 1] = CommandType.ARC
+        x[covered - 1], y[covered - 1], angle[covered - 1] = *centre, sweep
+    return PathArrays(cmd_type, x, y, angle)[keep]
+
+
+def _longest_arc(
+    points: np.ndarray, start: int, stop: int, tolerance: float
+) -> tuple[int, np.ndarray, float]:
+    """The furthest end up to stop of an arc from start, its centre and its angle.
+
+    An arc of ARC_FIT_MIN_LINES must fit from start. The end is doubled while the
+    arc still fits and then bisected, so a run takes a logarithmic number of
+    checks rather than one per vertex.
+    """
+    good, bad = start + ARC_FIT_MIN_LINES, stop + 1
+    step = ARC_FIT_MIN_LINES
+    while bad - good > 1:
+        end = min(good + step, bad - 1) if step else (good + bad) // 2
+        fits, _, _ = _fit_arcs(points[None, start : end + 1], tolerance)
+        if fits[0]:
+            good = end
+            step *= 2
+        else:
+            # Stop doubling, and bisect from here
+            bad, step = end, 0
+    _, centres, sweeps = _fit_arcs(points[None, start : good + 1], tolerance)
+    return good, centres[0], sweeps[0]
+
+
+def _fit_arcs(
+    polylines: np.ndarray, tolerance: float
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Which of the polylines, each of the same length, an arc fits, with the whole
+    bit centres and angles in degrees of those arcs.
+
+    The circles are least squares fits to the vertices, which are much less thrown
+    by them being rounded to whole bits than ones through three of them.
+    """
+    count, length = polylines.shape[:2]
+    first, last = polylines[:, 0], polylines[:, -1]
+    # x^2 + y^2 = 2 cx x + 2 cy y + k about the centre (cx, cy), relative to the
+    # mean point so that the normal equations are well conditioned
+    mean = polylines.mean(axis=1, keepdims=True)
+    relative = polylines - mean
+    design = np.concatenate((2 * relative, np.ones((count, length, 1))), axis=2)
+    normal = design.transpose(0, 2, 1) @ design
+    target = np.einsum("nki,nki->nk", relative, relative)
+    # Points on a line have no circle through them
+    solvable = np.linalg.cond(normal) < 1e12
+    normal[~solvable] = np.identity(3)
+    solution = np.linalg.solve(normal, design.transpose(0, 2, 1) @ target[..., None])[
+        ..., 0
+    ]
+    fitted = solution[:, :2] + mean[:, 0]
+    # The card arcs from the first vertex about a whole bit centre, so the radius
+    # is set by those. Of the centres around each fit, the one which the vertices
+    # and the middles of the lines stray from least is used.
+    candidates = np.floor(fitted)[:, None] + [[0, 0], [0, 1], [1, 0], [1, 1]]
+    radii = np.hypot(*(first[:, None] - candidates).transpose(2, 0, 1))
+    checked = np.concatenate(
+        (polylines, (polylines[:, 1:] + polylines[:, :-1]) / 2), axis=1
+    )
+    stray = np.abs(
+        np.hypot(*(checked[:, None] - candidates[:, :, None]).transpose(3, 0, 1, 2))
+        - radii[..., None]
+    ).max(axis=2)
+    best = np.argmin(stray, axis=1)
+    rows = np.arange(count)
+    centres = candidates[rows, best]
+    radius = radii[rows, best]
+    turns = np.diff(
+        np.unwrap(np.arctan2(*(polylines - centres[:, None]).transpose(2, 0, 1)[::-1])),
+        axis=1,
+    )
+    sweeps = turns.sum(axis=1)
+    # Where the card finishes, turning the first vertex about the centre
+    start = first - centres
+    cos, sin = np.cos(sweeps), np.sin(sweeps)
+    ends = centres + np.column_stack(
+        (start[:, 0] * cos - start[:, 1] * sin, start[:, 0] * sin + start[:, 1] * cos)
+    )
+    fits = (
+        solvable
+        & (stray[rows, best] <= tolerance)
+        & (radius <= ARC_FIT_MAX_RADIUS)
+        & np.all(np.abs(centres) <= ARC_FIT_MAX_RADIUS, axis=1)
+        & (np.all(turns > 0, axis=1) | np.all(turns < 0, axis=1))
+        & (np.abs(sweeps) < 2 * np.pi)
+        & (np.hypot(*(ends - last).T) <= tolerance)
+    )
+    return fits, centres, np.degrees(sweeps)
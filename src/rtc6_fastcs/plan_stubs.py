@@ -1,17 +1,28 @@
+import logging
+
 import bluesky.plan_stubs as bps
 import bluesky.preprocessors as bpp
+import numpy as np
+from bluesky.utils import make_decorator, short_uid
+
+from rtc6_fastcs.device import ListStart, Rtc6Eth
+from rtc6_fastcs.field_bounds import check_bounds
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+from rtc6_fastcs.path_optimisation import optimise_jump_order
+from rtc6_fastcs.shapes import compile_path
+from rtc6_fastcs.shapes import rectangle as rectangle_path
+from rtc6_fastcs.transform import BITS_PER_UM
 
-from rtc6_fastcs.device import Rtc6Eth
+LOGGER = logging.getLogger(__name__)
 
 # from blueapi.core import MsgGenerator
 # from dodal.common.beamlines.beamline_utils import device_factory
 # from bluesky.run_engine import call_in_bluesky_event_loop
 
 
-def convert_um_to_bits(um_in: int) -> int:
-    """RTC operates in bits. Convert um to bits for drawing"""
-    bits_per_um = 26  # estimated
-    return int(um_in * bits_per_um)
+def convert_um_to_bits(um_in: float) -> int:
+    """RTC operates in bits. Convert um to the nearest bit for drawing"""
+    return int(np.rint(um_in * BITS_PER_UM))
 
 
 def line(rtc6: Rtc6Eth, x: int, y: int):
@@ -42,6 +53,71 @@ def arc(rtc6: Rtc6Eth, x: int, y: int, angle_deg: float):
     yield from bps.trigger(rtc6.list.add_arc.proc, wait=True)
 
 
+def _set_path_arrays(rtc6: Rtc6Eth, commands: PathArrays):
+    group = short_uid("set_path_arrays")
+    yield from bps.abs_set(rtc6.list.path.cmd_type, commands.cmd_type, group=group)
+    yield from bps.abs_set(rtc6.list.path.x, commands.x, group=group)
+    yield from bps.abs_set(rtc6.list.path.y, commands.y, group=group)
+    yield from bps.abs_set(rtc6.list.path.angle, commands.angle, group=group)
+    yield from bps.wait(group)
+
+
+def add_path(rtc6: Rtc6Eth, commands: PathArrays, passes: int = 1):
+    """add a whole path to the list, with one put per array rather than per vertex.
+
+    The path is uploaded once and repeated on the card for each pass. Coordinates
+    are in bits, unlike the single-command stubs above. Returns the estimated
+    time to mark it in seconds.
+    """
+    if not len(commands):
+        return 0.0
+    yield from bps.abs_set(rtc6.list.path.passes, passes, wait=True)
+    yield from _set_path_arrays(rtc6, commands)
+    yield from bps.trigger(rtc6.list.path.proc, wait=True)
+    return (yield from bps.rd(rtc6.list.path.estimated_duration))
+
+
+def stream_path(
+    rtc6: Rtc6Eth,
+    commands: PathArrays,
+    chunk_size: int | None = None,
+    passes: int = 1,
+):
+    """load a whole path in chunks across lists 1 and 2, marking from the first one.
+
+    This ends and executes the list itself, and waits for marking to finish, so
+    should be used in place of triggering the device. Coordinates are in bits.
+    Returns the estimated time to mark it in seconds.
+    """
+    if chunk_size is not None:
+        yield from bps.abs_set(rtc6.list.path.chunk_size, chunk_size, wait=True)
+    yield from bps.abs_set(rtc6.list.path.passes, passes, wait=True)
+    yield from _set_path_arrays(rtc6, commands)
+    yield from bps.prepare(rtc6, ListStart.STREAM, wait=True)
+    yield from bps.kickoff(rtc6, wait=True)
+    yield from bps.complete(rtc6, wait=True)
+    return (yield from bps.rd(rtc6.list.path.estimated_duration))
+
+
+def run_returning_result(plan):
+    """Enclose in a run as run_wrapper does, returning the plan's result.
+
+    run_wrapper returns the run uid instead, which hides the result from the
+    RunEngine when the plan is run directly.
+    """
+    result = None
+
+    def capture():
+        nonlocal result
+        result = yield from plan
+
+    yield from bpp.run_wrapper(capture())
+    return result
+
+
+run_returning_result_decorator = make_decorator(run_returning_result)
+
+
 def rectangle(rtc6: Rtc6Eth, x: int, y: int, origin: tuple[int, int] = (0, 0)):
     """Add instructions to draw a rectangle.
 
@@ -58,41 +134,83 @@ JumpOrLineInput = tuple[int, int, bool]  # x, y, laser_on
 ArcInput = tuple[int, int, float]
 
 
+def polygon_path(
+    points: list[JumpOrLineInput | ArcInput], arcs: bool = True
+) -> PathArrays:
+    """Convert polygon points in um to a path in bits, starting with a jump.
+
+    If arcs is set, points with a float are arcs about (x, y) through that many
+    degrees. Otherwise, as for every other point, the flag is taken as laser on:
+    truthy points are lines and the rest are jumps. This means ints and numpy
+    bools from outside are never mistaken for arcs.
+    """
+    cmd_type, x, y, angle = [], [], [], []
+    for index, (point_x, point_y, mode) in enumerate(points):
+        is_arc = (
+            arcs
+            and isinstance(mode, float | np.floating)
+            and not isinstance(mode, bool | np.bool_)
+        )
+        if not index or not (is_arc or mode):
+            cmd_type.append(CommandType.JUMP)
+            angle.append(0.0)
+        elif is_arc:
+            cmd_type.append(CommandType.ARC)
+            angle.append(float(mode))
+        else:
+            cmd_type.append(CommandType.LINE)
+            angle.append(0.0)
+        x.append(point_x)
+        y.append(point_y)
+    return compile_path(cmd_type, x, y, angle)
+
+
 @bpp.run_decorator()
 def draw_square(rtc6: Rtc6Eth, size: int):
-    yield from bps.stage(rtc6)
-    yield from rectangle(rtc6, size, size)
-    yield from bps.trigger(rtc6)
-    yield from go_to_home_inner(rtc6)
+    yield from _draw(rtc6, rectangle_path(size, size))
 
 
-@bpp.run_decorator()
-def draw_polygon(rtc6: Rtc6Eth, points: list[JumpOrLineInput]):
+def _draw(rtc6: Rtc6Eth, path: PathArrays, passes: int = 1):
+    check_bounds(path)
     yield from bps.stage(rtc6)
-    yield from jump(rtc6, *points[0][:-1])
-    for point in points[1:]:
-        if point[2]:
-            yield from line(rtc6, *point[:-1])
-        else:
-            yield from jump(rtc6, *point[:-1])
-    yield from bps.trigger(rtc6)
+    duration = yield from add_path(rtc6, path, passes)
+    yield from bps.trigger(rtc6, wait=True)
     yield from go_to_home_inner(rtc6)
+    return duration
 
 
-@bpp.run_decorator()
-def draw_polygon_with_arcs(rtc6: Rtc6Eth, points: list[JumpOrLineInput | ArcInput]):
-    yield from bps.stage(rtc6)
-    yield from jump(rtc6, *points[0][:-1])
-    for point in points[1:]:
-        if isinstance(point[2], bool):
-            if point[2]:
-                yield from line(rtc6, *point[:-1])
-            else:
-                yield from jump(rtc6, *point[:-1])
-        else:
-            yield from arc(rtc6, *point)
-    yield from bps.trigger(rtc6)
-    yield from go_to_home_inner(rtc6)
+@run_returning_result_decorator()
+def draw_path(rtc6: Rtc6Eth, path: PathArrays, passes: int = 1):
+    """Draw a path in bits, e.g. from rtc6_fastcs.shapes.
+
+    Returns the estimated time to mark it in seconds.
+    """
+    return (yield from _draw(rtc6, path, passes))
+
+
+@run_returning_result_decorator()
+def draw_polygon(
+    rtc6: Rtc6Eth,
+    points: list[JumpOrLineInput],
+    passes: int = 1,
+    optimise_jumps: bool = False,
+):
+    """Draw the points, optionally reordering the pieces to shorten the jumps.
+
+    Returns the estimated time to mark them in seconds.
+    """
+    path = polygon_path(list(points), arcs=False)
+    if optimise_jumps:
+        path, report = optimise_jump_order(path)
+        LOGGER.info(f"Reordered polygon: {report}")
+    return (yield from _draw(rtc6, path, passes))
+
+
+@run_returning_result_decorator()
+def draw_polygon_with_arcs(
+    rtc6: Rtc6Eth, points: list[JumpOrLineInput | ArcInput], passes: int = 1
+):
+    return (yield from _draw(rtc6, polygon_path(points), passes))
 
 
 @bpp.run_decorator()
@@ -103,14 +221,14 @@ def go_to_home(rtc6: Rtc6Eth):
 def go_to_home_inner(rtc6: Rtc6Eth):
     yield from bps.stage(rtc6)
     yield from jump(rtc6, 0, 0)
-    yield from bps.trigger(rtc6)
+    yield from bps.trigger(rtc6, wait=True)
 
 
 @bpp.run_decorator()
 def go_to_x_y(rtc6: Rtc6Eth, x: int, y: int):
     yield from bps.stage(rtc6)
     yield from jump(rtc6, x, y)
-    yield from bps.trigger(rtc6)
+    yield from bps.trigger(rtc6, wait=True)
 
 
 # For BlueAPI
@@ -0,0 +1,120 @@
+"""Shapes compiled straight to path arrays, ready for add_path.
+
+Shapes are given in um and worked out in floats for every point at once. They are
+only rounded to bits at the end, so a half-width or an arc centre isn't rounded
+once in um and then again in bits.
+
+Each shape takes a transform, the affine from um to bits to compile it with (see
+transform.job_transform), so it can be rotated and placed in the same pass. It
+defaults to converting um to bits with the calibration factor.
+"""
+
+from collections.abc import Callable
+
+import numpy as np
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+from rtc6_fastcs.transform import apply_affine, arc_direction, um_to_bits
+
+JUMP, LINE, ARC = CommandType.JUMP, CommandType.LINE, CommandType.ARC
+
+
+def compile_path(cmd_type, x_um, y_um, angle=None, transform=None) -> PathArrays:
+    """Path arrays in bits for jumps, lines and arcs given in um, rounding to the
+    nearest bit"""
+    if transform is None:
+        transform = um_to_bits()
+    xy = apply_affine(transform, np.column_stack((x_um, y_um)))
+    if angle is None:
+        angle = np.zeros(len(xy))
+    angle = arc_direction(transform) * np.asarray(angle, dtype=np.float64)
+    return PathArrays(cmd_type, xy[:, 0], xy[:, 1], angle)
+
+
+def polyline(x_um, y_um, transform=None) -> PathArrays:
+    """Jump to the first point and mark through the rest"""
+    cmd_type = np.full(len(x_um), LINE, dtype=np.uint8)
+    cmd_type[:1] = JUMP
+    return compile_path(cmd_type, x_um, y_um, transform=transform)
+
+
+def parametric(
+    curve: Callable[[np.ndarray], tuple[np.ndarray, np.ndarray]],
+    samples: int,
+    start: float = 0.0,
+    stop: float = 1.0,
+    transform: np.ndarray | None = None,
+) -> PathArrays:
+    """Mark along curve(t) from start to stop, as samples points joined by lines.
+
+    curve takes an array of t and returns arrays of x and y in um, e.g. for an
+    ellipse ``lambda t: (a * np.cos(t), b * np.sin(t))`` from 0 to 2 * np.pi.
+    """
+    x, y = curve(np.linspace(start, stop, samples))
+    return polyline(
+        np.broadcast_to(x, (samples,)), np.broadcast_to(y, (samples,)), transform
+    )
+
+
+def rectangle(
+    x: float,
+    y: float,
+    origin: tuple[float, float] = (0, 0),
+    transform: np.ndarray | None = None,
+) -> PathArrays:
+    """The same path as the rectangle plan stub, with opposite corners origin and
+    (x, y)"""
+    return polyline(
+        [origin[0], x, x, origin[0], origin[0]],
+        [origin[1], origin[1], y, y, origin[1]],
+        transform,
+    )
+
+
+def cylinder(
+    width: float, length: float, transform: np.ndarray | None = None
+) -> PathArrays:
+    """A cylinder length long and width wide along x from 0, with a tail at each end
+    running out to (-width, +-width)"""
+    half = width / 2
+    return polyline(
+        [-width, 0, length, length, 0, -width],
+        [width, half, half, -half, -half, -width],
+        transform,
+    )
+
+
+def omega(
+    neck_width: float, sphere_radius: float, transform: np.ndarray | None = None
+) -> PathArrays:
+    """A sphere on a neck at x = 0, with tails running back from the neck.
+
+    The neck is the two points at y = +-neck_width / 2. The sphere is an arc of
+    sphere_radius from one to the other, the long way round, about the centre on
+    the x axis which puts them both on it. The tails go to (-neck_width, +-centre).
+    """
+    neck = neck_width / 2
+    centre = np.sqrt(sphere_radius**2 - neck**2)
+    angle = -(360 - 2 * np.degrees(np.arcsin(neck / sphere_radius)))
+    return compile_path(
+        [JUMP, LINE, ARC, LINE, LINE],
+        [-neck_width, 0, centre, 0, -neck_width],
+        [centre, neck, 0, -neck, -centre],
+        [0.0, 0.0, angle, 0.0, 0.0],
+        transform,
+    )
+
+
+def sphere(
+    radius: float,
+    centre: tuple[float, float] = (0, 0),
+    transform: np.ndarray | None = None,
+) -> PathArrays:
+    """A circle as one arc, starting and finishing on the right of centre"""
+    return compile_path(
+        [JUMP, ARC],
+        [centre[0] + radius, centre[0]],
+        [centre[1], centre[1]],
+        [0.0, 360.0],
+        transform,
+    )
@@ -0,0 +1,136 @@
+"""Coordinate transforms, as 3x3 affine matrices acting on (x, y, 1).
+
+Every change of coordinates a job goes through, um to bits, rotating and placing
+it, and the laser / oav correction, is one of these. They are composed into a
+single matrix once per job, and applied to all the points in one pass, so
+positions are only rounded to bits once, at the end.
+"""
+
+from pathlib import Path
+
+import numpy as np
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+
+# Bits per mm at the sample. This is the calibration factor the vendor execution
+# lists are written for, and the one scale everything in um is converted with.
+CALIBRATION_FACTOR = 27168.0
+BITS_PER_UM = CALIBRATION_FACTOR / 1000
+
+
+def validate_correction_matrix(matrix: np.ndarray) -> np.ndarray:
+    """Check that a coordinate correction matrix is usable, returning it as floats.
+
+    It must be a finite, invertible 2x2 matrix so that no part of the field is
+    collapsed onto a line or point.
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.shape != (2, 2):
+        raise ValueError(f"Correction matrix must be 2x2, got shape {matrix.shape}")
+    if not np.all(np.isfinite(matrix)):
+        raise ValueError(f"Correction matrix must be finite, got {matrix.tolist()}")
+    if np.isclose(np.linalg.det(matrix), 0):
+        raise ValueError(f"Correction matrix is singular: {matrix.tolist()}")
+    return matrix
+
+
+def load_correction_matrix(path: str | Path) -> np.ndarray:
+    """Load and validate a correction matrix in numpy.savetxt() format"""
+    return validate_correction_matrix(np.loadtxt(path, ndmin=2))
+
+
+def linear(matrix: np.ndarray) -> np.ndarray:
+    """The affine transform for a 2x2 matrix, such as a correction matrix"""
+    affine = np.identity(3)
+    affine[:2, :2] = matrix
+    return affine
+
+
+def scale(factor: float) -> np.ndarray:
+    return linear(np.identity(2) * factor)
+
+
+def um_to_bits(calibration_factor: float = CALIBRATION_FACTOR) -> np.ndarray:
+    """um to bits, for a calibration factor in bits/mm"""
+    return scale(calibration_factor / 1000)
+
+
+def rotation(angle_deg: float) -> np.ndarray:
+    """Anticlockwise about the origin"""
+    cos, sin = np.cos(np.radians(angle_deg)), np.sin(np.radians(angle_deg))
+    return linear(np.array([[cos, -sin], [sin, cos]]))
+
+
+def translation(x: float, y: float) -> np.ndarray:
+    affine = np.identity(3)
+    affine[:2, 2] = x, y
+    return affine
+
+
+def compose(*transforms: np.ndarray) -> np.ndarray:
+    """One transform doing each of transforms in turn, the first one first"""
+    affine = np.identity(3)
+    for transform in transforms:
+        affine = transform @ affine
+    return affine
+
+
+def job_transform(
+    calibration_factor: float = CALIBRATION_FACTOR,
+    angle_deg: float = 0.0,
+    offset_um: tuple[float, float] = (0.0, 0.0),
+    correction: np.ndarray | None = None,
+) -> np.ndarray:
+    """From um in the job to corrected bits on the card.
+
+    The job is rotated about its origin, then moved by offset_um, then converted
+    to bits and corrected with a 2x2 correction matrix, if one is given.
+    """
+    transforms = [rotation(angle_deg), translation(*offset_um)]
+    transforms.append(um_to_bits(calibration_factor))
+    if correction is not None:
+        transforms.append(linear(correction))
+    return compose(*transforms)
+
+
+def apply_affine(affine: np.ndarray, xy: np.ndarray) -> np.ndarray:
+    """Apply an affine transform to an Nx2 array of points in one pass.
+
+    Results are rounded to the nearest bit, with ties going to the even value
+    (numpy.rint), and returned as int32.
+    """
+    transformed = np.asarray(xy, dtype=np.float64) @ affine[:2, :2].T + affine[:2, 2]
+    return np.rint(transformed).astype(np.int32)
+
+
+def apply_correction(matrix: np.ndarray, xy: np.ndarray) -> np.ndarray:
+    """Apply a 2x2 correction matrix to an Nx2 array of points, see apply_affine"""
+    return apply_affine(linear(matrix), xy)
+
+
+def arc_direction(matrix: np.ndarray) -> int:
+    """1 if the matrix preserves arc direction, -1 if it mirrors it.
+
+    A mirroring correction reverses the sense of rotation, so arc angles must
+    change sign for the arc to end where it did before correction. An affine
+    transform mirrors if its 2x2 part does.
+    """
+    return 1 if np.linalg.det(np.asarray(matrix)[:2, :2]) > 0 else -1
+
+
+def transform_path(affine: np.ndarray, commands: PathArrays) -> PathArrays:
+    """Transform the positions in a path, with arcs turned round if it mirrors.
+
+    Only jumps, lines and arcs are moved, the other commands use x and y for their
+    own arguments. Arc centres are moved like any other point, so the transform
+    should only scale evenly, as an arc can't be stretched into an ellipse.
+    """
+    geometry = commands.is_geometry()
+    xy = np.column_stack((commands.x, commands.y))
+    xy[geometry] = apply_affine(affine, xy[geometry])
+    angle = np.where(
+        commands.cmd_type == CommandType.ARC,
+        arc_direction(affine) * commands.angle,
+        commands.angle,
+    )
+    return PathArrays(commands.cmd_type, xy[:, 0], xy[:, 1], angle)
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+from ophyd_async.core import callback_on_mock_put, init_devices, set_mock_value
+
+from rtc6_fastcs.device import ListStart, Rtc6Eth
+
+pytestmark = pytest.mark.filterwarnings(
+    "ignore:epics_signal_x is deprecated:DeprecationWarning"
+)
+
+
+async def _mock_rtc6() -> Rtc6Eth:
+    async with init_devices(mock=True):
+        rtc6 = Rtc6Eth()
+    return rtc6
+
+
+def test_trigger_waits_for_the_execution_it_started():
+    async def run():
+        rtc6 = await _mock_rtc6()
+        set_mock_value(rtc6.list.executions_started, 3)
+        set_mock_value(rtc6.list.executions_done, 3)
+
+        def execute(*_, **__):
+            set_mock_value(rtc6.list.executions_started, 4)
+
+        callback_on_mock_put(rtc6.list.execute_list, execute)
+        status = rtc6.trigger()
+        await asyncio.sleep(0.01)
+        assert not status.done
+
+        set_mock_value(rtc6.list.executions_done, 4)
+        await asyncio.wait_for(status, timeout=1)
+        assert status.success
+
+    asyncio.run(run())
+
+
+def test_prepared_stream_kicks_off_the_path_stream():
+    async def run():
+        rtc6 = await _mock_rtc6()
+        streamed, executed = [], []
+        callback_on_mock_put(rtc6.list.path.stream, lambda *_, **__: streamed.append(1))
+        callback_on_mock_put(
+            rtc6.list.execute_list, lambda *_, **__: executed.append(1)
+        )
+
+        await rtc6.prepare(ListStart.STREAM)
+        await rtc6.kickoff()
+        assert (streamed, executed) == ([1], [])
+
+        # Only for the next kickoff
+        await rtc6.kickoff()
+        assert (streamed, executed) == ([1], [1])
+
+    asyncio.run(run())
+
+
+def test_complete_raises_if_the_ioc_reports_a_failure():
+    async def run():
+        rtc6 = await _mock_rtc6()
+
+        def fail(*_, **__):
+            set_mock_value(rtc6.list.last_failure, "RtcListError: list is full")
+            set_mock_value(rtc6.list.executions_failed, 1)
+
+        callback_on_mock_put(rtc6.list.execute_list, fail)
+        status = rtc6.trigger()
+        with pytest.raises(RuntimeError, match="list is full"):
+            await asyncio.wait_for(status, timeout=1)
+
+    asyncio.run(run())
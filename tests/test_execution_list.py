@@ -0,0 +1,109 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rtc6_fastcs.cut_shapes import place_job
+from rtc6_fastcs.execution_list import ExecutionListConfig, parse_execution_list
+from rtc6_fastcs.path_commands import CommandType
+from rtc6_fastcs.transform import translation
+
+SHAPE_PROTOCOLS = Path(__file__).parent.parent / "shape_protocols"
+
+
+def test_parse_execution_list_keeps_list_commands_in_order():
+    config, commands = parse_execution_list(
+        SHAPE_PROTOCOLS / "RTCExecutionlist_100umSphere.txt"
+    )
+
+    assert config == ExecutionListConfig()
+    assert [CommandType(t).name for t in commands.cmd_type] == [
+        "SET_LASER_POWER",
+        "LIST_NOP",
+        "SET_LASER_POWER",
+        "SAVE_AND_RESTART_TIMER",
+        "JUMP",
+        "LINE",
+        "LINE",
+        "ARC",
+        "LINE",
+        "LINE",
+        "LIST_NOP",
+        "SET_TRIGGER",
+        "JUMP",
+        "LIST_NOP",
+        "SAVE_AND_RESTART_TIMER",
+    ]
+    assert (commands.x[0], commands.y[0]) == (0, 3071)
+    assert (commands.x[4], commands.y[4]) == (2173, 2173)
+    trigger = commands.cmd_type == CommandType.SET_TRIGGER
+    assert list(commands.x[trigger]) == [0]
+    assert list(commands.y[trigger]) == [16]
+    assert list(commands.angle[trigger]) == [17]
+
+
+def test_parse_execution_list_subroutines_and_speed_changes():
+    config, commands = parse_execution_list(
+        SHAPE_PROTOCOLS / "RTCExecutionlist_SingleTrenchPlusStrainRelief.txt"
+    )
+
+    # Set before the first jump, so it is part of the config
+    assert config.mark_speed == 1086.72
+    assert config.jump_speed == 27168
+    assert np.count_nonzero(commands.is_geometry()) == 2007
+
+    sub_calls = commands.cmd_type == CommandType.SUB_CALL_REPEAT
+    assert list(commands.x[sub_calls]) == [0, 1, 2]
+    assert list(commands.y[sub_calls]) == [2, 2, 2]
+    speeds = commands.cmd_type == CommandType.SET_MARK_SPEED
+    assert list(commands.angle[speeds]) == [815.04, 1086.72]
+
+
+def test_parse_execution_list_header_offset(tmp_path):
+    job = tmp_path / "RTCExecutionlist_Offset.txt"
+    job.write_text(
+        "n_set_offset_xyz_list(2, 1, 120, -40, 0, 1);\n"
+        "n_jump_abs(2, 0, 0);\n"
+        "n_mark_abs(2, 10, 0);\n"
+    )
+
+    config, commands = parse_execution_list(job)
+
+    assert config.offset_xyz == (120, -40, 0)
+    assert len(commands) == 2
+
+
+def test_config_round_trips_through_its_array():
+    config = ExecutionListConfig(
+        angle=-45.5, offset_xyz=(120, -40, 3), wobbel_mode=(10, 20, 1.5, 1)
+    )
+
+    values = config.to_array()
+    assert values.dtype == np.float64
+    assert list(values[:4]) == [-45.5, 120, -40, 3]
+    restored = ExecutionListConfig.from_array(values)
+    assert restored == config
+    assert type(restored.offset_xyz[0]) is int
+    with pytest.raises(ValueError, match="Expected 23"):
+        ExecutionListConfig.from_array(values[:-1])
+
+
+def test_place_job_rescales_for_another_calibration_factor():
+    config, commands = parse_execution_list(
+        SHAPE_PROTOCOLS / "RTCExecutionlist_SingleTrenchPlusStrainRelief.txt"
+    )
+
+    placed_config, placed = place_job(
+        config, commands, config.calibration_factor / 2, translation(100, 0)
+    )
+
+    geometry = commands.is_geometry()
+    np.testing.assert_allclose(
+        placed.x[geometry], commands.x[geometry] / 2 + 100, atol=0.5
+    )
+    assert placed_config.mark_speed == config.mark_speed / 2
+    speeds = placed.cmd_type == CommandType.SET_MARK_SPEED
+    assert list(placed.angle[speeds]) == [815.04 / 2, 1086.72 / 2]
+    # The original is left as it was, as it may be cached
+    assert config.mark_speed == 1086.72
+    assert list(commands.angle[speeds]) == [815.04, 1086.72]
@@ -0,0 +1,56 @@
+import pytest
+
+from rtc6_fastcs.field_bounds import (
+    FIELD_LIMIT,
+    FieldBounds,
+    check_bounds,
+    clip_to_bounds,
+    out_of_bounds,
+)
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+
+JUMP, LINE, ARC = CommandType.JUMP, CommandType.LINE, CommandType.ARC
+
+
+def test_arcs_are_checked_for_everything_they_sweep_through():
+    bounds = FieldBounds(-150, 150, -150, 50)
+    # Arcs of radius 100 about the origin, starting from (100, 0)
+    below = PathArrays([JUMP, ARC], [100, 0], [0, 0], [0, -90])
+    # Both ends are inside, but the top of the circle is at y = 100
+    over = PathArrays([JUMP, ARC], [100, 0], [0, 0], [0, 180])
+
+    assert not out_of_bounds(below, bounds).any()
+    assert list(out_of_bounds(over, bounds)) == [False, True]
+    assert not out_of_bounds(over, FieldBounds(-150, 150, -150, 100)).any()
+
+
+def test_the_whole_field_can_be_used():
+    path = PathArrays(
+        [JUMP, LINE, LINE],
+        [-FIELD_LIMIT, FIELD_LIMIT, FIELD_LIMIT + 1],
+        [-FIELD_LIMIT, FIELD_LIMIT, 0],
+        [0, 0, 0],
+    )
+
+    with pytest.raises(ValueError, match="1 path commands go outside.*LINE 2"):
+        check_bounds(path)
+    check_bounds(path[:2])
+
+
+def test_clipping_moves_jumps_and_lines_but_not_arcs():
+    bounds = FieldBounds(0, 1000, 0, 1000)
+    path = PathArrays(
+        [JUMP, LINE, CommandType.SET_MARK_SPEED],
+        [-5, 2000, 5000],
+        [10, 10, 0],
+        [0, 0, 0],
+    )
+
+    clipped = clip_to_bounds(path, bounds)
+
+    assert list(clipped.x) == [0, 1000, 5000]
+    assert list(clipped.y) == [10, 10, 0]
+    with pytest.raises(ValueError):
+        clip_to_bounds(PathArrays([JUMP, ARC], [500, 0], [0, 0], [0, -90]), bounds)
+    with pytest.raises(ValueError, match="empty"):
+        FieldBounds(x_min=1, x_max=0)
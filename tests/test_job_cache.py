@@ -0,0 +1,60 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rtc6_fastcs import job_cache
+from rtc6_fastcs.job_cache import load_execution_list
+
+SPHERE_100UM = (
+    Path(__file__).parent.parent
+    / "shape_protocols"
+    / "RTCExecutionlist_100umSphere.txt"
+)
+
+
+@pytest.fixture
+def execution_list(tmp_path: Path) -> Path:
+    return Path(shutil.copy(SPHERE_100UM, tmp_path / SPHERE_100UM.name))
+
+
+def test_cached_job_matches_parsed_job(execution_list: Path, tmp_path: Path):
+    cache_dir = tmp_path / "cache"
+    parsed_config, parsed = load_execution_list(execution_list, cache_dir)
+    cached_config, cached = load_execution_list(execution_list, cache_dir)
+
+    assert len(list(cache_dir.glob("*.rtcjob"))) == 1
+    assert cached_config == parsed_config
+    for field in ("cmd_type", "x", "y", "angle"):
+        np.testing.assert_array_equal(getattr(cached, field), getattr(parsed, field))
+
+
+def test_cache_hit_skips_parsing(
+    execution_list: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    load_execution_list(execution_list, tmp_path)
+
+    def fail(_):
+        raise AssertionError("should not parse a cached job")
+
+    monkeypatch.setattr(job_cache, "parse_execution_list", fail)
+    _, commands = load_execution_list(execution_list, tmp_path)
+    assert len(commands) == 15
+
+
+def test_changed_source_replaces_cache_entry(execution_list: Path, tmp_path: Path):
+    cache_dir = tmp_path / "cache"
+    load_execution_list(execution_list, cache_dir)
+    (first_entry,) = cache_dir.glob("*.rtcjob")
+
+    execution_list.write_text(
+        execution_list.read_text().replace(
+            "n_set_mark_speed(2, 271.68)", "n_set_mark_speed(2, 100)"
+        )
+    )
+    config, _ = load_execution_list(execution_list, cache_dir)
+
+    assert config.mark_speed == 100
+    (entry,) = cache_dir.glob("*.rtcjob")
+    assert entry != first_entry
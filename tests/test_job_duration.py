@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.job_duration import (
+    TimingSettings,
+    command_durations,
+    estimate_duration,
+)
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+
+JUMP, LINE, ARC = CommandType.JUMP, CommandType.LINE, CommandType.ARC
+
+
+def _path(*commands: tuple) -> PathArrays:
+    cmd_type, x, y, angle = zip(*((*c, 0.0)[:4] for c in commands), strict=True)
+    return PathArrays(cmd_type, x, y, angle)
+
+
+def test_moves_take_their_length_over_the_speed():
+    path = _path((JUMP, 3000, 4000), (LINE, 3000, 5000), (ARC, 3000, 4000, -180.0))
+    settings = TimingSettings(mark_speed=100.0, jump_speed=1000.0)
+
+    # 5 ms jumping, 10 ms along the line and pi * 10 ms around the half circle
+    assert command_durations(path, settings) == pytest.approx(
+        [0.005, 0.01, np.pi * 0.01]
+    )
+
+
+def test_speed_changes_apply_to_the_moves_after_them():
+    path = _path(
+        (LINE, 1000, 0),
+        (CommandType.SET_MARK_SPEED, 0, 0, 1000.0),
+        (LINE, 2000, 0),
+    )
+
+    assert command_durations(path, TimingSettings(mark_speed=100.0)) == (
+        pytest.approx([0.01, 0, 0.001])
+    )
+
+
+def test_delays_follow_jumps_and_marks():
+    path = _path(
+        (JUMP, 0, 0),
+        (LINE, 0, 0),
+        (LINE, 0, 0),
+        (CommandType.LIST_NOP, 0, 0),
+        (LINE, 0, 0),
+    )
+    settings = TimingSettings(jump_delay=10, mark_delay=20, polygon_delay=5)
+
+    assert command_durations(path, settings) == pytest.approx(
+        [100e-6, 50e-6, 200e-6, 10e-6, 200e-6]
+    )
+    # The laser off delay holds up the next move if it is longer
+    settings.laser_off_delay = 64 * 1000  # 1 ms
+    assert command_durations(path, settings)[2] == pytest.approx(1e-3)
+
+
+def test_passes_start_where_the_last_finished_at_its_speeds():
+    path = _path(
+        (JUMP, 1000, 0),
+        (CommandType.SET_JUMP_SPEED, 0, 0, 2000.0),
+        (LINE, 2000, 0),
+    )
+    settings = TimingSettings(mark_speed=1000.0, jump_speed=1000.0)
+
+    # 1 ms to jump in and 1 ms to mark, then each pass after jumps back at double
+    # the speed, in 0.5 ms
+    assert estimate_duration(path, settings) == pytest.approx(0.002)
+    assert estimate_duration(path, settings, passes=3) == pytest.approx(0.005)
+    assert estimate_duration(PathArrays.empty(), settings, passes=3) == 0
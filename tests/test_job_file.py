@@ -0,0 +1,61 @@
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rtc6_fastcs.cut_shapes import load_job
+from rtc6_fastcs.execution_list import ExecutionListConfig, parse_execution_list
+from rtc6_fastcs.job_file import read_job, write_job
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+
+TRENCH = (
+    Path(__file__).parent.parent
+    / "shape_protocols"
+    / "RTCExecutionlist_SingleTrenchPlusStrainRelief.txt"
+)
+
+
+def test_converted_job_loads_as_parsed(tmp_path: Path):
+    execution_list = Path(shutil.copy(TRENCH, tmp_path / TRENCH.name))
+    subprocess.check_call(
+        [sys.executable, "-m", "rtc6_fastcs", "convert-job", str(execution_list)]
+    )
+
+    parsed_config, parsed = parse_execution_list(execution_list)
+    config, commands = load_job(execution_list.with_suffix(".rtcjob"))
+
+    assert config == parsed_config
+    for field in ("cmd_type", "x", "y", "angle"):
+        np.testing.assert_array_equal(getattr(commands, field), getattr(parsed, field))
+
+
+def test_job_arrays_are_mapped_from_the_file(tmp_path: Path):
+    job = tmp_path / "hatch.rtcjob"
+    length = 1_000_000
+    write_job(
+        job,
+        ExecutionListConfig(offset_xyz=(1, 2, 3)),
+        PathArrays(
+            np.tile([CommandType.JUMP, CommandType.LINE], length // 2),
+            np.arange(length),
+            -np.arange(length),
+            np.full(length, 0.5),
+        ),
+    )
+
+    config, commands = read_job(job)
+
+    assert config.offset_xyz == (1, 2, 3)
+    assert isinstance(commands.x.base, np.memmap)
+    assert not commands.x.flags.writeable
+    assert commands.y[-1] == 1 - length
+    write_job(job, config, PathArrays.empty())
+    assert len(read_job(job)[1]) == 0
+
+
+def test_other_files_are_not_read_as_jobs(tmp_path: Path):
+    with pytest.raises(ValueError, match="not a version 1 job file"):
+        read_job(TRENCH)
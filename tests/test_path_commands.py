@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays, PathCommand
+
+
+def test_path_arrays_from_commands():
+    arrays = PathArrays.from_commands(
+        [
+            PathCommand("jump", 10, -10),
+            PathCommand("line", 20, 0),
+            PathCommand("arc", 0, 0, -90.5),
+        ]
+    )
+
+    assert len(arrays) == 3
+    assert list(arrays.cmd_type) == [
+        CommandType.JUMP,
+        CommandType.LINE,
+        CommandType.ARC,
+    ]
+    assert arrays.cmd_type.dtype == np.uint8
+    assert arrays.x.dtype == np.int32
+    assert list(arrays.x) == [10, 20, 0]
+    assert list(arrays.y) == [-10, 0, 0]
+    assert list(arrays.angle) == [0.0, 0.0, -90.5]
+
+
+def test_path_arrays_must_be_the_same_length():
+    with pytest.raises(ValueError, match="same length"):
+        PathArrays(np.zeros(2), np.zeros(2), np.zeros(1), np.zeros(2))
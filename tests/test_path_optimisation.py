@@ -0,0 +1,266 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+from rtc6_fastcs.path_optimisation import (
+    end_points,
+    fit_arcs,
+    jump_distance,
+    optimise_jump_order,
+    simplify_path,
+)
+
+JUMP, LINE, ARC = CommandType.JUMP, CommandType.LINE, CommandType.ARC
+
+
+def _path(*commands: tuple) -> PathArrays:
+    cmd_type, x, y, angle = zip(*((*c, 0.0)[:4] for c in commands), strict=True)
+    return PathArrays(cmd_type, x, y, angle)
+
+
+def _square(x: int, y: int, size: int = 10) -> list[tuple]:
+    return [
+        (JUMP, x, y),
+        (LINE, x + size, y),
+        (LINE, x + size, y + size),
+        (LINE, x, y + size),
+        (LINE, x, y),
+    ]
+
+
+def _marks(path: PathArrays) -> list:
+    """Every mark as its unordered pair of end points, so the direction is ignored"""
+    ends = np.round(end_points(path), 6)
+    before = np.vstack(([0, 0], ends[:-1]))
+    marks = path.cmd_type != JUMP
+    return sorted(
+        tuple(sorted((tuple(a), tuple(b))))
+        for a, b in zip(before[marks], ends[marks], strict=True)
+    )
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_squares_are_reordered_to_shorten_the_jumps(reverse: bool):
+    path = _path(*_square(1000, 0), *_square(0, 0), *_square(2000, 0), *_square(500, 0))
+
+    optimised, report = optimise_jump_order(path, reverse=reverse, jump_speed=100)
+    assert list(optimised.x[optimised.cmd_type == JUMP]) == [0, 500, 1000, 2000]
+    assert _marks(optimised) == _marks(path)
+    assert report.chains == 4
+    assert report.jump_distance_before == jump_distance(path) == 5500
+    assert report.jump_distance_after == jump_distance(optimised) == 2000
+    assert report.time_saved == pytest.approx(0.035)
+
+
+def test_chains_keep_their_order_if_reordering_would_lengthen_the_jumps():
+    # Nearest neighbour goes to (50, 89) last, a long way from where it ends
+    path = _path(
+        (JUMP, 54, 1),
+        (LINE, 39, 48),
+        (JUMP, 23, 18),
+        (LINE, 92, 97),
+        (JUMP, 50, 89),
+        (LINE, 48, 96),
+    )
+
+    optimised, report = optimise_jump_order(path, reverse=False)
+    for field in ("cmd_type", "x", "y", "angle"):
+        np.testing.assert_array_equal(getattr(optimised, field), getattr(path, field))
+    assert report.jump_distance_after == report.jump_distance_before
+
+
+def test_chains_may_be_marked_backwards():
+    # The far end of the second line is nearest the end of the first
+    path = _path((JUMP, 0, 0), (LINE, 100, 0), (JUMP, 100, 500), (LINE, 100, 10))
+
+    forwards, _ = optimise_jump_order(path, reverse=False)
+    assert jump_distance(forwards) == jump_distance(path)
+    backwards, report = optimise_jump_order(path)
+    assert list(zip(backwards.x, backwards.y, strict=True)) == [
+        (0, 0),
+        (100, 0),
+        (100, 10),
+        (100, 500),
+    ]
+    assert report.jump_distance_after == 10
+    assert _marks(backwards) == _marks(path)
+
+
+def test_reversed_arcs_turn_back_to_where_they_started():
+    path = _path(
+        (JUMP, 1000, 0),
+        (LINE, 100, 0),
+        (ARC, 0, 0, 90.0),
+        (LINE, 0, 50),
+        (JUMP, 0, 60),
+        (LINE, 0, 70),
+    )
+
+    optimised, report = optimise_jump_order(path, start=(0, 40))
+    # The short line is marked first, then the arc chain from its end at (0, 50)
+    assert list(optimised.x[optimised.cmd_type == JUMP]) == [0, 0]
+    assert optimised.y[optimised.cmd_type == JUMP][1] == 50
+    assert report.jump_distance_after == 40
+    arc = np.flatnonzero(optimised.cmd_type == ARC)[0]
+    assert (optimised.x[arc], optimised.y[arc]) == (0, 0)
+    assert optimised.angle[arc] == -90.0
+    assert end_points(optimised, (0, 40))[-1] == pytest.approx([1000, 0])
+    assert _marks(optimised) == _marks(path)
+
+
+def test_other_commands_keep_their_place():
+    speed = (CommandType.SET_MARK_SPEED, 0, 0, 500.0)
+    path = _path(
+        speed,
+        *_square(1000, 0),
+        *_square(0, 0),
+        _square(3000, 0)[0],
+        speed,
+        *_square(3000, 0)[1:],
+        *_square(5000, 0),
+        *_square(4000, 0),
+        (JUMP, 6000, 0),
+    )
+
+    optimised, report = optimise_jump_order(path)
+    assert report.chains == 4
+    assert optimised.cmd_type[0] == CommandType.SET_MARK_SPEED
+    assert list(optimised.x[optimised.cmd_type == JUMP]) == [
+        0,
+        1000,
+        3000,
+        4000,
+        5000,
+        6000,
+    ]
+    # The speed change still comes before the last two squares and after the
+    # first two, and the final move to park is still last
+    assert np.flatnonzero(optimised.cmd_type == CommandType.SET_MARK_SPEED)[1] == 12
+    assert (optimised.cmd_type[-1], optimised.x[-1]) == (JUMP, 6000)
+
+
+def test_paths_without_chains_are_unchanged():
+    path = _path((CommandType.LIST_NOP, 0, 0), (LINE, 10, 0))
+
+    optimised, report = optimise_jump_order(path)
+    assert _marks(optimised) == _marks(path)
+    assert list(optimised.cmd_type) == list(path.cmd_type)
+    assert report.chains == 0
+    assert report.time_saved == 0
+
+
+def _points(path: PathArrays) -> list[tuple[int, int, int]]:
+    return list(zip(path.cmd_type, path.x, path.y, strict=True))
+
+
+def test_simplify_merges_straight_lines_but_not_turning_back():
+    path = _path(
+        (JUMP, 0, 0),
+        (LINE, 10, 0),
+        (LINE, 20, 0),
+        (LINE, 30, 0),
+        (LINE, 15, 0),  # back over the same line
+        (LINE, 15, 10),
+        (LINE, 15, 20),
+    )
+
+    assert _points(simplify_path(path)) == [
+        (JUMP, 0, 0),
+        (LINE, 30, 0),
+        (LINE, 15, 0),
+        (LINE, 15, 20),
+    ]
+
+
+def test_simplify_drops_still_moves_and_jumps_straight_followed_by_jumps():
+    path = _path(
+        (LINE, 0, 0),  # the first move is kept, as where the head is isn't known
+        (JUMP, 50, 50),
+        (JUMP, 10, 0),
+        (LINE, 10, 0),
+        (ARC, 0, 0, 360.0),
+        (ARC, 0, 0, 0.0),
+        (JUMP, 10, 0),
+        (LINE, 20, 0),
+    )
+
+    assert _points(simplify_path(path)) == [
+        (LINE, 0, 0),
+        (JUMP, 10, 0),
+        (ARC, 0, 0),
+        (LINE, 20, 0),
+    ]
+
+
+def test_simplify_drops_points_within_the_tolerance():
+    wiggle = [(LINE, x, (x // 10) % 2) for x in range(10, 101, 10)]
+    path = _path((JUMP, 0, 0), *wiggle, (LINE, 100, 50))
+
+    assert len(simplify_path(path)) == len(path)
+    assert _points(simplify_path(path, tolerance=1)) == [
+        (JUMP, 0, 0),
+        (LINE, 100, 0),
+        (LINE, 100, 50),
+    ]
+
+
+def test_simplify_keeps_lines_either_side_of_other_commands():
+    path = _path(
+        (JUMP, 0, 0),
+        (LINE, 10, 0),
+        (CommandType.SET_MARK_SPEED, 0, 0, 100.0),
+        (LINE, 20, 0),
+        (LINE, 30, 0),
+    )
+
+    assert _points(simplify_path(path)) == [
+        (JUMP, 0, 0),
+        (LINE, 10, 0),
+        (CommandType.SET_MARK_SPEED, 0, 0),
+        (LINE, 30, 0),
+    ]
+
+
+def _arc_polyline(centre, radius, start_deg, stop_deg, lines: int) -> list[tuple]:
+    theta = np.radians(np.linspace(start_deg, stop_deg, lines + 1))
+    x = np.rint(centre[0] + radius * np.cos(theta))
+    y = np.rint(centre[1] + radius * np.sin(theta))
+    return [(JUMP, x[0], y[0])] + [(LINE, *p) for p in zip(x[1:], y[1:], strict=True)]
+
+
+def test_lines_along_a_circle_become_an_arc():
+    path = _path(*_arc_polyline((100, -50), 2000, 10, 280, 200), (LINE, 0, 0))
+
+    fitted = fit_arcs(path, tolerance=1.0)
+
+    assert list(fitted.cmd_type) == [JUMP, ARC, LINE]
+    assert (fitted.x[1], fitted.y[1]) == (100, -50)
+    assert fitted.angle[1] == pytest.approx(270, abs=0.1)
+    # The arc finishes where the lines did, and the line after still starts there
+    np.testing.assert_allclose(end_points(fitted)[1], (path.x[-2], path.y[-2]), atol=1)
+
+
+def test_arcs_only_cover_lines_which_fit():
+    path = _path(
+        *_arc_polyline((0, 0), 1000, 0, 90, 50),
+        (LINE, 0, 2000),
+        (LINE, -1000, 0),
+        (CommandType.SET_MARK_SPEED, 0, 0, 100.0),
+        *_arc_polyline((0, 0), 1000, 180, 90, 50)[1:],
+    )
+
+    fitted = fit_arcs(path, tolerance=1.0)
+
+    # Clockwise arcs have negative angles, and arcs don't run past speed changes
+    assert list(fitted.cmd_type) == [
+        JUMP,
+        ARC,
+        LINE,
+        LINE,
+        CommandType.SET_MARK_SPEED,
+        ARC,
+    ]
+    assert fitted.angle[[1, 5]] == pytest.approx([90, -90], abs=0.1)
+    assert len(fit_arcs(_path(*_square(0, 0)), tolerance=1.0)) == 5
+    # Without a tolerance for the bits the vertices were rounded to, nothing fits
+    assert len(fit_arcs(path, tolerance=0.0)) == len(path)
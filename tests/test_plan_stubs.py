@@ -0,0 +1,34 @@
+import numpy as np
+
+from rtc6_fastcs.path_commands import CommandType
+from rtc6_fastcs.plan_stubs import convert_um_to_bits, polygon_path
+
+
+def test_polygon_path_starts_with_a_jump_and_converts_to_bits():
+    path = polygon_path(
+        [(-100, 100, True), (0, 50, True), (10, 0, -90.0), (5, 5, False)]
+    )
+
+    assert list(path.cmd_type) == [
+        CommandType.JUMP,
+        CommandType.LINE,
+        CommandType.ARC,
+        CommandType.JUMP,
+    ]
+    assert list(path.x) == [convert_um_to_bits(x) for x in (-100, 0, 10, 5)]
+    assert list(path.y) == [convert_um_to_bits(y) for y in (100, 50, 0, 5)]
+    assert list(path.angle) == [0.0, 0.0, -90.0, 0.0]
+
+
+def test_polygon_path_only_makes_arcs_from_floats():
+    points = [(0, 0, True), (10, 0, 1), (20, 0, np.True_), (30, 0, 0), (40, 0, 45.0)]
+
+    assert list(polygon_path(points).cmd_type) == [
+        CommandType.JUMP,
+        CommandType.LINE,
+        CommandType.LINE,
+        CommandType.JUMP,
+        CommandType.ARC,
+    ]
+    # draw_polygon takes the flag as laser on, whatever its type
+    assert list(polygon_path(points, arcs=False).cmd_type)[-1] == CommandType.LINE
@@ -0,0 +1,49 @@
+import asyncio
+from pathlib import Path
+
+from rtc6_fastcs.bindings.simulated_rtc6 import SimulatedRtc6
+from rtc6_fastcs.controller.rtc_connection import RtcConnection
+
+
+def _connection(tmp_path: Path, card: SimulatedRtc6) -> RtcConnection:
+    program_files = tmp_path / "program_files"
+    program_files.mkdir()
+    (program_files / "RTC6RBF.rbf").write_bytes(b"program")
+    (tmp_path / "table.ct5").write_bytes(b"correction")
+    return RtcConnection(
+        "1.2.3.4", str(program_files), str(tmp_path / "table.ct5"), bindings=card
+    )
+
+
+def test_reconnecting_reuses_the_files_already_on_the_card(tmp_path: Path):
+    async def run():
+        card = SimulatedRtc6()
+        conn = _connection(tmp_path, card)
+
+        await conn.connect()
+        await conn.connect()
+        assert (card.calls["connect"], card.calls["reconnect"]) == (1, 1)
+
+        # Only the same files on the same card are reused
+        (tmp_path / "table.ct5").write_bytes(b"new correction")
+        await conn.connect()
+        assert card.calls["connect"] == 2
+        card.serial_number += 1
+        await conn.connect()
+        assert card.calls["connect"] == 3
+
+    asyncio.run(run())
+
+
+def test_files_are_loaded_again_after_a_power_cycle(tmp_path: Path):
+    async def run():
+        card = SimulatedRtc6()
+        conn = _connection(tmp_path, card)
+        await conn.connect()
+
+        card.program_loaded = False
+        await conn.connect()
+        assert (card.calls["connect"], card.calls["reconnect"]) == (2, 1)
+        assert card.program_loaded
+
+    asyncio.run(run())
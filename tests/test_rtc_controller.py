@@ -0,0 +1,574 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from rtc6_fastcs.bindings.simulated_rtc6 import ListStatus, RtcListError, SimulatedRtc6
+from rtc6_fastcs.controller import (
+    BoxConfig,
+    RtcController,
+    RtcMultiController,
+    rtc_controller,
+)
+from rtc6_fastcs.controller.rtc_controller import RtcCardBase, RtcControlSettings
+from rtc6_fastcs.execution_list import ExecutionListConfig
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+
+TIMEOUT = 5.0
+
+
+class _LoggingRtc6(SimulatedRtc6):
+    """Records the order of the calls and checks that they never overlap"""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.log: list[str] = []
+        self.threads: set[str] = set()
+        self.overlapped = False
+        self._lock = threading.Lock()
+
+    def _round_trip(self, name: str, commands: int = 0) -> None:
+        if not self._lock.acquire(blocking=False):
+            self.overlapped = True
+            self._lock.acquire()
+        try:
+            self.log.append(name)
+            self.threads.add(threading.current_thread().name)
+            super()._round_trip(name, commands)
+        finally:
+            self._lock.release()
+
+
+async def _connected_controller(card: SimulatedRtc6) -> RtcController:
+    controller = RtcController("1.2.3.4", "", "", bindings=card)
+    await controller.connect()
+    await controller._list_controller.init_list()
+    return controller
+
+
+def _stage(controller: RtcCardBase, commands: PathArrays) -> None:
+    for field in ("cmd_type", "x", "y", "angle"):
+        controller.path_controller.stage(field, getattr(commands, field))
+
+
+def _line_path(length: int, step: int = 100) -> PathArrays:
+    return PathArrays(
+        np.full(length, CommandType.LINE),
+        np.arange(1, length + 1) * step,
+        np.zeros(length),
+        np.zeros(length),
+    )
+
+
+async def _wait_until_done(controller: RtcCardBase, executions: int = 1) -> None:
+    list_operations = controller._list_controller
+    async with asyncio.timeout(TIMEOUT):
+        while list_operations.executions_done.get() != executions:
+            await controller.update_status()
+            await asyncio.sleep(0.01)
+
+
+def test_subroutine_calls_are_refused_until_they_are_loaded():
+    async def run():
+        card = SimulatedRtc6()
+        controller = await _connected_controller(card)
+        _stage(
+            controller,
+            PathArrays(
+                [CommandType.JUMP, CommandType.SUB_CALL_REPEAT], [0, 0], [0, 2], [0, 0]
+            ),
+        )
+
+        with pytest.raises(ValueError, match="SubroutinesLoaded"):
+            await controller.path_controller.proc()
+        assert "add_path" not in card.calls
+
+        await controller._list_controller.subroutines_loaded.set(True)
+        await controller.path_controller.proc()
+        assert card.calls["add_path"] == 1
+
+    asyncio.run(run())
+
+
+def test_paths_leaving_the_safe_region_are_refused_or_clipped():
+    async def run():
+        card = SimulatedRtc6()
+        controller = await _connected_controller(card)
+        path = controller.path_controller
+        await path.safe_x_max.set(1000)
+        _stage(
+            controller, PathArrays([CommandType.LINE] * 2, [500, 1500], [0, 0], [0, 0])
+        )
+
+        with pytest.raises(ValueError, match="LINE 1"):
+            await path.proc()
+        assert "add_path" not in card.calls
+
+        await path.clip.set(True)
+        await path.proc()
+        commands, _ = path.last_upload
+        assert list(commands.x) == [500, 1000]
+
+    asyncio.run(run())
+
+
+def test_failed_stream_is_reported():
+    async def run():
+        card = SimulatedRtc6()
+        controller = await _connected_controller(card)
+        list_operations = controller._list_controller
+        _stage(controller, PathArrays([CommandType.SUB_CALL_REPEAT], [0], [2], [0]))
+
+        with pytest.raises(ValueError):
+            await controller.path_controller.stream()
+        assert list_operations.executions_failed.get() == 1
+        assert "SubroutinesLoaded" in list_operations.last_failure.get()
+        assert list_operations.executions_started.get() == 0
+        assert not list_operations.streaming
+
+    asyncio.run(run())
+
+
+def test_stale_snapshot_does_not_retire_a_new_execution():
+    async def run():
+        card = SimulatedRtc6(time_scale=0.01)
+        controller = await _connected_controller(card)
+        list_operations = controller._list_controller
+        _stage(
+            controller,
+            PathArrays([CommandType.LINE] * 100, range(100), [0] * 100, [0] * 100),
+        )
+        await controller.path_controller.proc()
+        await list_operations.end_list()
+
+        # The scan reads executions_started, then the snapshot is taken before
+        # execute_list reaches the card
+        started = list_operations.executions_started.get()
+        stale = card.get_status_snapshot()
+        await list_operations.execute_list()
+        await list_operations.update_status(stale, started)
+        assert list_operations.busy.get()
+        assert list_operations.executions_done.get() == 0
+
+        async with asyncio.timeout(TIMEOUT):
+            while list_operations.executions_done.get() != 1:
+                await controller.update_status()
+                await asyncio.sleep(0.01)
+        assert not list_operations.busy.get()
+
+    asyncio.run(run())
+
+
+def test_stream_chains_chunks_while_the_card_is_marking():
+    async def run():
+        card = SimulatedRtc6()
+        controller = await _connected_controller(card)
+        path = controller.path_controller
+        _stage(controller, _line_path(450))  # 40 ms for each chunk of 100
+        await path.chunk_size.set(100)
+
+        await path.stream()
+        assert card.calls["add_path"] == 5
+        # Loading is quicker than marking, so every chunk is chained on
+        assert card.calls["auto_change"] == 4
+        assert card.calls["execute_list"] == 1
+        assert controller._list_controller.executions_started.get() == 1
+        await _wait_until_done(controller)
+        assert path.commands_written.get() == 50
+
+    asyncio.run(run())
+
+
+def test_stream_starts_chunks_itself_when_the_upload_falls_behind():
+    async def run():
+        # Each chunk marks far quicker than it takes to load the next one
+        card = SimulatedRtc6(latency=0.005, time_scale=0.001)
+        controller = await _connected_controller(card)
+        path = controller.path_controller
+        _stage(controller, _line_path(300))
+        await path.chunk_size.set(100)
+
+        await path.stream()
+        assert card.calls["add_path"] == 3
+        assert card.calls.get("auto_change", 0) == 0
+        assert card.calls["execute_list"] == 3
+        await _wait_until_done(controller)
+        assert controller._list_controller.executions_started.get() == 1
+
+    asyncio.run(run())
+
+
+class _RefusesLoading(SimulatedRtc6):
+    def load_list(self, list_no: int, position: int) -> int:
+        self._round_trip("load_list")
+        return 0
+
+
+class _StuckBusy(SimulatedRtc6):
+    def get_list_statuses(self) -> list[ListStatus]:
+        return [*super().get_list_statuses(), ListStatus.BUSY1, ListStatus.BUSY2]
+
+
+@pytest.mark.parametrize(
+    "card_type, error", [(_RefusesLoading, RtcListError), (_StuckBusy, TimeoutError)]
+)
+def test_stream_fails_if_the_next_list_cant_be_loaded(
+    card_type: type[SimulatedRtc6],
+    error: type[Exception],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(rtc_controller, "STREAM_TIMEOUT_MIN", 0.1)
+
+    async def run():
+        card = card_type()
+        controller = await _connected_controller(card)
+        list_operations = controller._list_controller
+        _stage(controller, _line_path(200))
+        await controller.path_controller.chunk_size.set(100)
+
+        with pytest.raises(error):
+            async with asyncio.timeout(TIMEOUT):
+                await controller.path_controller.stream()
+        assert card.calls["add_path"] == 1
+        assert list_operations.executions_failed.get() == 1
+        assert list_operations.last_failure.get().startswith(error.__name__)
+
+    asyncio.run(run())
+
+
+def test_stream_chunks_are_ended_before_anything_else_is_added():
+    async def run():
+        card = _LoggingRtc6(latency=0.001)
+        controller = await _connected_controller(card)
+        add_line = controller._list_controller.get_sub_controllers()["ADDLINE"]
+        _stage(controller, _line_path(300))
+        await controller.path_controller.chunk_size.set(100)
+        card.log.clear()
+
+        await asyncio.gather(
+            controller.path_controller.stream(), *(add_line.proc() for _ in range(20))
+        )
+        for index, name in enumerate(card.log):
+            if name == "add_path":
+                assert card.log[index + 1] == "set_end_of_list"
+        await _wait_until_done(controller)
+
+    asyncio.run(run())
+
+
+def test_status_is_read_faster_while_a_list_is_running():
+    async def run():
+        card = SimulatedRtc6()
+        controller = await _connected_controller(card)
+        list_operations = controller._list_controller
+        await controller._info_controller.status_period_idle.set(60.0)
+        await controller._info_controller.status_period_busy.set(0.0)
+
+        for _ in range(3):
+            await controller.update_status()
+        assert card.calls["get_status_snapshot"] == 1
+
+        _stage(controller, _line_path(100))
+        await controller.path_controller.proc()
+        await list_operations.end_list()
+        await list_operations.execute_list()
+        await controller.update_status()
+        assert card.calls["get_status_snapshot"] == 2
+        assert list_operations.list_pointer_position.get() == 100
+        assert list_operations.busy.get()
+
+        await _wait_until_done(controller)
+        reads = card.calls["get_status_snapshot"]
+        await controller.update_status()
+        assert card.calls["get_status_snapshot"] == reads
+
+    asyncio.run(run())
+
+
+def test_card_calls_are_made_one_at_a_time_off_the_event_loop():
+    async def run():
+        card = _LoggingRtc6(latency=0.001)
+        controller = await _connected_controller(card)
+        list_operations = controller._list_controller
+        add_line = list_operations.get_sub_controllers()["ADDLINE"]
+        card.log.clear()
+
+        await asyncio.gather(
+            *(add_line.proc() for _ in range(10)),
+            *(controller._info_controller.proc_cardinfo() for _ in range(10)),
+        )
+        assert not card.overlapped
+        assert card.log.count("add_line_to") == 10
+        assert threading.current_thread().name not in card.threads
+        assert all(name.startswith("rtc6") for name in card.threads)
+
+    asyncio.run(run())
+
+
+def test_nothing_is_added_inside_a_repeated_path():
+    async def run():
+        card = _LoggingRtc6(latency=0.001)
+        controller = await _connected_controller(card)
+        list_operations = controller._list_controller
+        path = controller.path_controller
+        _stage(controller, _line_path(10))
+        await path.passes.set(3)
+        card.log.clear()
+
+        await asyncio.gather(
+            list_operations.get_sub_controllers()["ADDLINE"].proc(),
+            path.proc(),
+            list_operations.get_sub_controllers()["ADDJUMP"].proc(),
+        )
+        start = card.log.index("list_repeat")
+        assert card.log[start : start + 3] == ["list_repeat", "add_path", "list_until"]
+        assert sorted(card.log) == sorted(
+            ["add_line_to", "list_repeat", "add_path", "list_until", "add_jump_to"]
+        )
+
+    asyncio.run(run())
+
+
+def test_path_duration_is_estimated_from_the_control_settings():
+    async def run():
+        card = SimulatedRtc6(time_scale=0.01)
+        controller = await _connected_controller(card)
+        control = controller.get_sub_controllers()["CONTROL"]
+        assert isinstance(control, RtcControlSettings)
+        path = controller.path_controller
+        await control.mark_speed.sender.put(control, control.mark_speed, 20.0)
+        await control.mark_delay.set(1000)
+        await control.mark_delay.sender.put(control, control.mark_delay, 1000)
+        _stage(controller, _line_path(10))
+
+        # 1000 bits at 20 bits/ms, then the 10 ms mark delay
+        await path.proc()
+        assert path.estimated_duration.get() == pytest.approx(0.06)
+        # The second pass marks 900 bits back to the start and then the path again,
+        # whether it is repeated on the card or streamed
+        await path.passes.set(2)
+        await path.proc()
+        assert path.estimated_duration.get() == pytest.approx(0.15)
+        await controller._list_controller.init_list()
+        await path.stream()
+        assert path.estimated_duration.get() == pytest.approx(0.15)
+        await _wait_until_done(controller)
+
+    asyncio.run(run())
+
+
+def test_job_config_is_applied_in_one_call():
+    async def run():
+        card = SimulatedRtc6()
+        controller = await _connected_controller(card)
+        control = controller.control_settings
+        list_space = card.get_list_space()
+        calls = sum(card.calls.values())
+
+        await control.apply_job_config(ExecutionListConfig(mark_speed=500.0))
+        assert sum(card.calls.values()) == calls + 1
+        assert card.calls["apply_list_config"] == 1
+        assert card.get_list_space() == list_space - 9
+        assert control.timing.mark_speed == 500.0
+
+    asyncio.run(run())
+
+
+def test_settings_the_card_already_has_are_not_sent_again():
+    async def run():
+        card = SimulatedRtc6(time_scale=0.01)
+        controller = await _connected_controller(card)
+        control = controller.control_settings
+        list_operations = controller._list_controller
+        config = ExecutionListConfig(mark_speed=500.0)
+
+        for _ in range(2):
+            await control.mark_speed.sender.put(control, control.mark_speed, 20.0)
+        assert card.calls["set_mark_speed_ctrl"] == 1
+        await control.apply_job_config(config)
+        await control.apply_job_config(config)
+        assert card.calls["apply_list_config"] == 1
+
+        # The list with the settings in was started again before it ran
+        await list_operations.init_list()
+        await control.apply_job_config(config)
+        assert card.calls["apply_list_config"] == 2
+        await list_operations.end_list()
+        await list_operations.execute_list()
+        await _wait_until_done(controller)
+        await list_operations.init_list()
+        await control.apply_job_config(config)
+        assert card.calls["apply_list_config"] == 2
+
+        await control.forget_settings()
+        await control.apply_job_config(config)
+        assert card.calls["apply_list_config"] == 3
+        await controller.connect()
+        await control.mark_speed.sender.put(control, control.mark_speed, 20.0)
+        assert card.calls["set_mark_speed_ctrl"] == 2
+
+    asyncio.run(run())
+
+
+def test_speeds_set_by_a_path_are_not_taken_as_cached():
+    async def run():
+        card = SimulatedRtc6(time_scale=0.01)
+        controller = await _connected_controller(card)
+        control = controller.control_settings
+        list_operations = controller._list_controller
+        config = ExecutionListConfig(mark_speed=1086.72)
+        commands = PathArrays(
+            [CommandType.JUMP, CommandType.SET_MARK_SPEED, CommandType.LINE],
+            [0, 0, 100],
+            [0, 0, 0],
+            [0, 815.04, 0],
+        )
+
+        for runs in (1, 2):
+            await control.apply_job_config(config)
+            assert card.calls["apply_list_config"] == runs
+            assert control.timing.mark_speed == 1086.72
+            _stage(controller, commands)
+            await controller.path_controller.proc()
+            # Once it runs the card is at the speed the path set last
+            assert control.timing.mark_speed == 815.04
+            await list_operations.end_list()
+            await list_operations.execute_list()
+            await _wait_until_done(controller, runs)
+            await list_operations.init_list()
+
+    asyncio.run(run())
+
+
+def test_lost_connection_is_recovered_with_the_settings_and_last_path():
+    async def run():
+        card = SimulatedRtc6()
+        controller = await _connected_controller(card)
+        control = controller.control_settings
+        info = controller._info_controller
+        await info.reupload_after_reconnect.set(True)
+        await control.mark_speed.sender.put(control, control.mark_speed, 20.0)
+        _stage(controller, _line_path(10))
+        await controller.path_controller.proc()
+        await controller.supervise_connection()
+        assert info.reconnects.get() == 0
+
+        # As if the box was power cycled
+        card.reachable = False
+        card.program_loaded = False
+        recovery = asyncio.create_task(controller.supervise_connection())
+        await asyncio.sleep(0.2)
+        assert not info.connected.get()
+        card.reachable = True
+        async with asyncio.timeout(TIMEOUT):
+            await recovery
+
+        assert info.connected.get()
+        assert info.reconnects.get() == 1
+        assert 0.2 < info.recovery_time.get() < TIMEOUT
+        assert card.calls["set_mark_speed_ctrl"] == 2
+        assert card.calls["add_path"] == 2
+        assert card.get_status_snapshot().input_pointer == 10
+
+    asyncio.run(run())
+
+
+class _DropsDuringRecovery(SimulatedRtc6):
+    """Loses the connection again on the next get_card_info once drop is set"""
+
+    drop = False
+
+    def get_card_info(self):
+        if self.drop:
+            self.drop = False
+            self.reachable = False
+        return super().get_card_info()
+
+
+def test_recovery_is_tried_again_if_the_card_drops_during_it():
+    async def run():
+        card = _DropsDuringRecovery()
+        controller = await _connected_controller(card)
+        control = controller.control_settings
+        info = controller._info_controller
+        await control.mark_speed.sender.put(control, control.mark_speed, 20.0)
+
+        card.reachable = False
+        recovery = asyncio.create_task(controller.supervise_connection())
+        await asyncio.sleep(0.1)
+        card.reachable, card.drop = True, True
+        async with asyncio.timeout(TIMEOUT):
+            await recovery
+        assert not info.connected.get()
+        assert info.reconnects.get() == 0
+
+        # The next check answers, but the state still has to be restored
+        card.reachable = True
+        async with asyncio.timeout(TIMEOUT):
+            await controller.supervise_connection()
+        assert info.connected.get()
+        assert info.reconnects.get() == 1
+        assert card.calls["set_mark_speed_ctrl"] == 3
+
+    asyncio.run(run())
+
+
+def test_execution_running_when_the_connection_is_lost_fails():
+    async def run():
+        card = SimulatedRtc6()
+        controller = await _connected_controller(card)
+        list_operations = controller._list_controller
+        _stage(controller, _line_path(1000))  # 0.4 s at the default speed
+        await controller.path_controller.proc()
+        await list_operations.end_list()
+        await list_operations.execute_list()
+
+        card.reachable = False
+        recovery = asyncio.create_task(controller.supervise_connection())
+        await asyncio.sleep(0.05)
+        card.reachable = True
+        async with asyncio.timeout(TIMEOUT):
+            await recovery
+
+        assert list_operations.executions_failed.get() == 1
+        assert "Lost the connection" in list_operations.last_failure.get()
+        assert list_operations.executions_done.get() == 1
+        assert not list_operations.busy.get()
+
+    asyncio.run(run())
+
+
+def test_boxes_upload_and_execute_in_parallel():
+    async def run():
+        cards = [_LoggingRtc6(latency=0.05), _LoggingRtc6(latency=0.05)]
+        controller = RtcMultiController(
+            [BoxConfig("1.2.3.4", "", ""), BoxConfig("1.2.3.5", "", "")],
+            bindings=cards,
+        )
+        assert list(controller.get_sub_controllers()) == ["CARD1", "CARD2"]
+        assert controller.cards[1].path_controller.path == ["CARD2", "LIST", "PATH"]
+        await controller.connect()
+
+        async def job(card: RtcCardBase):
+            list_operations = card._list_controller
+            await list_operations.init_list()
+            _stage(card, _line_path(10))
+            await card.path_controller.proc()
+            await list_operations.end_list()
+            await list_operations.execute_list()
+            await _wait_until_done(card)
+
+        calls = sum(cards[0].calls.values())
+        start = asyncio.get_running_loop().time()
+        await asyncio.gather(*(job(card) for card in controller.cards))
+        elapsed = asyncio.get_running_loop().time() - start
+
+        # Each box has its own worker, so the two jobs take as long as one
+        assert cards[0].calls == cards[1].calls
+        assert elapsed < 1.5 * (sum(cards[0].calls.values()) - calls) * 0.05
+        assert not any(card.overlapped for card in cards)
+        assert cards[0].threads.isdisjoint(cards[1].threads)
+        await controller.close()
+
+    asyncio.run(run())
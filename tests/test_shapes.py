@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from rtc6_fastcs import shapes
+from rtc6_fastcs.path_commands import CommandType
+from rtc6_fastcs.path_optimisation import end_points
+from rtc6_fastcs.plan_stubs import polygon_path
+from rtc6_fastcs.transform import BITS_PER_UM
+
+
+def test_cylinder_is_the_polygon_it_replaces():
+    points = [
+        (-100, 100, False),
+        (0, 50, True),
+        (200, 50, True),
+        (200, -50, True),
+        (0, -50, True),
+        (-100, -100, True),
+    ]
+    path, expected = shapes.cylinder(100, 200), polygon_path(points, arcs=False)
+
+    for field in ("cmd_type", "x", "y", "angle"):
+        np.testing.assert_array_equal(getattr(path, field), getattr(expected, field))
+
+
+def test_coordinates_are_rounded_once_to_the_nearest_bit():
+    path = shapes.polyline([1 / 3, 2 / 3], [-0.5 / BITS_PER_UM, 0.49 / BITS_PER_UM])
+
+    assert list(path.x) == [9, 18]
+    assert list(path.y) == [-0, 0]
+
+
+def test_omega_arc_runs_from_one_side_of_the_neck_to_the_other():
+    path = shapes.omega(neck_width=20, sphere_radius=50)
+
+    assert list(path.cmd_type) == [
+        CommandType.JUMP,
+        CommandType.LINE,
+        CommandType.ARC,
+        CommandType.LINE,
+        CommandType.LINE,
+    ]
+    # The arc ends within rounding of the lower side of the neck
+    np.testing.assert_allclose(end_points(path)[2], (0, -10 * BITS_PER_UM), atol=1)
+
+
+def test_parametric_curves_are_sampled_in_one_go():
+    radius = 100
+    path = shapes.parametric(
+        lambda t: (radius * np.cos(t), radius * np.sin(t)), 1000, 0, 2 * np.pi
+    )
+
+    assert len(path) == 1000
+    assert path.cmd_type[0] == CommandType.JUMP
+    assert np.all(path.cmd_type[1:] == CommandType.LINE)
+    assert np.hypot(path.x, path.y) == pytest.approx(radius * BITS_PER_UM, abs=1)
+    # Constant coordinates are spread along the curve
+    assert list(shapes.parametric(lambda t: (t, 0), 3).y) == [0, 0, 0]
+
+
+def test_sphere_is_a_full_circle_back_to_its_start():
+    path = shapes.sphere(50, centre=(10, 0))
+
+    np.testing.assert_allclose(end_points(path)[-1], (60 * BITS_PER_UM, 0), atol=1)
@@ -0,0 +1,166 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from rtc6_fastcs.bindings.simulated_rtc6 import SimulatedRtc6
+from rtc6_fastcs.controller import RtcController
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+
+TIMEOUT = 5.0
+
+
+def _line_path(length: int, step: int = 100) -> PathArrays:
+    return PathArrays(
+        np.full(length, CommandType.LINE),
+        np.arange(1, length + 1) * step,
+        np.zeros(length),
+        np.zeros(length),
+    )
+
+
+def _connected_card(**kwargs) -> SimulatedRtc6:
+    card = SimulatedRtc6(**kwargs)
+    card.connect("1.2.3.4", "", "")
+    card.config_list_memory(1000, 1000)
+    card.init_list_loading(1)
+    card.set_scanner_delays(0, 0, 0)
+    return card
+
+
+def _add(card: SimulatedRtc6, path: PathArrays) -> tuple[int, int]:
+    return card.add_path(path.cmd_type, path.x, path.y, path.angle)
+
+
+def _wait_for(card: SimulatedRtc6, status) -> float:
+    """Wait until the status is set, returning the time taken"""
+    start = time.monotonic()
+    while status not in card.get_list_statuses():
+        assert time.monotonic() - start < TIMEOUT, f"Timed out waiting for {status}"
+        time.sleep(0.001)
+    return time.monotonic() - start
+
+
+def _run_time(card: SimulatedRtc6) -> float:
+    card.set_end_of_list()
+    card.execute_list(1)
+    return _wait_for(card, card.ListStatus.USED1)
+
+
+def test_list_runs_for_the_time_taken_to_mark_it():
+    card = _connected_card()
+    card.set_mark_speed_ctrl(10.0)  # bits/ms
+    _add(card, _line_path(10))  # 1000 bits, 100 ms
+
+    assert _run_time(card) == pytest.approx(0.1, abs=0.05)
+
+
+def test_delays_and_speed_commands_are_included():
+    card = _connected_card()
+    card.set_scanner_delays(0, 2000, 5000)  # 10us units
+    path = PathArrays(
+        [CommandType.SET_MARK_SPEED, CommandType.LINE, CommandType.LINE],
+        [0, 100, 200],
+        [0, 0, 0],
+        [1000.0, 0.0, 0.0],
+    )
+    _add(card, path)
+
+    # 0.2 ms of marking, a 50 ms polygon delay and a 20 ms mark delay at the end
+    assert _run_time(card) == pytest.approx(0.0702, abs=0.03)
+
+
+def test_repeats_multiply_the_repeated_block():
+    card = _connected_card()
+    card.set_mark_speed_ctrl(20.0)
+    card.list_repeat()
+    _add(card, _line_path(10))  # 50 ms
+    card.list_until(3)
+
+    assert _run_time(card) == pytest.approx(0.15, abs=0.05)
+
+
+def test_list_is_busy_until_it_finishes_then_used():
+    card = _connected_card()
+    card.set_mark_speed_ctrl(10.0)
+    _add(card, _line_path(10))
+    card.set_end_of_list()
+    assert card.get_list_statuses() == [card.ListStatus.READY1]
+
+    card.execute_list(1)
+    assert card.ListStatus.BUSY1 in card.get_list_statuses()
+    assert card.load_list(1, 0) == 0  # can't load a running list
+    _wait_for(card, card.ListStatus.USED1)
+    assert card.get_list_statuses() == [card.ListStatus.USED1]
+
+
+def test_auto_change_starts_the_other_list_when_the_first_finishes():
+    card = _connected_card()
+    card.set_mark_speed_ctrl(20.0)
+    _add(card, _line_path(10))  # 50 ms each
+    card.set_end_of_list()
+    card.execute_list(1)
+    assert card.load_list(2, 0) == 2
+    _add(card, _line_path(10))
+    card.set_end_of_list()
+    card.auto_change()
+
+    assert card.ListStatus.BUSY2 not in card.get_list_statuses()
+    assert _wait_for(card, card.ListStatus.USED2) == pytest.approx(0.1, abs=0.05)
+
+
+def test_input_pointer_counts_from_the_start_of_list_memory():
+    card = _connected_card()
+    assert _add(card, _line_path(10)) == (10, 10)
+    card.load_list(2, 0)
+    card.add_jump_to(0, 0)
+
+    snapshot = card.get_status_snapshot()
+    assert (snapshot.input_pointer, snapshot.list_space) == (1001, 999)
+
+
+def test_overfilling_a_list_raises():
+    card = _connected_card()
+    with pytest.raises(card.RtcListError, match="full"):
+        _add(card, _line_path(1001))
+
+
+def test_errors_have_the_same_hierarchy_as_the_bindings():
+    assert not issubclass(SimulatedRtc6.RtcListError, SimulatedRtc6.RtcError)
+    assert not issubclass(SimulatedRtc6.RtcConnectionError, SimulatedRtc6.RtcError)
+
+
+def test_unreachable_card_fails_to_connect():
+    card = SimulatedRtc6()
+    card.reachable = False
+    with pytest.raises(card.RtcError):
+        card.connect("1.2.3.4", "", "")
+
+
+def test_controller_runs_a_path_on_the_simulated_card():
+    async def run():
+        card = SimulatedRtc6(time_scale=0.01)
+        controller = RtcController("1.2.3.4", "", "", bindings=card)
+        await controller.connect()
+        list_operations = controller._list_controller
+        path = controller.path_controller
+        commands = _line_path(1000)
+        for field in ("cmd_type", "x", "y", "angle"):
+            path.stage(field, getattr(commands, field))
+
+        await list_operations.init_list()
+        await path.proc()
+        await list_operations.end_list()
+        await list_operations.execute_list()
+        assert list_operations.busy.get()
+        async with asyncio.timeout(TIMEOUT):
+            while list_operations.executions_done.get() != 1:
+                await controller.update_status()
+                await asyncio.sleep(0.01)
+
+        assert not list_operations.busy.get()
+        assert path.commands_written.get() == 1000
+        assert card.calls["add_path"] == 1
+
+    asyncio.run(run())
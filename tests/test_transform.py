@@ -0,0 +1,71 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from rtc6_fastcs.path_commands import CommandType, PathArrays
+from rtc6_fastcs.transform import (
+    apply_affine,
+    apply_correction,
+    arc_direction,
+    compose,
+    job_transform,
+    linear,
+    load_correction_matrix,
+    transform_path,
+    translation,
+    validate_correction_matrix,
+)
+
+
+def test_bundled_correction_matrix_is_a_mirror():
+    matrix = load_correction_matrix(
+        Path(__file__).parent.parent / "correction_files" / "coord_transform"
+    )
+
+    np.testing.assert_array_equal(matrix, [[0, 1], [1, 0]])
+    assert arc_direction(matrix) == -1
+
+
+def test_apply_correction_rounds_half_to_even():
+    matrix = np.array([[0.5, 0], [0, 1.5]])
+    xy = np.array([[1, 1], [3, 3], [-1, -3]], dtype=np.int32)
+
+    corrected = apply_correction(matrix, xy)
+
+    assert corrected.dtype == np.int32
+    np.testing.assert_array_equal(corrected, [[0, 2], [2, 4], [0, -4]])
+
+
+@pytest.mark.parametrize(
+    "matrix", [np.identity(3), [[1, 0], [2, 0]], [[np.nan, 0], [0, 1]]]
+)
+def test_invalid_correction_matrices_are_rejected(matrix):
+    with pytest.raises(ValueError):
+        validate_correction_matrix(np.array(matrix))
+
+
+def test_job_transform_is_each_step_in_turn():
+    correction = np.array([[0, 1], [1, 0]])
+    affine = job_transform(
+        27000, angle_deg=90, offset_um=(10, 0), correction=correction
+    )
+
+    # (1, 0) turns to (0, 1), moves to (10, 1), is 27 bits/um, then mirrored
+    np.testing.assert_array_equal(apply_affine(affine, [[1, 0]]), [[27, 270]])
+    assert arc_direction(affine) == -1
+
+
+def test_transform_path_only_moves_positions():
+    path = PathArrays(
+        [CommandType.JUMP, CommandType.ARC, CommandType.SET_MARK_SPEED],
+        [1, 2, 0],
+        [0, 0, 0],
+        [0.0, 90.0, 100.0],
+    )
+
+    moved = transform_path(compose(linear([[-1, 0], [0, 1]]), translation(5, 1)), path)
+
+    assert list(moved.x) == [4, 3, 0]
+    assert list(moved.y) == [1, 1, 0]
+    assert list(moved.angle) == [0.0, -90.0, 100.0]